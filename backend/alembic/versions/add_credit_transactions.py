@@ -0,0 +1,37 @@
+"""add credit_transactions ledger
+
+Revision ID: add_credit_transactions
+Revises: add_product_change_asin_index
+Create Date: 2025-04-25 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_credit_transactions'
+down_revision = 'add_product_change_asin_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('credit_transactions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('balance_after', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.String(), nullable=False),
+        sa.Column('actor_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['actor_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_credit_transactions_user_id', 'credit_transactions', ['user_id'])
+
+
+def downgrade():
+    op.drop_index('ix_credit_transactions_user_id', table_name='credit_transactions')
+    op.drop_table('credit_transactions')
@@ -0,0 +1,23 @@
+"""add index on product_changes (asin, change_date)
+
+Revision ID: add_product_change_asin_index
+Revises: normalize_market_change_lists
+Create Date: 2025-04-22 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_product_change_asin_index'
+down_revision = 'normalize_market_change_lists'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_product_changes_asin_change_date', 'product_changes', ['asin', 'change_date'])
+
+
+def downgrade():
+    op.drop_index('ix_product_changes_asin_change_date', table_name='product_changes')
@@ -0,0 +1,44 @@
+"""add scrape_log_entries for indexed fail/warning queries
+
+Revision ID: add_scrape_log_entries
+Revises: add_credit_transactions
+Create Date: 2025-04-28 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_scrape_log_entries'
+down_revision = 'add_credit_transactions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scrape_log_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run', sa.String(), nullable=False),
+        sa.Column('kind', sa.Enum('fail', 'warning', name='scrape_log_kind'), nullable=False),
+        sa.Column('asin', sa.String(), nullable=True),
+        sa.Column('warning_type', sa.String(), nullable=True),
+        sa.Column('message', sa.String(), nullable=True),
+        sa.Column('context', sa.String(), nullable=True),
+        sa.Column('location', sa.String(), nullable=True),
+        sa.Column('url', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_scrape_log_entries_run', 'scrape_log_entries', ['run'])
+    op.create_index('ix_scrape_log_entries_created_at', 'scrape_log_entries', ['created_at'])
+    op.create_index('ix_scrape_log_entries_asin', 'scrape_log_entries', ['asin'])
+    op.create_index('ix_scrape_log_entries_warning_type', 'scrape_log_entries', ['warning_type'])
+
+
+def downgrade():
+    op.drop_index('ix_scrape_log_entries_warning_type', table_name='scrape_log_entries')
+    op.drop_index('ix_scrape_log_entries_asin', table_name='scrape_log_entries')
+    op.drop_index('ix_scrape_log_entries_created_at', table_name='scrape_log_entries')
+    op.drop_index('ix_scrape_log_entries_run', table_name='scrape_log_entries')
+    op.drop_table('scrape_log_entries')
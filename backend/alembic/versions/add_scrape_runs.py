@@ -0,0 +1,49 @@
+"""add scrape_runs with per-run statistics
+
+Revision ID: add_scrape_runs
+Revises: add_scrape_log_entries
+Create Date: 2025-04-29 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_scrape_runs'
+down_revision = 'add_scrape_log_entries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scrape_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run', sa.String(), nullable=False),
+        sa.Column('scraper', sa.Enum('products', 'markets', name='scrape_run_scraper'), nullable=False),
+        sa.Column('cluster_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=False),
+        sa.Column('duration_s', sa.Float(), nullable=False),
+        sa.Column('items_total', sa.Integer(), nullable=False),
+        sa.Column('items_succeeded', sa.Integer(), nullable=False),
+        sa.Column('items_failed', sa.Integer(), nullable=False),
+        sa.Column('items_skipped', sa.Integer(), nullable=False),
+        sa.Column('pages_fetched', sa.Integer(), nullable=False),
+        sa.Column('pages_per_minute', sa.Float(), nullable=True),
+        sa.Column('avg_item_seconds', sa.Float(), nullable=True),
+        sa.Column('warning_count', sa.Integer(), nullable=False),
+        sa.Column('warning_counts', sa.JSON(), nullable=True),
+        sa.Column('page_outcomes', sa.JSON(), nullable=True),
+        sa.Column('phase_timings', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['cluster_id'], ['market_clusters.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('run')
+    )
+    op.create_index('ix_scrape_runs_scraper_started_at', 'scrape_runs', ['scraper', 'started_at'])
+
+
+def downgrade():
+    op.drop_index('ix_scrape_runs_scraper_started_at', table_name='scrape_runs')
+    op.drop_table('scrape_runs')
@@ -0,0 +1,117 @@
+"""normalize comma-separated ASIN and suggestion lists of market_changes
+
+Revision ID: normalize_market_change_lists
+Revises: add_review_count_and_rating
+Create Date: 2025-04-14 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'normalize_market_change_lists'
+down_revision = 'add_review_count_and_rating'
+branch_labels = None
+depends_on = None
+
+
+def split_list(value):
+    return [item for item in (value or "").split(",") if item]
+
+
+def upgrade():
+    op.create_table('market_change_asins',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('market_change_id', sa.Integer(), nullable=False),
+        sa.Column('market_id', sa.Integer(), nullable=False),
+        sa.Column('asin', sa.String(), nullable=False),
+        sa.Column('status', sa.Enum('added', 'removed', name='market_change_asin_status'), nullable=False),
+        sa.ForeignKeyConstraint(['market_change_id'], ['market_changes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['market_id'], ['markets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_market_change_asins_market_change_id', 'market_change_asins', ['market_change_id'])
+    op.create_index('ix_market_change_asins_asin_market', 'market_change_asins', ['asin', 'market_id', 'status'])
+
+    op.create_table('market_change_suggestions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('market_change_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('suggestion', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['market_change_id'], ['market_changes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_market_change_suggestions_market_change_id', 'market_change_suggestions', ['market_change_id'])
+
+    # Bestehende Kommalisten in Zeilen überführen
+    conn = op.get_bind()
+    asin_table = sa.table('market_change_asins',
+        sa.column('market_change_id'), sa.column('market_id'), sa.column('asin'), sa.column('status'))
+    suggestion_table = sa.table('market_change_suggestions',
+        sa.column('market_change_id'), sa.column('position'), sa.column('suggestion'))
+
+    rows = conn.execute(sa.text(
+        "SELECT id, market_id, new_products, removed_products, top_suggestions FROM market_changes"
+    )).fetchall()
+
+    asin_rows = []
+    suggestion_rows = []
+    for change_id, market_id, new_products, removed_products, top_suggestions in rows:
+        asin_rows += [
+            {"market_change_id": change_id, "market_id": market_id, "asin": asin, "status": "added"}
+            for asin in dict.fromkeys(split_list(new_products))
+        ]
+        asin_rows += [
+            {"market_change_id": change_id, "market_id": market_id, "asin": asin, "status": "removed"}
+            for asin in dict.fromkeys(split_list(removed_products))
+        ]
+        suggestion_rows += [
+            {"market_change_id": change_id, "position": position, "suggestion": suggestion}
+            for position, suggestion in enumerate(split_list(top_suggestions))
+        ]
+
+    if asin_rows:
+        op.bulk_insert(asin_table, asin_rows)
+    if suggestion_rows:
+        op.bulk_insert(suggestion_table, suggestion_rows)
+
+    # Kein batch_alter_table: das Neuanlegen von market_changes löscht bei PRAGMA foreign_keys=ON
+    # per Cascade alle abhängigen Zeilen (auch die eben befüllten). DROP COLUMN kann SQLite ab 3.35 selbst.
+    op.drop_column('market_changes', 'new_products')
+    op.drop_column('market_changes', 'removed_products')
+    op.drop_column('market_changes', 'top_suggestions')
+
+
+def downgrade():
+    op.add_column('market_changes', sa.Column('new_products', sa.String(), nullable=True))
+    op.add_column('market_changes', sa.Column('removed_products', sa.String(), nullable=True))
+    op.add_column('market_changes', sa.Column('top_suggestions', sa.String(), nullable=True))
+
+    conn = op.get_bind()
+    lists = {}
+    for change_id, asin, status in conn.execute(sa.text(
+        "SELECT market_change_id, asin, status FROM market_change_asins ORDER BY id"
+    )):
+        lists.setdefault(change_id, {"added": [], "removed": [], "suggestions": []})[status].append(asin)
+    for change_id, suggestion in conn.execute(sa.text(
+        "SELECT market_change_id, suggestion FROM market_change_suggestions ORDER BY market_change_id, position"
+    )):
+        lists.setdefault(change_id, {"added": [], "removed": [], "suggestions": []})["suggestions"].append(suggestion)
+
+    for change_id, values in lists.items():
+        conn.execute(
+            sa.text(
+                "UPDATE market_changes SET new_products = :added, removed_products = :removed, "
+                "top_suggestions = :suggestions WHERE id = :id"
+            ),
+            {
+                "id": change_id,
+                "added": ",".join(values["added"]),
+                "removed": ",".join(values["removed"]),
+                "suggestions": ",".join(values["suggestions"]),
+            }
+        )
+
+    op.drop_table('market_change_suggestions')
+    op.drop_table('market_change_asins')
@@ -1,14 +1,22 @@
+import asyncio
+import logging
 import os
 import secrets  # 📌 Fehlender Import hinzugefügt
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
+from app.database import get_db
 from app.models import User
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
+from starlette.concurrency import run_in_threadpool
 
 load_dotenv()
 
@@ -16,7 +24,76 @@ SECRET_KEY = os.getenv("SECRET_KEY", "default_secret_key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt-Kosten: jede Runde verdoppelt die Zeit pro Hash (12 ≈ 250 ms). Hashes mit anderen
+# Runden gelten als veraltet und werden beim nächsten Login transparent neu gehasht.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# Eigener, begrenzter Pool für Passwort-Arbeit: ein Login-Ansturm belegt höchstens so viele
+# Threads und verdrängt weder den Event-Loop noch die Threads der übrigen Sync-Routen
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+# Nur stabile Felder cachen – credits, Passwort-Hash usw. lädt SQLAlchemy beim ersten Zugriff frisch nach
+USER_CACHE_FIELDS = ("id", "username", "email", "is_verified", "subscription")
+
+
+class UserCache:
+    """Kurzlebiger Cache Token → User-Felder, damit nicht jeder Request den User neu lädt."""
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, fields = entry
+            if expires_at < time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return fields
+
+    def set(self, token: str, user: User, token_expires_at=None) -> None:
+        expires_at = time.time() + self.ttl
+        if token_expires_at:
+            expires_at = min(expires_at, float(token_expires_at))
+        fields = {field: getattr(user, field) for field in USER_CACHE_FIELDS}
+        with self._lock:
+            self._entries[token] = (expires_at, fields)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in [token for token, (_, fields) in self._entries.items() if fields["id"] == user_id]:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(ttl=USER_CACHE_TTL)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Nach Änderungen am User (Credits, Verifizierung, Löschen) aufrufen."""
+    user_cache.invalidate_user(user_id)
 
 def is_admin(user: User) -> bool:
     print("isAdmin", user)
@@ -31,6 +108,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def run_password_job(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, func, *args)
+
+
+async def hash_password(password: str) -> str:
+    return await run_password_job(get_password_hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """(gültig, neuer Hash oder None) – neuer Hash nur, wenn sich die bcrypt-Parameter geändert haben."""
+    return await run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
 
@@ -48,27 +139,40 @@ def get_expiration_time():
     return datetime.now(timezone.utc) + timedelta(minutes=30)  # 📌 Ablaufzeit 30 Minuten
 
 
-def get_db():
-    from app.database import SessionLocal
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 def get_user(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user(db, username)
-    if user and verify_password(password, user.hashed_password):
-        return user
-    return None
+def save_password_hash(db: Session, user: User, hashed_password: str) -> None:
+    user.hashed_password = hashed_password
+    db.commit()
+    db.refresh(user)
+
+
+async def authenticate_user(db: Session, username: str, password: str):
+    user = await run_in_threadpool(get_user, db, username)
+    if user is None:
+        # Gleiche Laufzeit wie bei falschem Passwort, damit sich Usernamen nicht erraten lassen
+        await run_password_job(pwd_context.dummy_verify)
+        return None
+
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        await run_in_threadpool(save_password_hash, db, user, new_hash)
+        logging.info(f"🔐 Passwort-Hash von {user.username} auf {BCRYPT_ROUNDS} Runden aktualisiert")
+    return user
 
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    cached_fields = user_cache.get(token)
+    if cached_fields is not None:
+        # In die Request-Session übernehmen, ohne die Datenbank zu fragen
+        cached_user = User(**cached_fields)
+        make_transient_to_detached(cached_user)
+        return db.merge(cached_user, load=False)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("username")
@@ -89,4 +193,5 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
+    user_cache.set(token, user, payload.get("exp"))
     return user
@@ -0,0 +1,69 @@
+from typing import Iterable, List, Tuple
+
+from app.models import Product
+from sqlalchemy import Table, delete, insert, select
+from sqlalchemy.orm import Session
+
+# SQLite erlaubt nur eine begrenzte Anzahl gebundener Parameter pro Statement
+IN_CHUNK_SIZE = 500
+
+
+def chunked(items: List, size: int = IN_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def existing_asins(db: Session, asins: Iterable[str]) -> set:
+    """Liefert alle ASINs aus `asins`, die bereits in `products` stehen (ein IN-Query pro Chunk)."""
+    asins = list(asins)
+    found = set()
+    for chunk in chunked(asins):
+        found.update(db.execute(select(Product.asin).where(Product.asin.in_(chunk))).scalars())
+    return found
+
+
+def ensure_products(db: Session, asins: Iterable[str]) -> set:
+    """Legt fehlende Produkte gebündelt an und gibt die neu erstellten ASINs zurück."""
+    asins = list(dict.fromkeys(asins))
+    found = existing_asins(db, asins)
+    missing = [asin for asin in asins if asin not in found]
+    if missing:
+        db.execute(insert(Product), [{"asin": asin, "last_time_scraped": None} for asin in missing])
+    return set(missing)
+
+
+def insert_association_rows(db: Session, table: Table, rows: List[dict]) -> None:
+    """Bulk-INSERT für Verknüpfungstabellen wie `market_products` oder `market_change_products`."""
+    if rows:
+        db.execute(insert(table), rows)
+
+
+def linked_asins(db: Session, table: Table, key_column: str, key_value) -> set:
+    """Snapshot aller ASINs, die über `table` mit `key_value` verknüpft sind (ein Query)."""
+    return set(db.execute(
+        select(table.c.asin).where(table.c[key_column] == key_value)
+    ).scalars())
+
+
+def delete_association_rows(db: Session, table: Table, key_column: str, key_value, asins: Iterable[str]) -> None:
+    """Bulk-DELETE der Verknüpfungen von `key_value` zu den angegebenen ASINs."""
+    for chunk in chunked(list(asins)):
+        db.execute(delete(table).where(table.c[key_column] == key_value, table.c.asin.in_(chunk)))
+
+
+def sync_association(db: Session, table: Table, key_column: str, key_value,
+                     target_asins: Iterable[str], removed_asins: Iterable[str] = ()) -> Tuple[List[str], List[str]]:
+    """
+    Gleicht die Verknüpfungen von `key_value` per Mengen-Diff gegen einen einzigen Snapshot ab:
+    fehlende ASINs aus `target_asins` werden eingefügt, verknüpfte ASINs aus `removed_asins` gelöscht.
+    Die Anzahl der Queries ist unabhängig von der Marktgröße. Gibt (hinzugefügt, entfernt) zurück.
+    """
+    target = list(dict.fromkeys(target_asins))
+    current = linked_asins(db, table, key_column, key_value)
+
+    to_add = [asin for asin in target if asin not in current]
+    to_remove = sorted((set(removed_asins) & current) - set(target))
+
+    insert_association_rows(db, table, [{key_column: key_value, "asin": asin} for asin in to_add])
+    delete_association_rows(db, table, key_column, key_value, to_remove)
+    return to_add, to_remove
@@ -0,0 +1,81 @@
+"""
+In-Process-Cache für teure Lese-Endpunkte (Cluster-Details, Dashboard, Charts).
+
+Jeder Eintrag merkt sich die Datenversion, mit der er berechnet wurde. Orchestratoren und
+schreibende Routen erhöhen die Version nach jedem Commit (`bump_data_version`), wodurch alle
+älteren Einträge sofort ungültig werden. Die TTL begrenzt die Veralterung für Schreiber in
+anderen Prozessen (z.B. per Cronjob gestartete Orchestratoren).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+_data_version = 0
+_version_lock = threading.Lock()
+
+
+def get_data_version() -> int:
+    return _data_version
+
+
+def bump_data_version() -> int:
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+        return _data_version
+
+
+class ResponseCache:
+    """Thread-sicherer TTL+LRU-Cache, Schlüssel z.B. (endpoint, user_id, cluster_id)."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            version, expires_at, value = entry
+            if version != _data_version or expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, version: int) -> None:
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        # Version vor der Berechnung merken – ein paralleler Commit macht das Ergebnis direkt ungültig
+        version = get_data_version()
+        value = compute()
+        self.set(key, value, version)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+)
@@ -0,0 +1,165 @@
+"""
+Conditional GET (ETag / Last-Modified) für Cluster-, Chart- und Verlaufs-Routen.
+
+Die Validatoren kommen aus billigen Aggregat-Queries (neuester MarketChange, letzter Scrape,
+neuester ProductChange). Stimmen sie mit `If-None-Match` bzw. `If-Modified-Since` überein,
+antwortet die Route mit 304, ohne die teuren Queries und die Serialisierung auszuführen.
+
+Last-Modified muss dieselben Änderungen abbilden wie das ETag. Produkt-Routen liefern es als
+max(neuester Change, heutiger Tagesbeginn UTC). Cluster-Routen senden kein Last-Modified: Titel,
+Märkte und Umsatz haben keinen Zeitstempel, ein reines `If-Modified-Since` bekäme sonst 304 mit
+veralteten Daten.
+"""
+import hashlib
+from datetime import datetime, time, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from app.models import (MarketChange, MarketCluster, Product, ProductChange,
+                        market_cluster_markets, market_products)
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Clients müssen immer revalidieren, dürfen die Antwort aber behalten
+CACHE_CONTROL = "private, no-cache"
+
+
+def build_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def today():
+    # Sparklines und Zeitfenster rollen täglich weiter, auch ohne neue Daten
+    return datetime.now(timezone.utc).date()
+
+
+def start_of_today() -> datetime:
+    return datetime.combine(today(), time.min, tzinfo=timezone.utc)
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def conditional_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    last_modified = as_utc(last_modified)
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # If-None-Match hat Vorrang vor If-Modified-Since (RFC 9110)
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    last_modified = as_utc(last_modified)
+    if if_modified_since and last_modified:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def check_conditional(request: Request, response: Response, etag: str,
+                      last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """Gibt eine 304-Antwort zurück, wenn der Client aktuell ist – sonst werden nur die Header gesetzt."""
+    headers = conditional_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def get_cluster_validator(db: Session, cluster_id: int, user_id: Optional[int] = None):
+    """
+    Version eines Clusters aus einem einzigen Query: Stammdaten, neuester MarketChange und
+    letzter Produkt-Scrape der Cluster-Märkte. None, wenn der Cluster (für den User) nicht existiert.
+    Nur für das ETag gedacht – einen Zeitstempel für Titel- oder Marktänderungen gibt es nicht.
+    """
+    cluster_market_ids = (
+        select(market_cluster_markets.c.market_id)
+        .where(market_cluster_markets.c.market_cluster_id == cluster_id)
+    )
+    latest_market_change = (
+        select(func.max(MarketChange.change_date))
+        .where(MarketChange.market_id.in_(cluster_market_ids))
+        .scalar_subquery()
+    )
+    latest_scrape = (
+        select(func.max(Product.last_time_scraped))
+        .join(market_products, market_products.c.asin == Product.asin)
+        .where(market_products.c.market_id.in_(cluster_market_ids))
+        .scalar_subquery()
+    )
+    market_count = (
+        select(func.count())
+        .select_from(market_cluster_markets)
+        .where(market_cluster_markets.c.market_cluster_id == cluster_id)
+        .scalar_subquery()
+    )
+
+    query = db.query(
+        MarketCluster.title,
+        MarketCluster.is_initial_scraped,
+        MarketCluster.total_revenue,
+        MarketCluster.cluster_type,
+        market_count,
+        latest_market_change.label("latest_market_change"),
+        latest_scrape.label("latest_scrape"),
+    ).filter(MarketCluster.id == cluster_id)
+    if user_id is not None:
+        query = query.filter(MarketCluster.user_id == user_id)
+
+    row = query.first()
+    return tuple(row) if row is not None else None
+
+
+def get_product_validator(db: Session, asin: str):
+    """
+    Neuester ProductChange und Anzahl der Changes eines ASINs (nutzt den Index auf asin, change_date).
+    Last-Modified ist frühestens der heutige Tagesbeginn – die Antworten rollen täglich weiter wie das ETag.
+    """
+    latest, count = db.query(
+        func.max(ProductChange.change_date), func.count(ProductChange.id)
+    ).filter(ProductChange.asin == asin).one()
+    latest_utc = as_utc(latest)
+    last_modified = max(latest_utc, start_of_today()) if latest_utc else start_of_today()
+    return (latest, count), last_modified
+
+
+def check_cluster_conditional(request: Request, response: Response, db: Session, kind: str,
+                              cluster_id: int, user_id: Optional[int] = None) -> Optional[Response]:
+    version = get_cluster_validator(db, cluster_id, user_id)
+    if version is None:
+        # Kein Validator → die Route liefert selbst den passenden Fehler
+        return None
+    etag = build_etag(kind, user_id, cluster_id, str(request.url.query), version, today())
+    # Ohne Last-Modified beantworten Cluster-Routen nur If-None-Match
+    return check_conditional(request, response, etag)
+
+
+def check_product_conditional(request: Request, response: Response, db: Session, kind: str,
+                              asin: str) -> Optional[Response]:
+    version, last_modified = get_product_validator(db, asin)
+    etag = build_etag(kind, asin, str(request.url.query), version, today())
+    return check_conditional(request, response, etag, last_modified)
+
+
+def copy_conditional_headers(source: Response, target: Response) -> Response:
+    """Für Routen, die selbst eine Response (z.B. StreamingResponse) zurückgeben."""
+    for header in ("ETag", "Last-Modified", "Cache-Control"):
+        if header in source.headers:
+            target.headers[header] = source.headers[header]
+    return target
@@ -0,0 +1,47 @@
+"""
+Atomare Credit-Buchungen.
+
+Jede Buchung ist ein einziges bedingtes `UPDATE users SET credits = credits ± n ... RETURNING credits`:
+ohne vorheriges Lesen, und gleichzeitige Abbuchungen können das Guthaben weder unter 0 drücken
+noch sich gegenseitig überschreiben. Erfolgreiche Buchungen landen in derselben Transaktion
+im Ledger `credit_transactions`.
+"""
+from typing import Optional
+
+from app.models import CreditTransaction, User
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+
+def apply_credit_change(db: Session, user_id: int, amount: int, reason: str,
+                        actor_id: Optional[int] = None) -> Optional[int]:
+    """
+    Bucht `amount` (negativ = Abbuchung) und gibt das neue Guthaben zurück.
+    None, wenn der User nicht existiert oder das Guthaben für die Abbuchung nicht reicht.
+    """
+    credits = func.coalesce(User.credits, 0)
+    statement = update(User).where(User.id == user_id).values(credits=credits + amount)
+    if amount < 0:
+        statement = statement.where(credits >= -amount)
+
+    new_balance = db.execute(
+        statement.returning(User.credits),
+        execution_options={"synchronize_session": False},
+    ).scalar_one_or_none()
+    if new_balance is None:
+        db.rollback()
+        return None
+
+    db.execute(insert(CreditTransaction).values(
+        user_id=user_id,
+        amount=amount,
+        balance_after=new_balance,
+        reason=reason,
+        actor_id=actor_id,
+    ))
+    db.commit()
+    return new_balance
+
+
+def user_exists(db: Session, user_id: int) -> bool:
+    return db.query(User.id).filter(User.id == user_id).first() is not None
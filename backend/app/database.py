@@ -1,11 +1,12 @@
 import os
-from app.auth import get_password_hash
+from app import query_stats  # noqa: F401 – registriert Query-Zähler und Slow-Query-Log für alle Engines
 from app.models import Base, User
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, event
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 load_dotenv()
 
@@ -18,7 +19,20 @@ if DATABASE_URL.startswith("sqlite"):
 else:
     connect_args = {}
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+
+def pool_kwargs(database_url: str) -> dict:
+    """Pool-Größe nur für QueuePool – SQLite im Speicher nutzt SingletonThreadPool, der sie ablehnt."""
+    url = make_url(database_url)
+    if not issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        return {}
+    # Sync-Routen laufen im Threadpool (40 Threads) – der Pool muss so viele parallele Sessions tragen
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "30")),
+    }
+
+
+engine = create_engine(DATABASE_URL, connect_args=connect_args, **pool_kwargs(DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -58,6 +72,8 @@ def get_db():
 
 def ensure_admin_user():
     """Falls der Admin-User nicht existiert, erstelle ihn."""
+    from app.auth import get_password_hash  # app.auth importiert get_db aus diesem Modul
+
     db = SessionLocal()
     try:
         existing_admin = db.query(User).filter(User.username == "admin").first()
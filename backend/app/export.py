@@ -0,0 +1,269 @@
+"""
+Spaltenbasierter Export der ProductChange-Historie als Parquet- oder Arrow-Dateien.
+
+Die Zeilen werden per serverseitigem Cursor (`yield_per`) in Batches gelesen und direkt in
+tagesweise partitionierte Dateien geschrieben (`day=YYYY-MM-DD/part-<lauf>.parquet`),
+der Speicherbedarf hängt also nur von der Batchgröße ab. Im inkrementellen Modus werden nur
+Zeilen exportiert, deren ID über dem Watermark des letzten Exports liegt.
+
+CLI (im backend-Ordner):
+python -m app.export --output exports --incremental
+python -m app.export --output exports/cluster-3 --cluster-id 3 --start 2025-01-01 --end 2025-03-31
+"""
+import argparse
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from app.models import ProductChange, market_cluster_markets, market_products
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+EXPORT_DIR = Path(os.getenv("EXPORT_DIR", "exports"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+WATERMARK_FILE = "_watermark.json"
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+EXPORT_COLUMNS = [
+    ("id", "int64"),
+    ("asin", "string"),
+    ("change_date", "timestamp"),
+    ("title", "string"),
+    ("price", "float64"),
+    ("main_category", "string"),
+    ("second_category", "string"),
+    ("main_category_rank", "int64"),
+    ("second_category_rank", "int64"),
+    ("blm", "int64"),
+    ("total", "float64"),
+    ("changes", "string"),
+    ("img_path", "string"),
+    ("store", "string"),
+    ("manufacturer", "string"),
+    ("review_count", "int64"),
+    ("rating", "float64"),
+]
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("❌ pyarrow ist nicht installiert – `pip install pyarrow` für den Export.")
+
+
+def export_schema():
+    require_pyarrow()
+    types = {
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "string": pa.string(),
+        "timestamp": pa.timestamp("us"),
+    }
+    return pa.schema([(name, types[type_name]) for name, type_name in EXPORT_COLUMNS])
+
+
+def read_watermark(output_dir: Path) -> dict:
+    path = output_dir / WATERMARK_FILE
+    if not path.exists():
+        return {"last_id": 0}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_watermark(output_dir: Path, watermark: dict) -> None:
+    tmp_path = output_dir / f"{WATERMARK_FILE}.tmp"
+    tmp_path.write_text(json.dumps(watermark, indent=2), encoding="utf-8")
+    tmp_path.replace(output_dir / WATERMARK_FILE)
+
+
+def build_export_query(start: Optional[date] = None, end: Optional[date] = None,
+                       cluster_id: Optional[int] = None, after_id: int = 0):
+    columns = [getattr(ProductChange, name) for name, _ in EXPORT_COLUMNS]
+    query = select(*columns).where(ProductChange.id > after_id)
+
+    if start:
+        query = query.where(ProductChange.change_date >= datetime.combine(start, datetime.min.time()))
+    if end:
+        query = query.where(ProductChange.change_date < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    if cluster_id is not None:
+        cluster_asins = (
+            select(market_products.c.asin)
+            .join(market_cluster_markets, market_cluster_markets.c.market_id == market_products.c.market_id)
+            .where(market_cluster_markets.c.market_cluster_id == cluster_id)
+        )
+        query = query.where(ProductChange.asin.in_(cluster_asins))
+
+    # Nach Tag sortiert ist immer nur eine Partitionsdatei gleichzeitig offen
+    return query.order_by(ProductChange.change_date, ProductChange.id)
+
+
+class PartitionWriter:
+    """Schreibt Batches in die Datei der jeweiligen Tagespartition; Dateien sind bis `commit()` temporär."""
+
+    def __init__(self, output_dir: Path, schema, file_format: str, run_id: str):
+        self.output_dir = output_dir
+        self.schema = schema
+        self.file_format = file_format
+        self.run_id = run_id
+        self.day = None
+        self.writer = None
+        self.sink = None
+        self.pending = []
+
+    def _open(self, day: str):
+        self.close()
+        partition_dir = self.output_dir / f"day={day}"
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        final_path = partition_dir / f"part-{self.run_id}{FORMATS[self.file_format]}"
+        tmp_path = final_path.with_name(final_path.name + ".tmp")
+        if self.file_format == "parquet":
+            self.writer = pq.ParquetWriter(str(tmp_path), self.schema, compression="zstd")
+        else:
+            self.sink = pa.OSFile(str(tmp_path), "wb")
+            self.writer = pa_ipc.new_file(self.sink, self.schema)
+        self.pending.append((tmp_path, final_path))
+        self.day = day
+
+    def write(self, day: str, table) -> None:
+        if day != self.day:
+            self._open(day)
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+    def commit(self) -> list:
+        self.close()
+        for tmp_path, final_path in self.pending:
+            tmp_path.replace(final_path)
+        return [str(final_path) for _, final_path in self.pending]
+
+    def abort(self) -> None:
+        self.close()
+        for tmp_path, _ in self.pending:
+            tmp_path.unlink(missing_ok=True)
+
+
+def rows_to_table(rows, schema):
+    columns = list(zip(*rows))
+    return pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def export_product_changes(db: Session, output_dir: Path = EXPORT_DIR, start: Optional[date] = None,
+                           end: Optional[date] = None, cluster_id: Optional[int] = None,
+                           incremental: bool = False, file_format: str = "parquet",
+                           batch_size: int = EXPORT_BATCH_SIZE) -> dict:
+    """
+    Exportiert ProductChanges (optional nach Zeitraum/Cluster gefiltert) tagesweise partitioniert.
+    Gibt eine Zusammenfassung mit Zeilenanzahl, geschriebenen Dateien und neuem Watermark zurück.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unbekanntes Format '{file_format}', erlaubt: {', '.join(FORMATS)}")
+
+    schema = export_schema()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    watermark = read_watermark(output_dir)
+    after_id = watermark.get("last_id", 0) if incremental else 0
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+
+    query = build_export_query(start=start, end=end, cluster_id=cluster_id, after_id=after_id)
+    writer = PartitionWriter(output_dir, schema, file_format, run_id)
+    row_count = 0
+    last_id = after_id
+
+    try:
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            # Batch nach Tagen aufteilen – durch die Sortierung sind die Tage zusammenhängend
+            day_rows = []
+            current_day = None
+            for row in batch:
+                day = row.change_date.strftime("%Y-%m-%d") if row.change_date else "unknown"
+                if day != current_day and day_rows:
+                    writer.write(current_day, rows_to_table(day_rows, schema))
+                    day_rows = []
+                current_day = day
+                day_rows.append(tuple(row))
+                last_id = max(last_id, row.id)
+            if day_rows:
+                writer.write(current_day, rows_to_table(day_rows, schema))
+            row_count += len(batch)
+        files = writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+
+    summary = {
+        "rows": row_count,
+        "files": files,
+        "last_id": last_id,
+        "incremental": incremental,
+        "format": file_format,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    # Watermark nur fortschreiben, wenn alle Dateien sicher geschrieben sind
+    if row_count or not (output_dir / WATERMARK_FILE).exists():
+        write_watermark(output_dir, {
+            "last_id": last_id,
+            "exported_at": summary["exported_at"],
+            "rows": row_count,
+        })
+    return summary
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportiert die ProductChange-Historie als Parquet/Arrow")
+    parser.add_argument("--output", default=str(EXPORT_DIR))
+    parser.add_argument("--start", type=parse_date, default=None, help="YYYY-MM-DD (inklusive)")
+    parser.add_argument("--end", type=parse_date, default=None, help="YYYY-MM-DD (inklusive)")
+    parser.add_argument("--cluster-id", type=int, default=None)
+    parser.add_argument("--incremental", action="store_true", help="Nur Zeilen seit dem letzten Watermark")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        summary = export_product_changes(
+            db,
+            output_dir=Path(args.output),
+            start=args.start,
+            end=args.end,
+            cluster_id=args.cluster_id,
+            incremental=args.incremental,
+            file_format=args.format,
+            batch_size=args.batch_size,
+        )
+    finally:
+        db.close()
+
+    print(f"✅ {summary['rows']} ProductChanges in {len(summary['files'])} Dateien exportiert "
+          f"(Watermark: {summary['last_id']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Strukturierte JSON-Lines-Logs für API und Scraper.
+
+Alle Log-Aufrufe landen über einen QueueHandler in einer Queue; ein Hintergrund-Thread
+(QueueListener) schreibt sie als eine JSON-Zeile pro Eintrag nach `scraper/logs/scraper.jsonl`
+und lesbar auf die Konsole. Die Datei rotiert nach Größe und Alter, alte Dateien werden im
+Listener-Thread gzip-komprimiert und nach `LOG_RETENTION_DAYS` gelöscht – der Scraper wartet
+nie auf Platte oder Kompression.
+
+Auswerten z.B. mit: zcat -f scraper/logs/scraper.jsonl* | jq 'select(.level == "WARNING")'
+"""
+import atexit
+import contextvars
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+LOG_DIR = Path(os.getenv("LOG_DIR", Path(__file__).resolve().parents[1] / "scraper" / "logs"))
+LOG_FILE_NAME = os.getenv("LOG_FILE_NAME", "scraper.jsonl")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+LOG_ROTATE_HOURS = float(os.getenv("LOG_ROTATE_HOURS", "24"))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "50"))
+LOG_RETENTION_DAYS = float(os.getenv("LOG_RETENTION_DAYS", "30"))
+# Seitendumps (z.B. komplette Product-Info-Dicts) werden gekürzt statt die Datei aufzublähen
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "2000"))
+
+CONSOLE_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+NOISY_LOGGERS = ("selenium.webdriver.remote.remote_connection", "urllib3", "seleniumwire", "httpcore", "httpx")
+
+# Attribute, die jeder LogRecord hat – alles andere kam über `extra=` oder log_context()
+RESERVED_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+log_fields = contextvars.ContextVar("log_fields", default={})
+_listener: Optional[logging.handlers.QueueListener] = None
+_log_path: Optional[Path] = None
+
+
+@contextmanager
+def log_context(**fields):
+    """Hängt Felder (z.B. run, cluster_id) an alle Log-Einträge innerhalb des Blocks."""
+    token = log_fields.set({**log_fields.get(), **fields})
+    try:
+        yield
+    finally:
+        log_fields.reset(token)
+
+
+@contextmanager
+def log_level(level):
+    """Setzt das Root-Level nur für die Dauer des Blocks (z.B. DEBUG für einen Lauf); None lässt es unverändert."""
+    root = logging.getLogger()
+    previous = root.level
+    if level is not None:
+        root.setLevel(level)
+    try:
+        yield
+    finally:
+        root.setLevel(previous)
+
+
+def truncate(text: str, limit: int = LOG_MAX_MESSAGE_CHARS) -> str:
+    if limit and len(text) > limit:
+        return f"{text[:limit]}… [{len(text) - limit} Zeichen gekürzt]"
+    return text
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": truncate(record.getMessage().strip()),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Bereitet Einträge im aufrufenden Thread vor: Kontextfelder anhängen, Message und Traceback
+    einmal formatieren. Alles Weitere (JSON, Platte, Rotation) passiert im Listener-Thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        prepared = logging.makeLogRecord(vars(record))
+        prepared.msg = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            prepared.exc_text = logging.Formatter().formatException(record.exc_info)
+        prepared.exc_info = None
+        for key, value in log_fields.get().items():
+            setattr(prepared, key, value)
+        return prepared
+
+
+def gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotiert nach Größe oder Alter, komprimiert rotierte Dateien und löscht zu alte Archive."""
+
+    def __init__(self, filename, max_bytes: int, rotate_seconds: float, backup_count: int,
+                 retention_seconds: float):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.rotate_seconds = rotate_seconds
+        self.retention_seconds = retention_seconds
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = gzip_rotator
+        self.opened_at = self._file_started_at()
+
+    def _file_started_at(self) -> float:
+        # Nach einem Neustart zählt das Alter ab dem letzten Schreiben in die bestehende Datei
+        try:
+            return os.path.getmtime(self.baseFilename) if os.path.getsize(self.baseFilename) else time.time()
+        except OSError:
+            return time.time()
+
+    def shouldRollover(self, record) -> bool:
+        if self.rotate_seconds and time.time() - self.opened_at >= self.rotate_seconds \
+                and os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.opened_at = time.time()
+        self.remove_expired_archives()
+
+    def remove_expired_archives(self) -> None:
+        if not self.retention_seconds:
+            return
+        cutoff = time.time() - self.retention_seconds
+        base = Path(self.baseFilename)
+        for archive in base.parent.glob(f"{base.name}.*.gz"):
+            if archive.stat().st_mtime < cutoff:
+                archive.unlink(missing_ok=True)
+
+
+def setup_logging(level=None) -> Path:
+    """
+    Richtet das Logging prozessweit einmal ein und gibt den Pfad der JSON-Log-Datei zurück.
+    Weitere Aufrufe passen nur noch das Level an – nur für einen Lauf stattdessen `log_level()` nutzen.
+    """
+    global _listener, _log_path
+
+    root = logging.getLogger()
+    if _listener is not None:
+        if level is not None:
+            root.setLevel(level)
+        return _log_path
+    root.setLevel(level or LOG_LEVEL)
+
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    _log_path = LOG_DIR / LOG_FILE_NAME
+
+    file_handler = CompressingRotatingFileHandler(
+        _log_path,
+        max_bytes=LOG_MAX_BYTES,
+        rotate_seconds=LOG_ROTATE_HOURS * 3600,
+        backup_count=LOG_BACKUP_COUNT,
+        retention_seconds=LOG_RETENTION_DAYS * 86400,
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(ContextQueueHandler(log_queue))
+
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    return _log_path
@@ -1,8 +1,11 @@
 import os
 from concurrent.futures import ThreadPoolExecutor
 from app.database import init_db, ensure_admin_user
+from app.logging_config import setup_logging
+from app.metrics import CONTENT_TYPE, RequestMetricsMiddleware, registry
+from app.query_stats import QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QueryStatsMiddleware
 from app.routes import chartdata, market_clusters, scraping, users, user_products, products
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 
@@ -10,6 +13,8 @@ from fastapi.middleware.cors import CORSMiddleware
 # Start mit:
 # python -m uvicorn app.main:app --host 0.0.0.0 --port 9000 --reload
 
+setup_logging()
+
 executor = ThreadPoolExecutor()
 app = FastAPI()
 
@@ -33,8 +38,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # ✅ Erlaubt alle HTTP-Methoden
     allow_headers=["*"],  # ✅ Erlaubt alle Header
+    expose_headers=[QUERY_COUNT_HEADER, QUERY_TIME_HEADER],  # 🗄️ Query-Zähler im Debug-Modus
 )
 
+# 📈 Latenz pro Route für /metrics
+app.add_middleware(RequestMetricsMiddleware)
+
+# 🗄️ Queries und DB-Zeit pro Request (Header nur mit QUERY_STATS_HEADERS=1)
+app.add_middleware(QueryStatsMiddleware)
+
 # ✅ Router einbinden
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(products.router, prefix="/products", tags=["Products"])
@@ -47,3 +59,9 @@ app.include_router(user_products.router, prefix="/user-products", tags=["User Pr
 @app.get("/")
 def root():
     return {"message": "Welcome to the FastAPI Auth System"}
+
+
+# 📈 Prometheus-Scrape-Endpunkt (API- und Scraper-Metriken dieses Prozesses)
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
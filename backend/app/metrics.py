@@ -0,0 +1,278 @@
+"""
+Prometheus-Metriken für API und Scraper, ohne zusätzliche Abhängigkeit.
+
+Counter, Gauges und Histogramme leben in einer prozessweiten Registry und werden unter
+`/metrics` im Text-Format 0.0.4 ausgegeben. Die Scraper laufen im Executor des API-Prozesses
+und schreiben in dieselbe Registry. Bei mehreren uvicorn-Workern hat jeder Worker seine eigenen
+Werte – Prometheus summiert dann über die Instanzen.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SCRAPE_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: Labels {sorted(labels)} passen nicht zu {list(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.metric_type}"
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+
+    def render(self):
+        yield from self.header()
+        yield from self.samples()
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counter können nur steigen")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._collector: Optional[Callable[[], dict]] = None
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def set_collector(self, collector: Callable[[], dict]) -> None:
+        """
+        Callback, der beim Abruf alle Werte als {label-tuple: wert} liefert – z.B. Queue-Tiefen
+        aus bestehenden Registries. Die Gauge gehört dann vollständig dem Callback.
+        """
+        self._collector = collector
+
+    def samples(self):
+        if self._collector is not None:
+            collected = {tuple(key): value for key, value in self._collector().items()}
+            with self._lock:
+                self._values = collected
+        yield from super().samples()
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    state["buckets"][index] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state["count"] if state else 0
+
+    def samples(self):
+        with self._lock:
+            values = {key: {"buckets": list(state["buckets"]), "sum": state["sum"], "count": state["count"]}
+                      for key, state in self._values.items()}
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for upper_bound, count in zip(self.buckets, state["buckets"]):
+                cumulative += count
+                labels = format_labels(self.labelnames, key, ("le", format_value(upper_bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, key)} {format_value(state['sum'])}"
+            yield f"{self.name}_count{format_labels(self.labelnames, key)} {state['count']}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrik {metric.name} ist bereits registriert")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# 🕷️ Scraper
+pages_fetched = registry.counter(
+    "scraper_pages_fetched_total", "Von Amazon geladene Seiten nach Scraper und Ergebnis", ("scraper", "outcome"))
+extraction_failures = registry.counter(
+    "scraper_extraction_failures_total", "Fehlgeschlagene Feld-Extraktionen (warning_type des Scrapers)",
+    ("warning_type",))
+asin_scrape_seconds = registry.histogram(
+    "scraper_asin_duration_seconds", "Dauer pro gescraptem ASIN inklusive Throttle-Wartezeit",
+    buckets=SCRAPE_BUCKETS)
+scraping_queue_depth = registry.gauge(
+    "scraper_queue_depth", "Nicht abgeschlossene Cluster-Scraping-Jobs nach Status", ("status",))
+active_drivers = registry.gauge(
+    "scraper_active_drivers", "Aktuell geöffnete WebDriver-Sessions", ("scraper",))
+
+# 🗄️ Datenbank
+db_write_seconds = registry.histogram(
+    "db_write_duration_seconds", "Dauer der Schreib-Transaktionen der Scraper", ("operation",))
+
+# 🌐 API
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Latenz der API-Requests pro Route", ("method", "route", "status"))
+
+
+def route_template(scope) -> str:
+    """
+    Routen-Template des Requests (`/market-clusters/{cluster_id}`) statt des konkreten Pfads.
+    Bei eingebundenen Routern kennt die Route je nach FastAPI-Version nur ihren eigenen Teil –
+    das Präfix ergibt sich dann aus dem Pfad abzüglich des gerenderten Routen-Teils.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    path = scope.get("path", "")
+    try:
+        rendered = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    if path.endswith(rendered):
+        return path[:len(path) - len(rendered)] + template
+    return template
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI-Middleware für die Request-Latenz pro Route. Als Label dient das Routen-Template,
+    nicht der konkrete Pfad – sonst explodiert die Kardinalität.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Starlette legt die gematchte Route im (geteilten) Scope ab
+            http_request_seconds.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=route_template(scope),
+                status=str(status_code),
+            )
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import (Boolean, Column, DateTime, Enum, Float, ForeignKey,
-                        Integer, String, Table)
+from sqlalchemy import (JSON, Boolean, Column, DateTime, Enum, Float, ForeignKey,
+                        Index, Integer, String, Table)
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -90,6 +90,66 @@ Product.user_products = relationship(
     "UserProduct", back_populates="product", cascade="all, delete-orphan")
 
 
+class CreditTransaction(Base):
+    """ Ledger aller Credit-Buchungen – bleibt auch nach dem Löschen des Users erhalten """
+    __tablename__ = "credit_transactions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    amount = Column(Integer, nullable=False)
+    balance_after = Column(Integer, nullable=False)
+    reason = Column(String, nullable=False)
+    actor_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class ScrapeLogEntry(Base):
+    """ Fehler und Warnungen der Scraper-Läufe – indiziert statt in Text-Dateien """
+    __tablename__ = "scrape_log_entries"
+
+    # Einzelindizes reichen: SQLite hängt die rowid an jeden Index, "asin = ? ORDER BY id DESC"
+    # und die Keyset-Pagination über id kommen damit direkt aus dem Index
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run = Column(String, nullable=False, index=True)
+    kind = Column(Enum("fail", "warning", name="scrape_log_kind"), nullable=False)
+    asin = Column(String, nullable=True, index=True)
+    warning_type = Column(String, nullable=True, index=True)
+    message = Column(String, nullable=True)
+    context = Column(String, nullable=True)
+    location = Column(String, nullable=True)
+    url = Column(String, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+
+class ScrapeRun(Base):
+    """ Kennzahlen eines Orchestrator-Laufs – Grundlage für den Verlauf von Dauer und Durchsatz """
+    __tablename__ = "scrape_runs"
+    __table_args__ = (
+        Index("ix_scrape_runs_scraper_started_at", "scraper", "started_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run = Column(String, nullable=False, unique=True)
+    scraper = Column(Enum("products", "markets", name="scrape_run_scraper"), nullable=False)
+    cluster_id = Column(Integer, ForeignKey("market_clusters.id", ondelete="SET NULL"), nullable=True)
+    status = Column(String, nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=False)
+    duration_s = Column(Float, nullable=False)
+    items_total = Column(Integer, nullable=False, default=0)
+    items_succeeded = Column(Integer, nullable=False, default=0)
+    items_failed = Column(Integer, nullable=False, default=0)
+    items_skipped = Column(Integer, nullable=False, default=0)
+    pages_fetched = Column(Integer, nullable=False, default=0)
+    pages_per_minute = Column(Float, nullable=True)
+    avg_item_seconds = Column(Float, nullable=True)
+    warning_count = Column(Integer, nullable=False, default=0)
+    # Kleine Detail-Dicts, die nur pro Lauf angezeigt und nie gefiltert werden
+    warning_counts = Column(JSON, nullable=True)
+    page_outcomes = Column(JSON, nullable=True)
+    phase_timings = Column(JSON, nullable=True)
+
+
 
 class ProductChange(Base):
     __tablename__ = "product_changes"
@@ -114,6 +174,11 @@ class ProductChange(Base):
 
     product = relationship("Product", back_populates="product_changes")
 
+    # Verlauf pro ASIN (Historie, Sparklines, ETag-Validatoren) ohne Full Table Scan
+    __table_args__ = (
+        Index("ix_product_changes_asin_change_date", "asin", "change_date"),
+    )
+
 
 class Market(Base):
     __tablename__ = "markets"
@@ -151,17 +216,78 @@ class MarketChange(Base):
     products = relationship(
         "Product", secondary=market_change_products, back_populates="market_changes")
 
-    new_products = Column(String, nullable=True)  # Kommagetrennte ASINs
-    removed_products = Column(String, nullable=True)  # Kommagetrennte ASINs
     changes = Column(String, nullable=True)
-    top_suggestions = Column(String, nullable=True, default="")
-
 
     market = relationship("Market", back_populates="market_changes")
 
+    asin_entries = relationship(
+        "MarketChangeAsin",
+        back_populates="market_change",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+    suggestion_entries = relationship(
+        "MarketChangeSuggestion",
+        back_populates="market_change",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="MarketChangeSuggestion.position"
+    )
+
+    @property
+    def new_asins(self) -> list:
+        return [entry.asin for entry in self.asin_entries if entry.status == "added"]
+
+    @property
+    def removed_asins(self) -> list:
+        return [entry.asin for entry in self.asin_entries if entry.status == "removed"]
+
+    @property
+    def top_suggestion_list(self) -> list:
+        return [entry.suggestion for entry in self.suggestion_entries]
+
+    def set_asins(self, added: list, removed: list):
+        """ Speichert neue und entfernte ASINs als indizierte Zeilen in market_change_asins """
+        self.asin_entries = [
+            MarketChangeAsin(market_id=self.market_id, asin=asin, status="added") for asin in added
+        ] + [
+            MarketChangeAsin(market_id=self.market_id, asin=asin, status="removed") for asin in removed
+        ]
+
     def set_top_suggestions(self, suggestions: list):
-        """ Speichert eine Liste von Top-Suggestions als kommagetrennten String """
-        self.top_suggestions = ",".join(suggestions)
+        """ Speichert eine Liste von Top-Suggestions in Reihenfolge in market_change_suggestions """
+        self.suggestion_entries = [
+            MarketChangeSuggestion(position=position, suggestion=suggestion)
+            for position, suggestion in enumerate(suggestions)
+        ]
+
+
+class MarketChangeAsin(Base):
+    __tablename__ = "market_change_asins"
+    __table_args__ = (
+        Index("ix_market_change_asins_asin_market", "asin", "market_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    market_change_id = Column(Integer, ForeignKey(
+        "market_changes.id", ondelete="CASCADE"), nullable=False, index=True)
+    market_id = Column(Integer, ForeignKey("markets.id", ondelete="CASCADE"), nullable=False)
+    asin = Column(String, nullable=False)
+    status = Column(Enum("added", "removed", name="market_change_asin_status"), nullable=False)
+
+    market_change = relationship("MarketChange", back_populates="asin_entries")
+
+
+class MarketChangeSuggestion(Base):
+    __tablename__ = "market_change_suggestions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    market_change_id = Column(Integer, ForeignKey(
+        "market_changes.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False, default=0)
+    suggestion = Column(String, nullable=False)
+
+    market_change = relationship("MarketChange", back_populates="suggestion_entries")
 
 class MarketCluster(Base):
     __tablename__ = "market_clusters"
@@ -0,0 +1,144 @@
+"""
+Query-Zähler und Slow-Query-Log für alle SQLAlchemy-Engines.
+
+Zwei Engine-Events messen jedes Statement. Innerhalb von `track_queries()` (pro HTTP-Request über
+die Middleware, pro Produkt/Markt in den Orchestratoren) werden Anzahl und DB-Zeit aufsummiert –
+N+1-Muster fallen so als hohe Query-Zahl auf. Statements über `SLOW_QUERY_MS` landen mit
+Parametern als Warnung im Log.
+
+Mit `QUERY_STATS_HEADERS=1` bekommt jede Antwort `X-DB-Query-Count` und `X-DB-Time-Ms`.
+In Tests begrenzt `assert_max_queries(engine, n)` die Queries eines Endpoints.
+"""
+import contextvars
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from app.logging_config import truncate
+from app.metrics import route_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+QUERY_COUNT_WARN = int(os.getenv("QUERY_COUNT_WARN", "100"))
+QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", "").lower() in ("1", "true", "yes")
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+MAX_LOGGED_PARAMETER_CHARS = 500
+
+logger = logging.getLogger("app.query_stats")
+
+
+class QueryStats:
+    """Anzahl und Dauer der Queries eines Blocks; verschachtelte Blöcke zählen auch beim äußeren mit."""
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+
+    @property
+    def ms(self) -> float:
+        return self.seconds * 1000
+
+    def add(self, seconds: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += seconds
+            stats = stats.parent
+
+
+current_query_stats = contextvars.ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+    stats = QueryStats(parent=current_query_stats.get())
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.add(elapsed)
+
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            f"🐢 Langsame Query ({elapsed * 1000:.0f} ms): {truncate(' '.join(statement.split()))} "
+            f"| Parameter: {truncate(repr(parameters), MAX_LOGGED_PARAMETER_CHARS)}",
+            extra={"db_ms": round(elapsed * 1000, 1)},
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def discard_query_timer(exception_context):
+    # Fehlgeschlagene Statements erreichen after_cursor_execute nie
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+class QueryStatsMiddleware:
+    """Zählt die Queries jedes Requests; warnt ab QUERY_COUNT_WARN und setzt im Debug-Modus Header."""
+
+    def __init__(self, app, headers: bool = QUERY_STATS_HEADERS):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Sync-Routen laufen im Threadpool mit einer Kopie des Kontexts – sie sehen dasselbe QueryStats-Objekt
+        with track_queries() as stats:
+            async def send_with_stats(message):
+                # Bei Streaming-Antworten zählen nur die Queries bis zum Start der Antwort
+                if self.headers and message["type"] == "http.response.start":
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()),
+                        (QUERY_TIME_HEADER.lower().encode(), f"{stats.ms:.1f}".encode()),
+                    ]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        if stats.count >= QUERY_COUNT_WARN:
+            logger.warning(
+                f"⚠️ {stats.count} Queries ({stats.ms:.0f} ms DB) für {scope['method']} {route_template(scope)}",
+                extra={"db_queries": stats.count, "db_ms": round(stats.ms, 1)},
+            )
+
+
+@contextmanager
+def assert_max_queries(engine: Engine, max_count: int):
+    """Test-Helfer: schlägt fehl, wenn im Block mehr als `max_count` Statements auf `engine` laufen."""
+    statements: List[str] = []
+
+    def collect(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "after_cursor_execute", collect)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "after_cursor_execute", collect)
+
+    if len(statements) > max_count:
+        listing = "\n".join(f"  {index}. {' '.join(statement.split())[:200]}"
+                            for index, statement in enumerate(statements, 1))
+        raise AssertionError(f"{len(statements)} Queries statt höchstens {max_count}:\n{listing}")
@@ -5,16 +5,22 @@ from random import randint
 from typing import Any, Dict, List
 
 from app.auth import get_current_user
+from app.cache import response_cache
+from app.conditional import check_cluster_conditional, check_product_conditional
 from app.database import get_db
-from app.models import MarketChange, MarketCluster, Product, ProductChange
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from app.models import MarketChange, MarketCluster, Product
+from app.sparklines import SPARKLINE_FIELDS, get_sparkline_grid_data_for_asins
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from collections import defaultdict
 
 
 router = APIRouter()
 
+# Obergrenze pro Batch-Aufruf (ein Grid zeigt deutlich weniger Kacheln)
+MAX_SPARKLINE_BATCH_ASINS = 500
+
 
 class LineChartDataResponse(BaseModel):
     x_axis: List[int]
@@ -22,7 +28,7 @@ class LineChartDataResponse(BaseModel):
 
 
 @router.get("/get-line-chart-data", response_model=LineChartDataResponse)
-async def get_line_chart_data(current_user=Depends(get_current_user)):
+def get_line_chart_data(current_user=Depends(get_current_user)):
     return {
         "x_axis": [8, 9, 10],
         "series": [
@@ -36,86 +42,67 @@ class SparkLineDataResponse(BaseModel):
 
 
 @router.get("/get-spark-line-data", response_model=SparkLineDataResponse)
-async def get_spark_line_data(current_user=Depends(get_current_user)):
+def get_spark_line_data(current_user=Depends(get_current_user)):
     return {"data": [random.randint(1, 10) for _ in range(9)]}
 
 
 @router.get("/get-sparkline-grid-data/{asin}", response_model=List[int])
-async def get_sparkline_grid_data(asin: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def get_sparkline_grid_data(asin: str, request: Request, response: Response,
+                            db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     """
     Holt die letzten 30 Tage an Preisänderungen für ein Produkt und füllt Lücken auf.
     Falls das Produkt erst vor kurzem in die DB kam, beginnt die Liste ab diesem Datum.
     """
+    not_modified = check_product_conditional(request, response, db, "sparkline_grid", asin)
+    if not_modified:
+        return not_modified
 
     # ✅ Produkt suchen
     product = db.query(Product).filter(Product.asin == asin).first()
     if not product:
         raise HTTPException(status_code=404, detail="Produkt nicht gefunden")
 
-    # ✅ ProductChanges der letzten 30 Tage abrufen
-    cutoff_date = datetime.now(timezone.utc) - \
-        timedelta(days=30)  # ✅ timezone-aware
-    product_changes = (
-        db.query(ProductChange)
-        .filter(ProductChange.asin == asin, ProductChange.change_date.isnot(None), ProductChange.change_date >= cutoff_date)
-        # 🔹 Sortierung nach Datum (älteste zuerst)
-        .order_by(ProductChange.change_date.asc())
-        .all()
-    )
-
-    # ✅ Falls keine Änderungen vorhanden sind, gib eine leere Liste zurück
-    if not product_changes:
-        return []
-
-    # ✅ Stelle sicher, dass `change_date` immer timezone-aware ist
-    changes_with_dates = [
-        change for change in product_changes if change.change_date is not None
-    ]
-
-    if not changes_with_dates:
-        return []  # Falls alle change_date-Einträge `None` waren, leere Liste zurückgeben
-
-    # ✅ Ältestes Änderungsdatum holen und sicherstellen, dass es timezone-aware ist
-    first_change_date = min(
-        change.change_date.replace(tzinfo=timezone.utc) for change in changes_with_dates
-    )
-
-    # ✅ Startdatum bestimmen (ältester Change oder max. 30 Tage zurück)
-    start_date = max(cutoff_date, first_change_date)
+    prices = get_sparkline_grid_data_for_asins([asin], ["price"], db)[asin]["price"]
+    # 🔹 Sicherstellen, dass nur Zahlen zurückgegeben werden
+    return [int(value) for value in prices]
 
-    # ✅ Sicherstellen, dass `today` auch ein `datetime`-Objekt ist
-    today = datetime.now(timezone.utc).date()  # Nur das Datum extrahieren
 
-    # ✅ Liste mit relevanten Tagen erstellen
-    date_list = []
-    current_date = start_date.date()  # `date()` extrahieren, um Fehler zu vermeiden
+class SparklineBatchRequest(BaseModel):
+    asins: List[str] = Field(..., max_length=MAX_SPARKLINE_BATCH_ASINS)
+    fields: List[str] = ["price"]
 
-    while current_date <= today:
-        date_list.append(current_date.strftime("%Y-%m-%d"))
-        current_date += timedelta(days=1)
 
-    # ✅ Dictionary für Änderungen (Datum -> Preis)
-    changes_dict = {
-        change.change_date.strftime("%Y-%m-%d"): change.price
-        for change in changes_with_dates
-    }
+@router.post("/sparklines")
+def get_sparklines_batch(
+    request: SparklineBatchRequest,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    """
+    Grid-Sparklines für viele Produkte in einem Aufruf statt einem Request pro Kachel.
+    Antwort: {asin: {feld: [werte der letzten 30 Tage]}}; unbekannte ASINs liefern leere Listen.
+    """
+    unknown = [field for field in request.fields if field not in SPARKLINE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unbekannte Sparkline-Felder: {', '.join(unknown)}")
 
-    # ✅ Fehlende Werte mit vorherigem Wert füllen
-    filled_data = []
-    last_value = None
+    return get_sparkline_grid_data_for_asins(request.asins, request.fields, db)
 
-    for date in date_list:
-        if date in changes_dict:
-            # ✅ Falls ein Change existiert, diesen Wert nehmen
-            last_value = changes_dict[date]
-        # 🔹 Sicherstellen, dass nur Zahlen zurückgegeben werden
-        filled_data.append(int(last_value) if last_value is not None else 0)
 
-    return filled_data
+@router.get("/get-stacked-bar-data-for-cluster/{cluster_id}")
+def get_stacked_bar_data_for_cluster(cluster_id: int, request: Request, response: Response,
+                                     db: Session = Depends(get_db)):
+    not_modified = check_cluster_conditional(request, response, db, "stacked_bar", cluster_id)
+    if not_modified:
+        return not_modified
+
+    return response_cache.get_or_compute(
+        ("stacked_bar", None, cluster_id),
+        lambda: build_stacked_bar_data_for_cluster(cluster_id, db)
+    )
 
 
-@router.get("/get-stacked-bar-data-for-cluster/{cluster_id}")
-async def get_stacked_bar_data_for_cluster(cluster_id: int, db: Session = Depends(get_db)):
+def build_stacked_bar_data_for_cluster(cluster_id: int, db: Session):
     # 📌 MarketCluster abrufen
     market_cluster = db.query(MarketCluster).filter(
         MarketCluster.id == cluster_id).first()
@@ -177,7 +164,19 @@ async def get_stacked_bar_data_for_cluster(cluster_id: int, db: Session = Depend
 
 
 @router.get("/get-sparkline-data-for-market-cluster/{cluster_id}", response_model=List[int])
-async def get_sparkline_data_for_market_cluster(cluster_id: int, db: Session = Depends(get_db)) -> List[int]:
+def get_sparkline_data_for_market_cluster(cluster_id: int, request: Request, response: Response,
+                                          db: Session = Depends(get_db)) -> List[int]:
+    not_modified = check_cluster_conditional(request, response, db, "cluster_sparkline", cluster_id)
+    if not_modified:
+        return not_modified
+
+    return response_cache.get_or_compute(
+        ("cluster_sparkline", None, cluster_id),
+        lambda: build_sparkline_data_for_market_cluster(cluster_id, db)
+    )
+
+
+def build_sparkline_data_for_market_cluster(cluster_id: int, db: Session) -> List[int]:
     """
     Holt die aggregierte Umsatzentwicklung für ein MarketCluster als Liste von Integer-Werten.
     Falls ein Markt mehrere Änderungen an einem Tag hat, wird der späteste Wert genommen.
@@ -270,7 +269,7 @@ async def get_sparkline_data_for_market_cluster(cluster_id: int, db: Session = D
 
 
 @router.get("/get-bar-chart-data")
-async def get_bar_chart_data():
+def get_bar_chart_data():
     quarters = ["Q1", "Q2", "Q3", "Q4"]
     data = [
         {
@@ -1,21 +1,24 @@
 import logging
 import random
+import re
+from bisect import bisect_right
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-import scraper.selenium_config as selenium_config
 from app.auth import get_current_user
+from app.bulk_ops import chunked
+from app.cache import bump_data_version, response_cache
+from app.conditional import check_cluster_conditional, copy_conditional_headers
 from app.database import SessionLocal, get_db
 from app.models import (Market, MarketChange, MarketCluster, Product,
                         ProductChange, User, market_change_products,
                         market_cluster_markets, market_products)
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from app.sparklines import SPARKLINE_FIELDS, get_sparkline_data_for_asins
+from app.streaming import STREAM_BATCH_SIZE, streaming_json_response
+from fastapi import (APIRouter, BackgroundTasks, Depends, HTTPException, Query,
+                     Request, Response)
 from pydantic import BaseModel
-# Importiere deinen Scraper
-from scraper.product_selenium_scraper import AmazonProductScraper
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from sqlalchemy import delete, distinct, func
+from sqlalchemy import and_, delete, distinct, func
 from sqlalchemy.orm import Session, joinedload
 from datetime import datetime, timedelta
 
@@ -57,7 +60,7 @@ class AddAsinRequest(BaseModel):
     market_id: int
 
 @router.post("/add-asin")
-async def add_individual_asin_to_market(
+def add_individual_asin_to_market(
     request: AddAsinRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -71,7 +74,12 @@ async def add_individual_asin_to_market(
         raise HTTPException(status_code=404, detail="Market not found")
 
     def run_scraper_and_insert():
-      # Falls nicht vorhanden, importieren
+        # Selenium erst im Hintergrund-Task laden – hält API-Start und Speicher frei vom Browser-Stack
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        import scraper.selenium_config as selenium_config
+        from scraper.product_selenium_scraper import AmazonProductScraper
+
         db_in_task = SessionLocal()
 
         try:
@@ -156,6 +164,7 @@ async def add_individual_asin_to_market(
 
 
             db_in_task.commit()
+            bump_data_version()
             print(f"✅ ASIN {asin} erfolgreich hinzugefügt zu Market {market_id}")
 
         except Exception as e:
@@ -171,7 +180,7 @@ async def add_individual_asin_to_market(
 
 ## UPDATE CLUSTER
 @router.put("/update/{cluster_id}", response_model=dict)
-async def update_market_cluster(
+def update_market_cluster(
     cluster_id: int,
     cluster_data: MarketClusterUpdate,
     db: Session = Depends(get_db),
@@ -188,12 +197,13 @@ async def update_market_cluster(
 
     cluster.title = cluster_data.title
     db.commit()
+    bump_data_version()
 
     return {"message": "Market Cluster erfolgreich aktualisiert"}
 
 ## DELETE CLUSTER
 @router.delete("/delete/{cluster_id}", response_model=dict)
-async def delete_market_cluster(
+def delete_market_cluster(
     cluster_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -214,6 +224,7 @@ async def delete_market_cluster(
         db.commit()
         db.delete(cluster)
         db.commit()
+        bump_data_version()
 
         logging.info(f"✅ Market Cluster {cluster_id} deleted.")
         return {"message": "Market Cluster successfully deletedt"}
@@ -227,7 +238,7 @@ async def delete_market_cluster(
 
 # GET CLUSTERS FOR USER
 @router.get("/", response_model=List[MarketClusterResponse])
-async def get_user_market_clusters(
+def get_user_market_clusters(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
@@ -251,11 +262,17 @@ async def get_user_market_clusters(
 
 ## GET DASHBOARD INSIGHT DATA
 @router.get("/dashboard-overview")
-async def get_dashboard_overview(
+def get_dashboard_overview(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
+    return response_cache.get_or_compute(
+        ("dashboard_overview", current_user.id, None),
+        lambda: build_dashboard_overview(db, current_user)
+    )
+
 
+def build_dashboard_overview(db: Session, current_user: User):
     try:
         market_clusters = db.query(MarketCluster).filter(
         MarketCluster.user_id == current_user.id,
@@ -306,13 +323,158 @@ async def get_dashboard_overview(
             status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+PRODUCT_FIELDS = [
+    "image", "asin", "title", "price", "main_category", "main_category_rank", "second_category",
+    "second_category_rank", "total", "blm", "store", "manufacturer", "review_count", "rating",
+]
+# Cursor = ASIN der letzten Zeile; alles andere ist kein gültiger Keyset-Cursor
+CURSOR_PATTERN = re.compile(r"[A-Z0-9]{1,20}")
+
+
+class ClusterDetailsOptions(BaseModel):
+    """Steuert Seitengröße, Projektion und Sparklines der Cluster-Details"""
+    limit: Optional[int] = None
+    after: Optional[str] = None
+    fields: Optional[List[str]] = None
+    include_sparklines: bool = True
+
+    def cache_key(self):
+        return (self.limit, self.after, tuple(self.fields) if self.fields else None, self.include_sparklines)
+
+    def sparkline_fields(self) -> List[str]:
+        if not self.include_sparklines:
+            return []
+        if self.fields is None:
+            return SPARKLINE_FIELDS
+        return [field for field in SPARKLINE_FIELDS if f"sparkline_data_{field}" in self.fields]
+
+
+def parse_details_options(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Produkte pro Markt (Keyset-Pagination nach ASIN)"),
+    after: Optional[str] = Query(None, description="Cursor: letzte ASIN der vorherigen Seite"),
+    fields: Optional[str] = Query(None, description="Kommagetrennte Produktfelder, z.B. asin,title,price,sparkline_data_price"),
+    include_sparklines: bool = Query(True, description="False → Sparklines separat über /{cluster_id}/sparklines laden"),
+) -> ClusterDetailsOptions:
+    if after is not None and not CURSOR_PATTERN.fullmatch(after):
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+    field_list = None
+    if fields:
+        field_list = [field.strip() for field in fields.split(",") if field.strip()]
+        allowed = set(PRODUCT_FIELDS) | {f"sparkline_data_{field}" for field in SPARKLINE_FIELDS}
+        unknown = [field for field in field_list if field not in allowed]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unbekannte Felder: {', '.join(unknown)}")
+        # ASIN ist der Cursor und wird immer mitgeliefert
+        if "asin" not in field_list:
+            field_list.insert(0, "asin")
+    return ClusterDetailsOptions(limit=limit, after=after, fields=field_list, include_sparklines=include_sparklines)
+
+
 ## GET MARKET CLUSTER DETAILS
 @router.get("/{cluster_id}")
-async def get_market_cluster_details(
+def get_market_cluster_details(
+    cluster_id: int,
+    request: Request,
+    response: Response,
+    stream: Optional[str] = Query(None, pattern="^ndjson$"),
+    options: ClusterDetailsOptions = Depends(parse_details_options),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    not_modified = check_cluster_conditional(request, response, db, "cluster_details", cluster_id, current_user.id)
+    if not_modified:
+        return not_modified
+
+    # Große Cluster als NDJSON-Events streamen statt die komplette Antwort im Speicher aufzubauen
+    if stream:
+        get_visible_market_cluster(cluster_id, db, current_user)
+        return copy_conditional_headers(
+            response,
+            streaming_json_response(stream_market_cluster_details(cluster_id, current_user.id, options))
+        )
+
+    return response_cache.get_or_compute(
+        ("cluster_details", current_user.id, (cluster_id,) + options.cache_key()),
+        lambda: build_market_cluster_details(cluster_id, db, current_user, options)
+    )
+
+
+## GET NEXT PRODUCT PAGE OF ONE MARKET IN A CLUSTER
+@router.get("/{cluster_id}/markets/{market_id}/products")
+def get_market_products_page(
+    cluster_id: int,
+    market_id: int,
+    request: Request,
+    response: Response,
+    options: ClusterDetailsOptions = Depends(parse_details_options),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    not_modified = check_cluster_conditional(
+        request, response, db, f"market_products:{market_id}", cluster_id, current_user.id)
+    if not_modified:
+        return not_modified
+
+    market_cluster = get_visible_market_cluster(cluster_id, db, current_user)
+    market = next((market for market in market_cluster.markets if market.id == market_id), None)
+    if not market:
+        raise HTTPException(status_code=404, detail="Market nicht in diesem Cluster")
+
+    latest_market_change = get_latest_market_change(db, market.id)
+    if not latest_market_change:
+        return {"products": [], "next_cursor": None, "products_in_market_count": 0}
+
+    asins = get_scraped_market_asins(db, latest_market_change.id)
+    page_asins, next_cursor = paginate_asins(asins, options)
+    products = [
+        product_data
+        for chunk in chunked(page_asins, STREAM_BATCH_SIZE)
+        for product_data in build_product_rows(db, chunk, options)
+    ]
+    return {"products": products, "next_cursor": next_cursor, "products_in_market_count": len(asins)}
+
+
+## GET SPARKLINES FOR VISIBLE PRODUCTS OF A CLUSTER
+@router.get("/{cluster_id}/sparklines")
+def get_market_cluster_sparklines(
     cluster_id: int,
+    request: Request,
+    response: Response,
+    asins: str = Query(..., description="Kommagetrennte ASINs"),
+    fields: Optional[str] = Query(None, description="Kommagetrennte Sparkline-Felder, z.B. price,blm"),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
+    """Lädt die Sparklines der sichtbaren Produkte nachträglich in einem Aufruf"""
+    not_modified = check_cluster_conditional(request, response, db, "cluster_sparklines", cluster_id, current_user.id)
+    if not_modified:
+        return not_modified
+
+    market_cluster = get_visible_market_cluster(cluster_id, db, current_user)
+
+    requested_asins = list(dict.fromkeys(asin.strip() for asin in asins.split(",") if asin.strip()))
+    requested_fields = [field.strip() for field in fields.split(",")] if fields else SPARKLINE_FIELDS
+    unknown = [field for field in requested_fields if field not in SPARKLINE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unbekannte Sparkline-Felder: {', '.join(unknown)}")
+
+    cluster_asins = set()
+    for chunk in chunked(requested_asins):
+        cluster_asins.update(
+            asin for (asin,) in db.query(market_products.c.asin).filter(
+                market_products.c.market_id.in_([market.id for market in market_cluster.markets]),
+                market_products.c.asin.in_(chunk)
+            )
+        )
+
+    sparklines = get_sparkline_data_for_asins([asin for asin in requested_asins if asin in cluster_asins], requested_fields, db)
+    return {
+        asin: {f"sparkline_data_{field}": values for field, values in series.items()}
+        for asin, series in sparklines.items()
+    }
+
+
+def get_visible_market_cluster(cluster_id: int, db: Session, current_user: User):
     market_cluster = db.query(MarketCluster).filter(
         MarketCluster.id == cluster_id,
         MarketCluster.user_id == current_user.id,
@@ -322,180 +484,225 @@ async def get_market_cluster_details(
     if not market_cluster:
         raise HTTPException(
             status_code=404, detail="MarketCluster nicht gefunden")
+    return market_cluster
+
+
+def build_market_cluster_details(cluster_id: int, db: Session, current_user: User,
+                                 options: Optional[ClusterDetailsOptions] = None):
+    market_cluster = get_visible_market_cluster(cluster_id, db, current_user)
+
+    response_data = None
+    for event in iter_market_cluster_details(market_cluster, db, options):
+        if event["type"] == "cluster":
+            response_data = {**event["data"], "markets": []}
+        elif event["type"] == "market":
+            response_data["markets"].append({**event["data"], "products": []})
+        elif event["type"] == "product":
+            response_data["markets"][-1]["products"].append(event["data"])
+        elif event["type"] == "market_end":
+            response_data["markets"][-1].update(event["data"])
+        elif event["type"] == "insights":
+            response_data["insights"] = event["data"]
 
-    
-    #CD 1
-    response_data = {
-        "id": market_cluster.id,
-        "title": market_cluster.title,
-        "markets": [],
-        "insights": {
-            "total_revenue": -1,
-            "total_markets": len(market_cluster.markets),
-            "total_products": 0,
-            "avg_revenue_per_market": 0,
-            "avg_revenue_per_product": 0,
-            "top_performing_market": None,
-            "top_performing_product": None
-        },
-        "is_initial_scraped": market_cluster.is_initial_scraped,
-        "cluster_type": market_cluster.cluster_type
-    }
+    return response_data
 
-    total_products = []
-    max_market_revenue = 0
-    top_market = None
-    top_product = {"asin": None, "title": None, "revenue": 0}
 
-    for market in market_cluster.markets:
-        latest_market_change = db.query(MarketChange).filter(
-            MarketChange.market_id == market.id
-        ).order_by(MarketChange.change_date.desc()).first()
+def stream_market_cluster_details(cluster_id: int, user_id: int, options: Optional[ClusterDetailsOptions] = None):
+    """NDJSON-Quelle für große Cluster – eigene Session, da die Request-Session beim Streamen schon zu ist"""
+    db = SessionLocal()
+    try:
+        market_cluster = db.query(MarketCluster).filter(
+            MarketCluster.id == cluster_id,
+            MarketCluster.user_id == user_id
+        ).options(joinedload(MarketCluster.markets)).first()
+        if market_cluster:
+            yield from iter_market_cluster_details(market_cluster, db, options)
+    finally:
+        db.close()
 
-        if not latest_market_change:
-            continue
 
-        # if not latest_market_change.products:
-        #     logging.warning(
-        #         f"⚠️ Kein ProductChange gefunden für Market {market.keyword} (MarketChange ID: {latest_market_change.id})")
+def get_latest_market_change(db: Session, market_id: int):
+    return db.query(MarketChange).filter(
+        MarketChange.market_id == market_id
+    ).order_by(MarketChange.change_date.desc()).first()
 
-        market_data = {
-            "id": market.id,
-            "keyword": market.keyword,
-            "products": [],
-        }
 
-        # DDM1
-        market_revenue = -1
-        market_data["revenue_total"] = market_revenue
-        market_data["top_suggestions"] = latest_market_change.top_suggestions
-
-        if market_revenue > max_market_revenue:
-            max_market_revenue = market_revenue
-            top_market = market.keyword
-
-        # Neue Query: Nur Produkte mit gültigem Scrape
-        products_with_scrape = (
-            db.query(Product)
-            .join(market_change_products)
-            .filter(
-                market_change_products.c.market_change_id == latest_market_change.id,
-                Product.last_time_scraped.isnot(None)
-            )
-            .all()
+def get_scraped_market_asins(db: Session, market_change_id: int) -> List[str]:
+    """Alle ASINs des MarketChanges mit gültigem Scrape, sortiert (Keyset-Reihenfolge)"""
+    return [
+        asin for (asin,) in db.query(Product.asin)
+        .join(market_change_products)
+        .filter(
+            market_change_products.c.market_change_id == market_change_id,
+            Product.last_time_scraped.isnot(None)
         )
+        .order_by(Product.asin)
+    ]
 
-        for product in products_with_scrape:
-            if not product.asin in total_products:
-                total_products.append(product.asin)
-
-            latest_product_change = db.query(ProductChange).filter(
-                ProductChange.asin == product.asin
-            ).order_by(ProductChange.change_date.desc()).first()
-
-         
-
-            if latest_product_change and latest_product_change.total:
-                if latest_product_change.total > top_product["revenue"]:
-                    top_product = {
-                        "asin": product.asin,
-                        "title": latest_product_change.title,
-                        "revenue": latest_product_change.total
-                    }
-
-            product_data = {
-                "image": latest_product_change.img_path if latest_product_change and latest_product_change.img_path else None,
-                "asin": product.asin,
-                "title": latest_product_change.title if latest_product_change and latest_product_change.title else None,
-                "price": latest_product_change.price if latest_product_change else None,
-                "main_category": latest_product_change.main_category if latest_product_change and latest_product_change.main_category else None,
-                "main_category_rank": latest_product_change.main_category_rank if latest_product_change else None,
-                "second_category": latest_product_change.second_category if latest_product_change and latest_product_change.second_category else None,
-                "second_category_rank": latest_product_change.second_category_rank if latest_product_change else None,
-                "total": latest_product_change.total if latest_product_change else None,
-                "blm": latest_product_change.blm if latest_product_change else None,
-                "store": latest_product_change.store if latest_product_change else None,
-                "manufacturer": latest_product_change.manufacturer if latest_product_change else None,
-                "review_count": latest_product_change.review_count if latest_product_change else None,
-                "rating": latest_product_change.rating if latest_product_change else None,
-                "sparkline_data_price": get_sparkline_data_for_field(product, "price", db),
-                "sparkline_data_main_category_rank": get_sparkline_data_for_field(product, "main_category_rank", db),
-                "sparkline_data_second_category_rank": get_sparkline_data_for_field(product, "second_category_rank", db),
-                 "sparkline_data_rating": get_sparkline_data_for_field(product, "rating", db),
-                  "sparkline_data_review_count": get_sparkline_data_for_field(product, "review_count", db),
-                "sparkline_data_blm": get_sparkline_data_for_field(product, "blm", db),
-                "sparkline_data_total": get_sparkline_data_for_field(product, "total", db),
-            }
 
-            market_data["products"].append(product_data)
-        # DDM2
-        market_data["products_in_market_count"] = len(product_data)
-        # DDM3
-        market_data["avg_blm"] = -1
-        response_data["markets"].append(market_data)
+def paginate_asins(asins: List[str], options: ClusterDetailsOptions):
+    """Keyset-Seite nach `options.after`; gibt (Seite, nächster Cursor) zurück"""
+    start = bisect_right(asins, options.after) if options.after else 0
+    if options.limit is None:
+        return asins[start:], None
+    page = asins[start:start + options.limit]
+    has_more = start + options.limit < len(asins)
+    return page, page[-1] if has_more and page else None
+
+
+def get_latest_product_changes(db: Session, asins: List[str]) -> Dict[str, ProductChange]:
+    """Neuester ProductChange pro ASIN – ein Query pro Chunk statt einer pro Produkt"""
+    latest = {}
+    for chunk in chunked(asins):
+        newest = (
+            db.query(ProductChange.asin, func.max(ProductChange.change_date).label("change_date"))
+            .filter(ProductChange.asin.in_(chunk))
+            .group_by(ProductChange.asin)
+            .subquery()
+        )
+        changes = (
+            db.query(ProductChange)
+            .join(newest, and_(ProductChange.asin == newest.c.asin, ProductChange.change_date == newest.c.change_date))
+            .order_by(ProductChange.id)
+        )
+        for change in changes:
+            latest[change.asin] = change
+    return latest
 
 
-    # CD1
-    # has to be implemented
-    market_cluster_total_revenue = -1
-    response_data["insights"].update({
-        "total_products": len(total_products),
-        "total_revenue": market_cluster_total_revenue,
-        "avg_revenue_per_market": round(market_cluster_total_revenue / len(market_cluster.markets) if len(market_cluster.markets) > 0 else 0, 2),
-        "avg_revenue_per_product": round(market_cluster_total_revenue / len(total_products) if len(total_products) > 0 else 0, 2),
-        "top_performing_market": top_market,
-        "top_performing_product": top_product
-    })
+def get_top_performing_product(db: Session, asins: List[str]):
+    top_product = {"asin": None, "title": None, "revenue": 0}
+    for chunk in chunked(asins):
+        newest = (
+            db.query(ProductChange.asin, func.max(ProductChange.change_date).label("change_date"))
+            .filter(ProductChange.asin.in_(chunk))
+            .group_by(ProductChange.asin)
+            .subquery()
+        )
+        best = (
+            db.query(ProductChange.asin, ProductChange.title, ProductChange.total)
+            .join(newest, and_(ProductChange.asin == newest.c.asin, ProductChange.change_date == newest.c.change_date))
+            .filter(ProductChange.total.isnot(None))
+            .order_by(ProductChange.total.desc())
+            .first()
+        )
+        if best and best.total > top_product["revenue"]:
+            top_product = {"asin": best.asin, "title": best.title, "revenue": best.total}
+    return top_product
+
+
+def build_product_rows(db: Session, asins: List[str], options: ClusterDetailsOptions):
+    """Produktzeilen für eine Seite: ein Query für die neuesten Changes, ein Batch für alle Sparklines"""
+    latest_changes = get_latest_product_changes(db, asins)
+    sparkline_fields = options.sparkline_fields()
+    sparklines = get_sparkline_data_for_asins(asins, sparkline_fields, db) if sparkline_fields else {}
+
+    for asin in asins:
+        latest_product_change = latest_changes.get(asin)
+        product_data = {
+            "image": latest_product_change.img_path if latest_product_change and latest_product_change.img_path else None,
+            "asin": asin,
+            "title": latest_product_change.title if latest_product_change and latest_product_change.title else None,
+            "price": latest_product_change.price if latest_product_change else None,
+            "main_category": latest_product_change.main_category if latest_product_change and latest_product_change.main_category else None,
+            "main_category_rank": latest_product_change.main_category_rank if latest_product_change else None,
+            "second_category": latest_product_change.second_category if latest_product_change and latest_product_change.second_category else None,
+            "second_category_rank": latest_product_change.second_category_rank if latest_product_change else None,
+            "total": latest_product_change.total if latest_product_change else None,
+            "blm": latest_product_change.blm if latest_product_change else None,
+            "store": latest_product_change.store if latest_product_change else None,
+            "manufacturer": latest_product_change.manufacturer if latest_product_change else None,
+            "review_count": latest_product_change.review_count if latest_product_change else None,
+            "rating": latest_product_change.rating if latest_product_change else None,
+        }
+        for field in sparkline_fields:
+            product_data[f"sparkline_data_{field}"] = sparklines[asin][field]
 
-    return response_data
+        if options.fields is not None:
+            product_data = {key: value for key, value in product_data.items() if key in options.fields}
+        yield product_data
 
 
+def iter_market_cluster_details(market_cluster: MarketCluster, db: Session,
+                                options: Optional[ClusterDetailsOptions] = None):
+    """
+    Liefert die Cluster-Details als Folge von Events:
+    cluster → (market → product* → market_end)* → insights
+    """
+    options = options or ClusterDetailsOptions()
 
+    #CD 1
+    yield {
+        "type": "cluster",
+        "data": {
+            "id": market_cluster.id,
+            "title": market_cluster.title,
+            "is_initial_scraped": market_cluster.is_initial_scraped,
+            "cluster_type": market_cluster.cluster_type
+        }
+    }
 
-def get_sparkline_data_for_field(product, field: str, db: Session):
-    # Hole alle ProductChanges für das gegebene Produkt und das gewünschte Feld
-    product_changes = (
-        db.query(ProductChange)
-        .filter(ProductChange.asin == product.asin)
-        .order_by(ProductChange.change_date)
-        .all()
-    )
+    total_products = set()
+    max_market_revenue = 0
+    top_market = None
 
-    if not product_changes:
-        return []
+    for market in market_cluster.markets:
+        latest_market_change = get_latest_market_change(db, market.id)
 
-    # Heutiges Datum (nur Datumsteil)
-    today = datetime.now().date()
+        if not latest_market_change:
+            continue
 
-    # Erster Change-Zeitpunkt
-    first_change_date = product_changes[0].change_date.date()
-    
-    # Anzahl der Tage seit dem ersten Change bis gestern
-    days_since_first = (today - first_change_date).days
-    num_days = min(days_since_first, 30)
+        # DDM1
+        market_revenue = -1
+        yield {
+            "type": "market",
+            "data": {
+                "id": market.id,
+                "keyword": market.keyword,
+                "revenue_total": market_revenue,
+                "top_suggestions": ",".join(latest_market_change.top_suggestion_list)
+            }
+        }
 
-    if num_days <= 0:
-        return []
+        if market_revenue > max_market_revenue:
+            max_market_revenue = market_revenue
+            top_market = market.keyword
 
-    # Liste mit Platzhaltern
-    sparkline_data = [None] * num_days
-    date_list = [first_change_date + timedelta(days=i) for i in range(num_days)]
+        # Nur Produkte mit gültigem Scrape, nur die angefragte Seite wird aufgebaut
+        asins = get_scraped_market_asins(db, latest_market_change.id)
+        total_products.update(asins)
+        page_asins, next_cursor = paginate_asins(asins, options)
 
-    # Pointer für aktuellen gültigen Wert
-    last_valid_value = None
-    change_index = 0
+        for chunk in chunked(page_asins, STREAM_BATCH_SIZE):
+            for product_data in build_product_rows(db, chunk, options):
+                yield {"type": "product", "market_id": market.id, "data": product_data}
 
-    for i, date in enumerate(date_list):
-        # Suche alle Changes bis einschließlich diesem Tag
-        while change_index < len(product_changes) and product_changes[change_index].change_date.date() <= date:
-            value = getattr(product_changes[change_index], field)
-            if value is not None:
-                last_valid_value = value
-            change_index += 1
+        market_end = {
+            # DDM2
+            "products_in_market_count": len(asins),
+            # DDM3
+            "avg_blm": -1
+        }
+        if options.limit is not None:
+            market_end["next_cursor"] = next_cursor
+        yield {"type": "market_end", "market_id": market.id, "data": market_end}
 
-        sparkline_data[i] = last_valid_value
+    # CD1
+    # has to be implemented
+    market_cluster_total_revenue = -1
+    yield {
+        "type": "insights",
+        "data": {
+            "total_revenue": market_cluster_total_revenue,
+            "total_markets": len(market_cluster.markets),
+            "total_products": len(total_products),
+            "avg_revenue_per_market": round(market_cluster_total_revenue / len(market_cluster.markets) if len(market_cluster.markets) > 0 else 0, 2),
+            "avg_revenue_per_product": round(market_cluster_total_revenue / len(total_products) if len(total_products) > 0 else 0, 2),
+            "top_performing_market": top_market,
+            "top_performing_product": get_top_performing_product(db, sorted(total_products))
+        }
+    }
 
-    return sparkline_data
 
 # def get_sparkline_data_for_field(product, field: str, db: Session):
 #     # Hole alle ProductChanges für das gegebene Produkt und das gewünschte Feld
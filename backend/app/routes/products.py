@@ -1,10 +1,13 @@
-from datetime import datetime, timedelta
-from typing import Dict, List, Union
-
-from app.auth import get_current_user
-from app.database import get_db
-from app.models import ProductChange
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Union
+
+from app.auth import get_current_user, is_admin
+from app.conditional import check_product_conditional, copy_conditional_headers
+from app.database import SessionLocal, get_db
+from app.export import EXPORT_DIR, FORMATS, export_product_changes
+from app.models import Market, MarketChange, MarketChangeAsin, ProductChange, User
+from app.streaming import STREAM_BATCH_SIZE, streaming_json_response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -19,9 +22,32 @@ class LineChartDataResponse(BaseModel):
     x_axis: List[str]
     series: List[ChartSeries]
 
+class ProductChangeExportRequest(BaseModel):
+    start: Optional[date] = None
+    end: Optional[date] = None
+    cluster_id: Optional[int] = None
+    incremental: bool = True
+    format: str = "parquet"
+
 ## GET ALL PRODUCT CHANGES BY ASIN
 @router.get("/product-changes/{asin}")
-async def get_product_changes(asin: str, db: Session = Depends(get_db)):
+def get_product_changes(
+    asin: str,
+    request: Request,
+    response: Response,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|array)$"),
+    db: Session = Depends(get_db)
+):
+    """Alle ProductChanges eines ASINs; mit `?stream=ndjson|array` wird die Antwort gestreamt"""
+    not_modified = check_product_conditional(request, response, db, "product_changes", asin)
+    if not_modified:
+        return not_modified
+
+    if stream:
+        if not db.query(ProductChange.id).filter(ProductChange.asin == asin).first():
+            raise HTTPException(status_code=404, detail="Keine Änderungen gefunden.")
+        return copy_conditional_headers(response, streaming_json_response(iter_product_changes(asin), stream))
+
     product_changes = (
         db.query(ProductChange)
         .filter(ProductChange.asin == asin)
@@ -32,37 +58,118 @@ async def get_product_changes(asin: str, db: Session = Depends(get_db)):
     if not product_changes:
         raise HTTPException(status_code=404, detail="Keine Änderungen gefunden.")
 
+    return [serialize_product_change(change) for change in product_changes]
+
+
+def serialize_product_change(change: ProductChange) -> dict:
+    return {
+        "id": change.id,
+        "asin": change.asin,
+        "change_date": change.change_date.strftime("%Y-%m-%d %H:%M:%S"),
+        "title": change.title,
+        "price": change.price,
+        "main_category": change.main_category,
+        "second_category": change.second_category,
+        "main_category_rank": change.main_category_rank,
+        "second_category_rank": change.second_category_rank,
+        "blm": change.blm,
+        "total": change.total,
+        "changes": change.changes,
+        "img_path": change.img_path,
+        "store": change.store,
+        "manufacturer": change.manufacturer,
+        "review_count": change.review_count,
+        "rating": change.rating
+    }
+
+
+def iter_product_changes(asin: str):
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(ProductChange)
+            .filter(ProductChange.asin == asin)
+            .order_by(ProductChange.change_date.desc())
+            .yield_per(STREAM_BATCH_SIZE)
+        )
+        for change in query:
+            yield serialize_product_change(change)
+    finally:
+        db.close()
+
+
+## EXPORT PRODUCT CHANGE HISTORY (ADMIN)
+@router.post("/export-product-changes")
+def export_product_change_history(
+    request: ProductChangeExportRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Schreibt die ProductChange-Historie (oder einen Zeit-/Cluster-Ausschnitt) als Parquet/Arrow nach EXPORT_DIR"""
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Access only for admins")
+    if request.format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Format, erlaubt: {', '.join(FORMATS)}")
+
+    # Ausschnitte bekommen einen eigenen Ordner und damit ein eigenes Watermark
+    slice_parts = []
+    if request.cluster_id is not None:
+        slice_parts.append(f"cluster-{request.cluster_id}")
+    if request.start:
+        slice_parts.append(f"from-{request.start}")
+    if request.end:
+        slice_parts.append(f"to-{request.end}")
+    output_dir = EXPORT_DIR / ("_".join(slice_parts) or "all")
+    try:
+        return export_product_changes(
+            db,
+            output_dir=output_dir,
+            start=request.start,
+            end=request.end,
+            cluster_id=request.cluster_id,
+            incremental=request.incremental,
+            file_format=request.format,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+## GET MARKET ENTRY/EXIT HISTORY BY ASIN
+@router.get("/market-history/{asin}")
+def get_product_market_history(asin: str, market_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Wann ist ein ASIN in welchen Markt gekommen bzw. herausgefallen (indizierter Lookup)"""
+    query = (
+        db.query(MarketChangeAsin.market_id, Market.keyword, MarketChangeAsin.status, MarketChange.change_date)
+        .join(MarketChange, MarketChange.id == MarketChangeAsin.market_change_id)
+        .join(Market, Market.id == MarketChangeAsin.market_id)
+        .filter(MarketChangeAsin.asin == asin)
+    )
+    if market_id is not None:
+        query = query.filter(MarketChangeAsin.market_id == market_id)
+
     return [
         {
-            "id": change.id,
-            "asin": change.asin,
-            "change_date": change.change_date.strftime("%Y-%m-%d %H:%M:%S"),
-            "title": change.title,
-            "price": change.price,
-            "main_category": change.main_category,
-            "second_category": change.second_category,
-            "main_category_rank": change.main_category_rank,
-            "second_category_rank": change.second_category_rank,
-            "blm": change.blm,
-            "total": change.total,
-            "changes": change.changes,
-            "img_path": change.img_path,
-            "store": change.store,
-            "manufacturer": change.manufacturer,
-            "review_count": change.review_count,
-            "rating": change.rating
+            "market_id": row.market_id,
+            "keyword": row.keyword,
+            "status": row.status,
+            "change_date": row.change_date.strftime("%Y-%m-%d %H:%M:%S") if row.change_date else None
         }
-        for change in product_changes
+        for row in query.order_by(MarketChange.change_date.asc()).all()
     ]
 
 
-
 @router.get("/get-product-chart-data/{asin}", response_model=LineChartDataResponse)
-async def get_product_chart_data(
+def get_product_chart_data(
     asin: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
+    not_modified = check_product_conditional(request, response, db, "product_chart", asin)
+    if not_modified:
+        return not_modified
+
     # 1. ProductChanges holen
     product_changes = db.query(ProductChange).filter(
         ProductChange.asin == asin
@@ -1,24 +1,36 @@
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 import os
 import shutil
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Literal, Optional
 import uuid
 
 from fastapi.responses import FileResponse, JSONResponse
 from app.auth import get_current_user
-from app.database import get_db
-from app.models import (Market, MarketChange, MarketCluster, Product,
-                        ProductChange, User)
-from fastapi import APIRouter, Depends
+from app.cache import bump_data_version
+from app.database import SessionLocal, get_db
+from app.metrics import db_write_seconds, scraping_queue_depth
+from app.scrape_logs import (DEFAULT_PAGE_SIZE, list_scrape_runs, query_scrape_log_entries,
+                             summarize_scrape_log_entries)
+from app.scrape_runs import BASELINE_RUNS, REGRESSION_TOLERANCE, get_run, list_runs, run_chart
+from app.bulk_ops import (ensure_products, insert_association_rows,
+                          sync_association)
+from app.models import (Market, MarketChange, MarketChangeAsin,
+                        MarketChangeSuggestion, MarketCluster,
+                        ProductChange, User, market_change_products,
+                        market_products)
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from scraper.Product_Orchestrator import Product_Orchestrator
 from pathlib import Path
-from scraper.first_page_amazon_scraper import AmazonFirstPageScraper
+# Hier nur leichte scraper-Module – Selenium, webdriver_manager und die Orchestratoren lädt erst der Job
+from scraper.block_detector import throttle
+from scraper.sampling_profiler import (PROFILE_INTERVAL_MS, profiling_enabled, profiling_from_env,
+                                       set_profiling)
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 import logging
-from scraper.Market_Orchestrator import MarketOrchestrator
 from fastapi import BackgroundTasks, Body
 from app.auth import is_admin
 
@@ -40,19 +52,82 @@ LOG_FILE_PRODUCT = "scraping_log.txt"
 LOG_FILE_MARKET = "market_scraping_log.txt"
 
 LOGS_DIR = Path(__file__).resolve().parents[2] / "scraper" / "logs"
+# Berichte (.txt), JSON-Lines-Log und dessen gzip-Archive, Sampling-Profile (.folded)
+LOG_FILE_PATTERNS = ("*.txt", "*.jsonl", "*.jsonl.*.gz", "*.folded")
+# gzip-Archive gehen als Download raus, alle anderen Log-Dateien sind Text
+LOG_MEDIA_TYPES = {".gz": "application/gzip"}
 asin_test_logs = {}
 
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler()  # Direkt in die Konsole schreiben
+# 🧵 In-Memory-Registry für Cluster-Scraping-Jobs (job_id -> Status)
+scraping_jobs: Dict[str, dict] = {}
+scraping_jobs_lock = threading.Lock()
+JOB_FINAL_STATES = ("done", "failed")
+JOB_ACTIVE_STATES = ("queued", "first_page", "products", "markets")
+# Abgeschlossene Jobs bleiben so lange abfragbar (Frontend pollt /jobs/{job_id}), danach fliegen sie raus
+SCRAPING_JOB_TTL = float(os.getenv("SCRAPING_JOB_TTL", "3600"))
+
+
+def prune_scraping_jobs():
+    """Entfernt abgeschlossene Jobs, deren letztes Update älter als SCRAPING_JOB_TTL ist. Aufrufer hält den Lock."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=SCRAPING_JOB_TTL)
+    expired = [
+        job_id for job_id, job in scraping_jobs.items()
+        if job["status"] in JOB_FINAL_STATES and datetime.fromisoformat(job["updated_at"]) < cutoff
     ]
-)
+    for job_id in expired:
+        del scraping_jobs[job_id]
+
+
+def create_scraping_job(cluster_id: int, user_id: int, keywords: List[str]) -> str:
+    job_id = uuid.uuid4().hex
+    now = datetime.now(timezone.utc).isoformat()
+    with scraping_jobs_lock:
+        prune_scraping_jobs()
+        scraping_jobs[job_id] = {
+            "job_id": job_id,
+            "cluster_id": cluster_id,
+            "user_id": user_id,
+            "status": "queued",
+            "keywords_total": len(keywords),
+            "keywords_done": 0,
+            "failed_keywords": [],
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+    return job_id
+
+
+def update_scraping_job(job_id: Optional[str], **fields):
+    if job_id is None:
+        return
+    with scraping_jobs_lock:
+        job = scraping_jobs.get(job_id)
+        if job:
+            job.update(fields, updated_at=datetime.now(timezone.utc).isoformat())
+
+
+def get_scraping_job(job_id: str) -> Optional[dict]:
+    with scraping_jobs_lock:
+        job = scraping_jobs.get(job_id)
+        return dict(job) if job else None
+
+
+def count_active_jobs() -> dict:
+    """Queue-Tiefe für /metrics: nicht abgeschlossene Jobs je Status."""
+    counts = {(status,): 0 for status in JOB_ACTIVE_STATES}
+    with scraping_jobs_lock:
+        for job in scraping_jobs.values():
+            if job["status"] not in JOB_FINAL_STATES:
+                counts[(job["status"],)] = counts.get((job["status"],), 0) + 1
+    return counts
+
+
+scraping_queue_depth.set_collector(count_active_jobs)
+
 
 @router.post("/start-firstpage-scraping-process")
-async def start_firstpage_scraping(
+def start_firstpage_scraping(
     newClusterData: NewClusterData,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -67,79 +142,155 @@ async def start_firstpage_scraping(
         cluster_type=cluster_type
     )
     db.add(new_cluster)
-    db.commit()
-    db.refresh(new_cluster)
 
-    for keyword in newClusterData.keywords:
+    # Märkte nur anlegen – First-Page-Scraping läuft im Job
+    keywords = list(dict.fromkeys(newClusterData.keywords))
+    new_market_ids = []
+    for keyword in keywords:
         market = db.query(Market).filter(Market.keyword == keyword).first()
 
         if not market:
             market = Market(keyword=keyword)
             db.add(market)
-            db.commit()
-            db.refresh(market)
+            db.flush()
+            new_market_ids.append(market.id)
 
-            # First Page Scraping ausführen (async im Hintergrund)
-            await perform_first_page_scrape(market, new_cluster, db)
-        
         new_cluster.markets.append(market)
 
     db.commit()
+    bump_data_version()
+
+    job_id = create_scraping_job(new_cluster.id, current_user.id, keywords)
+    executor.submit(run_cluster_scraping_job, job_id, new_cluster.id, new_market_ids)
+
+    return {
+        "success": True,
+        "message": f"Cluster '{cluster_name}' mit Scraping gestartet.",
+        "job_id": job_id,
+        "cluster_id": new_cluster.id
+    }
+
+
+@router.get("/jobs")
+def list_scraping_jobs(current_user: User = Depends(get_current_user)):
+    """Gibt alle laufenden Scraping-Jobs des Users zurück"""
+    with scraping_jobs_lock:
+        prune_scraping_jobs()
+        return [
+            dict(job) for job in scraping_jobs.values()
+            if job["user_id"] == current_user.id and job["status"] not in JOB_FINAL_STATES
+        ]
+
+
+@router.get("/jobs/{job_id}")
+def get_scraping_job_status(job_id: str, current_user: User = Depends(get_current_user)):
+    """Gibt den Fortschritt eines Cluster-Scraping-Jobs zurück"""
+    job = get_scraping_job(job_id)
+    if not job or (job["user_id"] != current_user.id and not is_admin(current_user)):
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    return job
+
+
+def run_cluster_scraping_job(job_id: str, cluster_id: int, new_market_ids: List[int]):
+    """Führt First-Page-Scraping für neue Märkte aus und startet danach die Orchestratoren."""
+    db = SessionLocal()
+    try:
+        # Bereits bekannte Märkte brauchen kein First-Page-Scraping
+        keywords_done = get_scraping_job(job_id)["keywords_total"] - len(new_market_ids)
+        update_scraping_job(job_id, status="first_page", keywords_done=keywords_done)
+
+        failed_keywords = []
+        for market in db.query(Market).filter(Market.id.in_(new_market_ids)).all():
+            data = fetch_first_page_data(market.keyword)
+            if data is None:
+                # Kein Ergebnis (Block/Timeout) ist kein leerer Markt – nichts schreiben, Keyword als fehlgeschlagen melden
+                logging.warning(f"⚠️ Erste Seite für '{market.keyword}' nicht geladen – Keyword übersprungen")
+                failed_keywords.append(market.keyword)
+            else:
+                ingest_first_page_products(
+                    db,
+                    market,
+                    data.get("first_page_products", []),
+                    data.get("top_search_suggestions", [])
+                )
+            keywords_done += 1
+            update_scraping_job(job_id, keywords_done=keywords_done, failed_keywords=list(failed_keywords))
+
+        if new_market_ids and len(failed_keywords) == len(new_market_ids):
+            logging.error(f"❌ First-Page-Scraping für Cluster {cluster_id}: kein Keyword geladen")
+            update_scraping_job(job_id, status="failed",
+                                error=f"Erste Seite nicht geladen: {', '.join(failed_keywords)}")
+            return
+    except Exception as e:
+        db.rollback()
+        logging.error(f"❌ First-Page-Scraping für Cluster {cluster_id} fehlgeschlagen: {e}")
+        update_scraping_job(job_id, status="failed", error=str(e))
+        return
+    finally:
+        db.close()
 
-    # Orchestratoren starten
-    loop = asyncio.get_running_loop()
-    loop.run_in_executor(executor, run_product_orchestrator, new_cluster.id)
-
-    return {"message": f"Cluster '{cluster_name}' mit Scraping gestartet."}
+    run_product_orchestrator(cluster_id, job_id)
 
-async def perform_first_page_scrape(market: Market, cluster: MarketCluster, db: Session):
-    loop = asyncio.get_running_loop()
-    data = await loop.run_in_executor(executor, fetch_first_page_data, market.keyword)
 
-    product_data_list = data.get("first_page_products", [])
-    top_suggestions = data.get("top_search_suggestions", [])
+def ingest_first_page_products(db: Session, market: Market, product_data_list: List[dict], top_suggestions: List[str]):
+    """
+    Schreibt ein First-Page-Ergebnis gebündelt in die DB: ein IN-Query für vorhandene ASINs,
+    Bulk-Inserts für Produkte, Verknüpfungen und ProductChanges und genau ein Commit.
+    """
+    now = datetime.now(timezone.utc)
+    products_by_asin = {}
+    for product_data in product_data_list:
+        products_by_asin.setdefault(product_data["asin"], product_data)
+    asins = list(products_by_asin)
 
     market_change = MarketChange(
         market_id=market.id,
-        change_date=datetime.now(timezone.utc),
-        new_products=",".join([p["asin"] for p in product_data_list])
+        change_date=now
     )
-    market_change.set_top_suggestions(top_suggestions)
     db.add(market_change)
-
-    for product_data in product_data_list:
-        product = db.query(Product).filter(Product.asin == product_data["asin"]).first()
-
-        if not product:
-            product = Product(asin=product_data["asin"])
-            db.add(product)
-            db.commit()
-            db.refresh(product)
-
-        market.products.append(product)
-        market_change.products.append(product)
-
-        product_change = ProductChange(
-            asin=product.asin,
-            title=product_data.get("title"),
-            price=product_data.get("price"),
-            main_category=product_data.get("main_category"),
-            second_category=product_data.get("second_category"),
-            main_category_rank=product_data.get("main_category_rank"),
-            second_category_rank=product_data.get("second_category_rank"),
-            img_path=product_data.get("image"),
-            change_date=datetime.now(timezone.utc),
-            changes="Initial creation"
-        )
-        db.add(product_change)
+    db.flush()
+
+    if asins:
+        db.execute(insert(MarketChangeAsin), [
+            {"market_change_id": market_change.id, "market_id": market.id, "asin": asin, "status": "added"}
+            for asin in asins
+        ])
+    if top_suggestions:
+        db.execute(insert(MarketChangeSuggestion), [
+            {"market_change_id": market_change.id, "position": position, "suggestion": suggestion}
+            for position, suggestion in enumerate(top_suggestions)
+        ])
+
+    ensure_products(db, asins)
+
+    sync_association(db, market_products, "market_id", market.id, asins)
+    insert_association_rows(db, market_change_products, [
+        {"market_change_id": market_change.id, "asin": asin} for asin in asins
+    ])
+
+    if products_by_asin:
+        db.execute(insert(ProductChange), [
+            {
+                "asin": asin,
+                "title": product_data.get("title"),
+                "price": product_data.get("price"),
+                "main_category": product_data.get("main_category"),
+                "second_category": product_data.get("second_category"),
+                "main_category_rank": product_data.get("main_category_rank"),
+                "second_category_rank": product_data.get("second_category_rank"),
+                "img_path": product_data.get("image"),
+                "change_date": now,
+                "changes": "Initial creation"
+            }
+            for asin, product_data in products_by_asin.items()
+        ])
+
+    with db_write_seconds.time(operation="first_page_ingest"):
         db.commit()
-
-        product.product_changes.append(product_change)
-
-    db.commit()
+    bump_data_version()
 
 @router.get("/get-loading-clusters")
-async def get_loading_clusters(
+def get_loading_clusters(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -147,41 +298,65 @@ async def get_loading_clusters(
         MarketCluster.user_id == current_user.id,
         MarketCluster.is_initial_scraped == False
     ).all()
+    with scraping_jobs_lock:
+        jobs_by_cluster = {
+            job["cluster_id"]: dict(job) for job in scraping_jobs.values()
+            if job["user_id"] == current_user.id
+        }
     return [
         {
             "id": cluster.id,
             "title": cluster.title,
             "status": "initial_scraping",
-            "cluster_type": cluster.cluster_type
+            "cluster_type": cluster.cluster_type,
+            "job": jobs_by_cluster.get(cluster.id)
         }
         for cluster in clusters
     ]
 
 def fetch_first_page_data(keyword: str):
+    from scraper.first_page_amazon_scraper import AmazonFirstPageScraper
+
     scraper = AmazonFirstPageScraper(headless=True, show_details=True)
-    return scraper.get_first_page_data(keyword)
+    throttle.acquire()
+    try:
+        return scraper.get_first_page_data(keyword)
+    finally:
+        throttle.release(blocked=scraper.blocked is not None)
 
-def run_product_orchestrator(cluster_id: int):
+def run_product_orchestrator(cluster_id: int, job_id: Optional[str] = None):
     try:
+        update_scraping_job(job_id, status="products")
+        from scraper.Product_Orchestrator import Product_Orchestrator
         orchestrator = Product_Orchestrator(just_scrape_3_products=False, cluster_to_scrape=cluster_id)
         orchestrator.update_products()
-        run_market_orchestrator(cluster_id)
     except Exception as e:
         print(f"❌ Fehler im Product-Orchestrator für Cluster {cluster_id}: {e}")
+        update_scraping_job(job_id, status="failed", error=str(e))
+        return
+    run_market_orchestrator(cluster_id, job_id)
 
-def run_market_orchestrator(cluster_id: int):
+def run_market_orchestrator(cluster_id: int, job_id: Optional[str] = None):
     try:
+        update_scraping_job(job_id, status="markets")
+        from scraper.Market_Orchestrator import MarketOrchestrator
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         orchestrator = MarketOrchestrator(cluster_to_scrape=cluster_id)
         orchestrator.update_markets()
 
         # Cluster als gescraped markieren
-        db = next(get_db())
-        db.query(MarketCluster).filter(MarketCluster.id == cluster_id).update({"is_initial_scraped": True})
-        db.commit()
+        db = SessionLocal()
+        try:
+            db.query(MarketCluster).filter(MarketCluster.id == cluster_id).update({"is_initial_scraped": True})
+            db.commit()
+            bump_data_version()
+        finally:
+            db.close()
+        update_scraping_job(job_id, status="done")
     except Exception as e:
         print(f"❌ Fehler im Market-Orchestrator für Cluster {cluster_id}: {e}")
+        update_scraping_job(job_id, status="failed", error=str(e))
 
 
 ## ASYNC PRODUCT ORCHESTRATOR
@@ -229,6 +404,7 @@ def mark_cluster_as_scraped(cluster_id: int, db: Session):
     try:
         db.query(MarketCluster).filter(MarketCluster.id == cluster_id).update({"is_initial_scraped": True})
         db.commit()
+        bump_data_version()
         print(f"✅ MarketCluster {cluster_id} wurde als vollständig gescraped markiert.")
     except Exception as e:
         print(f"❌ Fehler beim Setzen von is_initial_scraped für Cluster {cluster_id}: {e}")
@@ -237,17 +413,16 @@ def mark_cluster_as_scraped(cluster_id: int, db: Session):
 @router.get("/logs")
 def list_scraping_logs(current_user: User = Depends(get_current_user)):
     """
-    Gibt alle .txt Log-Dateien zurück (fails + scraping)
+    Gibt alle Log-Dateien zurück (Berichte, JSON-Log samt Archiven, Sampling-Profile)
     """
-    if current_user.username != "admin":
-        raise JSONResponse(status_code=403, content={"error": "Access only for admins"})
-    else:
-        print("is admiN!")
+    require_admin(current_user)
     if not LOGS_DIR.exists():
         print("no logs dir")
         return []
     
-    files = sorted([f.name for f in LOGS_DIR.glob("*.txt")], reverse=True)
+    files = sorted([
+        f.name for pattern in LOG_FILE_PATTERNS for f in LOGS_DIR.glob(pattern)
+    ], reverse=True)
     #print("files", files)
     return files
 
@@ -256,17 +431,146 @@ def get_log_content(filename: str, current_user: User = Depends(get_current_user
     """
     Gibt den Inhalt einer bestimmten Log-Datei zurück
     """
-    if current_user.username != "admin":
-        raise JSONResponse(status_code=403, content={"error": "Access only for admins"})
+    require_admin(current_user)
     file_path = LOGS_DIR / filename
     if not file_path.exists() or not file_path.is_file():
         return JSONResponse(status_code=404, content={"error": "Datei nicht gefunden."})
-    
+
+    media_type = LOG_MEDIA_TYPES.get(file_path.suffix)
+    if media_type:
+        return FileResponse(file_path, media_type=media_type, filename=filename)
     return FileResponse(file_path, media_type="text/plain")
 
 
+def require_admin(current_user: User):
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Access only for admins")
+
+
+@router.get("/log-entries")
+def list_scrape_log_entries(
+    asin: Optional[str] = None,
+    warning_type: Optional[str] = None,
+    kind: Optional[Literal["fail", "warning"]] = None,
+    run: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=500),
+    before_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Fehler und Warnungen der Scraper-Läufe, gefiltert und neueste zuerst.
+    Nächste Seite: `before_id` = `next_cursor` der vorherigen Antwort.
+    """
+    require_admin(current_user)
+    return query_scrape_log_entries(
+        db, limit=limit, before_id=before_id,
+        asin=asin, warning_type=warning_type, kind=kind, run=run, start=start, end=end,
+    )
+
+
+@router.get("/log-entries/summary")
+def get_scrape_log_summary(
+    run: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Anzahl Fehler und Warnungen je Typ"""
+    require_admin(current_user)
+    return summarize_scrape_log_entries(db, run=run, start=start, end=end)
+
+
+@router.get("/log-runs")
+def list_scrape_log_runs(
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Läufe mit Einträgen, neueste zuerst"""
+    require_admin(current_user)
+    return list_scrape_runs(db, limit=limit)
+
+
+@router.get("/runs")
+def list_scrape_run_history(
+    scraper: Optional[Literal["products", "markets"]] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Kennzahlen der letzten Orchestrator-Läufe, neueste zuerst"""
+    require_admin(current_user)
+    return list_runs(db, scraper=scraper, limit=limit)
+
+
+@router.get("/runs/chart")
+def get_scrape_run_chart(
+    scraper: Literal["products", "markets"] = "products",
+    days: int = Query(90, ge=1, le=3650),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Dauer und Seiten/Minute pro Lauf im Zeitverlauf, mit Vergleichsbasis und Regressions-Markierung"""
+    require_admin(current_user)
+    return {
+        "scraper": scraper,
+        "baseline_runs": BASELINE_RUNS,
+        "regression_tolerance": REGRESSION_TOLERANCE,
+        "points": run_chart(db, scraper, days=days),
+    }
+
+
+@router.get("/runs/{run}")
+def get_scrape_run(run: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Ein Lauf inklusive Warnungen nach Typ, Seiten-Ergebnissen und Phasen-Timings"""
+    require_admin(current_user)
+    scrape_run = get_run(db, run)
+    if not scrape_run:
+        raise HTTPException(status_code=404, detail="Lauf nicht gefunden")
+    return scrape_run
+
+
+@router.get("/throttle")
+def get_throttle_stats(current_user: User = Depends(get_current_user)):
+    """Gibt den aktuellen Zustand des adaptiven Scraping-Reglers zurück"""
+    require_admin(current_user)
+    return throttle.stats()
+
+
+def profiling_status():
+    return {
+        "enabled": profiling_enabled(),
+        "env_default": profiling_from_env(),
+        "interval_ms": PROFILE_INTERVAL_MS,
+    }
+
+
+@router.get("/profiling")
+def get_profiling(current_user: User = Depends(get_current_user)):
+    """Ob die nächsten Orchestrator-Läufe mit Sampling-Profiler laufen"""
+    require_admin(current_user)
+    return profiling_status()
+
+
+@router.put("/profiling")
+def update_profiling(
+    enabled: Optional[bool] = Body(None, embed=True), current_user: User = Depends(get_current_user)
+):
+    """
+    Schaltet den Sampling-Profiler für alle folgenden Läufe dieses Prozesses ein oder aus;
+    `null` (oder weglassen) stellt wieder auf SCRAPER_PROFILE zurück. Profile erscheinen unter /scraping/logs.
+    """
+    require_admin(current_user)
+    set_profiling(enabled)
+    return profiling_status()
+
+
 @router.post("/test-asin")
-async def test_single_asin(
+def test_single_asin(
     background_tasks: BackgroundTasks,
     asin: str = Body(..., embed=True), current_user: User = Depends(get_current_user)
 ):
@@ -9,7 +9,7 @@ from sqlalchemy.orm import Session
 router = APIRouter()
 
 @router.get("/insights/{cluster_id}")
-async def get_user_products_insights(
+def get_user_products_insights(
     cluster_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -71,7 +71,7 @@ async def get_user_products_insights(
 
 ## ADD PRODUCT TO USERPRODUCTS
 @router.post("/{asin}")
-async def add_my_product(asin: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def add_my_product(asin: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     existing_product = db.query(Product).filter(Product.asin == asin).first()
     if not existing_product:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -88,7 +88,7 @@ async def add_my_product(asin: str, db: Session = Depends(get_db), current_user:
 
 ## REMOVE PRODUCT FROM USERPRODUCTS
 @router.delete("/{asin}")
-async def remove_my_product(asin: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def remove_my_product(asin: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     entry = db.query(UserProduct).filter(UserProduct.user_id == current_user.id, UserProduct.asin == asin).first()
     if not entry:
         raise HTTPException(status_code=404, detail="Product not in My Products")
@@ -100,6 +100,6 @@ async def remove_my_product(asin: str, db: Session = Depends(get_db), current_us
 
 ## GET ALL USER PRODUCTS
 @router.get("/")
-async def get_my_products(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_my_products(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     products = db.query(UserProduct).filter(UserProduct.user_id == current_user.id).all()
     return [entry.asin for entry in products]
@@ -3,7 +3,8 @@ import os  # 📌 Fehlender Import
 from datetime import datetime, timezone
 
 from app.auth import (authenticate_user, create_access_token, generate_verification_token, get_current_user, get_expiration_time,
-                      get_password_hash, is_admin)
+                      get_password_hash, hash_password, invalidate_cached_user, is_admin)
+from app.credits import apply_credit_change, user_exists
 from app.database import get_db
 from app.models import User
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -11,6 +12,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from fastapi_mail import ConnectionConfig, FastMail, MessageSchema
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
 
@@ -33,15 +35,23 @@ MAIL_CONFIG = ConnectionConfig(
     MAIL_SSL_TLS=False,  # ✅ Erforderlich für neue `fastapi-mail` Version
 )
 
+def find_existing_user(db: Session, username: str, email: str):
+    return db.query(User).filter((User.username == username) | (User.email == email)).first()
+
+
+def save_user(db: Session, user: User) -> None:
+    db.add(user)
+    db.commit()
+
+
 # 📌 Registrierung mit E-Mail-Verifikation
+# async, damit bcrypt im Passwort-Pool läuft; die DB-Arbeit geht weiter über den Threadpool
 @router.post("/register")
 async def register(user: UserCreate, db: Session = Depends(get_db)):
     if user.password != user.password_repeat:
         raise HTTPException(status_code=400, detail="Passwörter stimmen nicht überein.")
 
-    existing_user = db.query(User).filter(
-        (User.username == user.username) | (User.email == user.email)
-    ).first()
+    existing_user = await run_in_threadpool(find_existing_user, db, user.username, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Benutzername oder E-Mail bereits vergeben.")
 
@@ -51,13 +61,12 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     new_user = User(
         username=user.username,
         email=user.email,
-        hashed_password=get_password_hash(user.password),
+        hashed_password=await hash_password(user.password),
         is_verified=False,
         verification_token=verification_token,
         verification_token_expires=expiration_time,
     )
-    db.add(new_user)
-    db.commit()
+    await run_in_threadpool(save_user, db, new_user)
 
     # 📌 Hier kommt der Mock! Statt E-Mail wird der Link im API-Response zurückgegeben
     verification_link = f"http://localhost:5173/verify/{verification_token}"
@@ -118,6 +127,7 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     user.verification_token = None
     user.verification_token_expires = None  # Ablaufzeit zurücksetzen
     db.commit()
+    invalidate_cached_user(user.id)
 
     print(f"✅ Benutzer {user.username} ({user.email}) erfolgreich verifiziert!")  # Debug-Info
 
@@ -129,8 +139,8 @@ def verify_email(token: str, db: Session = Depends(get_db)):
 
 # 📌 Token-Generierung (Login)
 @router.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user or not user.is_verified:  # 📌 Benutzer muss verifiziert sein!
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -169,7 +179,7 @@ def create_user_admin(user: UserCreateRequest, db: Session = Depends(get_db), ad
     if user.username == "" or user.email == "" or user.password == "":
         raise HTTPException(status_code=400, detail="Mindestens ein Feld ist leer")
 
-    existing_user = db.query(User).filter((User.username == user.username) | (User.email == user.email)).first()
+    existing_user = find_existing_user(db, user.username, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Benutzername oder E-Mail bereits vergeben.")
 
@@ -198,6 +208,7 @@ def delete_user_admin(user_id: int, db: Session = Depends(get_db), admin: User =
 
     db.delete(user)
     db.commit()
+    invalidate_cached_user(user_id)
     return {"message": f"Benutzer {user.username} wurde gelöscht."}
 
 @router.get("/admin/all-users")
@@ -209,14 +220,14 @@ def get_all_users(db: Session = Depends(get_db), admin: User = Depends(get_curre
     return [{"id": user.id, "username": user.username, "email": user.email} for user in users]
 
 @router.get("/get-credits")
-async def get_credits(
+def get_credits(
     current_user: User = Depends(get_current_user)
 ):
     """Gibt die aktuellen Credits des Users zurück."""
     return {"username": current_user.username, "credits": current_user.credits}
 
 @router.post("/add-credits")
-async def add_credits(
+def add_credits(
     amount: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -227,16 +238,15 @@ async def add_credits(
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Die Anzahl der Credits muss positiv sein.")
 
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
+    new_credits = apply_credit_change(db, current_user.id, amount, "add")
+    if new_credits is None:
         raise HTTPException(status_code=404, detail="User nicht gefunden!")
 
-    user.credits += amount
-    db.commit()
-    return {"success": True, "message": f"{amount} Credits wurden hinzugefügt!", "new_credits": user.credits}
+    invalidate_cached_user(current_user.id)
+    return {"success": True, "message": f"{amount} Credits wurden hinzugefügt!", "new_credits": new_credits}
 
 @router.post("/reduce-credits")
-async def reduce_credits(
+def reduce_credits(
     amount: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -247,16 +257,15 @@ async def reduce_credits(
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Die Anzahl der Credits muss positiv sein.")
 
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User nicht gefunden!")
-
-    if user.credits < amount:
+    # Prüfen und Abbuchen in einem Statement – parallele Requests können nicht überziehen
+    remaining_credits = apply_credit_change(db, current_user.id, -amount, "reduce")
+    if remaining_credits is None:
+        if not user_exists(db, current_user.id):
+            raise HTTPException(status_code=404, detail="User nicht gefunden!")
         return {"success": False, "message": "Nicht genügend Credits!"}
 
-    user.credits -= amount
-    db.commit()
-    return {"success": True, "message": f"{amount} Credits wurden abgezogen!", "remaining_credits": user.credits}
+    invalidate_cached_user(current_user.id)
+    return {"success": True, "message": f"{amount} Credits wurden abgezogen!", "remaining_credits": remaining_credits}
 
 @router.post("/admin/add-credits/{user_id}")
 def add_credits(user_id: int, amount: dict, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -264,10 +273,11 @@ def add_credits(user_id: int, amount: dict, db: Session = Depends(get_db), curre
     if not is_admin(current_user):
         raise HTTPException(status_code=403, detail="Nur Admins können Credits hinzufügen.")
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Benutzer nicht gefunden.")
+    new_credits = apply_credit_change(db, user_id, amount["amount"], "admin_add", actor_id=current_user.id)
+    if new_credits is None:
+        if not user_exists(db, user_id):
+            raise HTTPException(status_code=404, detail="Benutzer nicht gefunden.")
+        raise HTTPException(status_code=400, detail="Nicht genügend Credits!")
 
-    user.credits += amount["amount"]
-    db.commit()
+    invalidate_cached_user(user_id)
     return {"success": True, "message": f"{amount['amount']} Credits hinzugefügt!"}
@@ -0,0 +1,207 @@
+"""
+Fehler und Warnungen der Scraper-Läufe als indizierte Tabelle `scrape_log_entries`.
+
+Der Product-Orchestrator schreibt sie am Ende jedes Laufs gebündelt in die DB (zusätzlich zu den
+fails-/warnings-Textdateien). Die Admin-Routen filtern nach ASIN, Warnungstyp, Lauf und Zeitraum
+und blättern per Keyset über die id – ohne Multi-Megabyte-Dateien herunterzuladen.
+
+Bestehende Textdateien einmalig übernehmen (im backend-Ordner):
+python -m app.scrape_logs --import-files scraper/logs
+"""
+import argparse
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from app.bulk_ops import chunked
+from app.models import ScrapeLogEntry
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+DEFAULT_PAGE_SIZE = 100
+ENTRY_COLUMNS = ("id", "run", "kind", "asin", "warning_type", "message", "context", "location", "url", "created_at")
+
+
+def fail_rows(run: str, failed_products: Iterable[dict], created_at: Optional[datetime] = None) -> List[dict]:
+    created_at = created_at or datetime.now(timezone.utc)
+    return [
+        {
+            "run": run,
+            "kind": "fail",
+            "asin": fail.get("asin"),
+            "warning_type": None,
+            "message": ", ".join(fail.get("missing", [])),
+            "context": fail.get("context"),
+            "location": None,
+            "url": fail.get("url"),
+            "created_at": created_at,
+        }
+        for fail in failed_products
+    ]
+
+
+def warning_rows(run: str, warnings: Iterable[dict], created_at: Optional[datetime] = None) -> List[dict]:
+    created_at = created_at or datetime.now(timezone.utc)
+    return [
+        {
+            "run": run,
+            "kind": "warning",
+            "asin": warning.get("asin"),
+            "warning_type": warning.get("type"),
+            "message": (warning.get("message") or "").strip(),
+            "context": None,
+            "location": warning.get("location"),
+            "url": warning.get("url"),
+            "created_at": created_at,
+        }
+        for warning in warnings
+    ]
+
+
+def record_scrape_log_entries(db: Session, rows: List[dict]) -> int:
+    """Bulk-INSERT; der Aufrufer committet."""
+    for chunk in chunked(rows):
+        db.execute(insert(ScrapeLogEntry), chunk)
+    return len(rows)
+
+
+def filter_entries(query, asin: Optional[str] = None, warning_type: Optional[str] = None,
+                   kind: Optional[str] = None, run: Optional[str] = None,
+                   start: Optional[date] = None, end: Optional[date] = None):
+    if asin:
+        query = query.where(ScrapeLogEntry.asin == asin)
+    if warning_type:
+        query = query.where(ScrapeLogEntry.warning_type == warning_type)
+    if kind:
+        query = query.where(ScrapeLogEntry.kind == kind)
+    if run:
+        query = query.where(ScrapeLogEntry.run == run)
+    if start:
+        query = query.where(ScrapeLogEntry.created_at >= datetime.combine(start, time.min))
+    if end:
+        query = query.where(ScrapeLogEntry.created_at < datetime.combine(end + timedelta(days=1), time.min))
+    return query
+
+
+def query_scrape_log_entries(db: Session, limit: int = DEFAULT_PAGE_SIZE, before_id: Optional[int] = None,
+                             **filters) -> dict:
+    """Neueste Einträge zuerst; `next_cursor` ist die id, ab der die nächste Seite beginnt."""
+    columns = [getattr(ScrapeLogEntry, name) for name in ENTRY_COLUMNS]
+    query = filter_entries(select(*columns), **filters)
+    if before_id is not None:
+        query = query.where(ScrapeLogEntry.id < before_id)
+
+    # Eine Zeile mehr laden, um zu wissen, ob es eine nächste Seite gibt
+    rows = db.execute(query.order_by(ScrapeLogEntry.id.desc()).limit(limit + 1)).all()
+    items = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def summarize_scrape_log_entries(db: Session, **filters) -> List[dict]:
+    """Anzahl Einträge je Art und Warnungstyp, z.B. für die Übersicht eines Laufs."""
+    query = filter_entries(
+        select(ScrapeLogEntry.kind, ScrapeLogEntry.warning_type, func.count(ScrapeLogEntry.id).label("count")),
+        **filters
+    ).group_by(ScrapeLogEntry.kind, ScrapeLogEntry.warning_type).order_by(func.count(ScrapeLogEntry.id).desc())
+    return [dict(row._mapping) for row in db.execute(query)]
+
+
+def list_scrape_runs(db: Session, limit: int = 50) -> List[dict]:
+    query = (
+        select(
+            ScrapeLogEntry.run,
+            func.min(ScrapeLogEntry.created_at).label("created_at"),
+            func.count(ScrapeLogEntry.id).label("entries"),
+        )
+        .group_by(ScrapeLogEntry.run)
+        .order_by(func.max(ScrapeLogEntry.id).desc())
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in db.execute(query)]
+
+
+# 📥 Import der bisherigen fails-/warnings-Textdateien
+REPORT_FIELDS = {
+    "🧾 ASIN:": "asin",
+    "🔗 URL:": "url",
+    "🚫 Grund:": "missing",
+    "⚠️ Kontext:": "context",
+    "⚠️ Fehler:": "message",
+    "📍 Location:": "location",
+    "🔖 Typ:": "type",
+}
+REPORT_FILE_PATTERN = re.compile(r"^(fails|warnings)-(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.txt$")
+
+
+def parse_report_file(path: Path) -> List[dict]:
+    """Liest die Einträge (ASIN, URL, Grund/Fehler, ...) aus einem fails- oder warnings-Bericht."""
+    entries = []
+    current = None
+    last_field = None
+    for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        if line.startswith("🧾 ASIN:"):
+            current = {}
+            entries.append(current)
+        if current is None:
+            continue
+        if line.startswith("-" * 20):
+            current, last_field = None, None
+            continue
+
+        for prefix, field in REPORT_FIELDS.items():
+            if line.startswith(prefix):
+                current[field] = line[len(prefix):].strip()
+                last_field = field
+                break
+        else:
+            if last_field and line.strip():
+                current[last_field] += "\n" + line.strip()
+
+    for entry in entries:
+        if "missing" in entry:
+            entry["missing"] = [entry["missing"]]
+    return entries
+
+
+def import_report_files(db: Session, logs_dir: Path) -> int:
+    """Übernimmt alle Berichte, deren Lauf noch nicht in der Tabelle steht; gibt die Anzahl Zeilen zurück."""
+    known = set(db.execute(select(ScrapeLogEntry.run, ScrapeLogEntry.kind).distinct()).all())
+    imported = 0
+    for path in sorted(Path(logs_dir).glob("*.txt")):
+        match = REPORT_FILE_PATTERN.match(path.name)
+        if not match:
+            continue
+        report_type, timestamp = match.groups()
+        run = f"products-{timestamp}"
+        kind = "fail" if report_type == "fails" else "warning"
+        if (run, kind) in known:
+            continue
+
+        created_at = datetime.strptime(timestamp, "%Y-%m-%d_%H-%M-%S")
+        entries = parse_report_file(path)
+        rows = fail_rows(run, entries, created_at) if kind == "fail" else warning_rows(run, entries, created_at)
+        imported += record_scrape_log_entries(db, rows)
+        db.commit()
+        print(f"📥 {len(rows)} Einträge aus {path.name} übernommen")
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Übernimmt fails-/warnings-Berichte in scrape_log_entries")
+    parser.add_argument("--import-files", default="scraper/logs", help="Ordner mit den Textberichten")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        imported = import_report_files(db, Path(args.import_files))
+    finally:
+        db.close()
+    print(f"✅ {imported} Log-Einträge importiert")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Lauf-Historie der Orchestratoren in `scrape_runs`.
+
+Jeder Product- und Market-Lauf speichert am Ende seine Kennzahlen (Dauer, Erfolge/Fehler,
+Seiten pro Minute, Warnungen, Phasen-Timings). Der Chart-Endpoint vergleicht jeden Lauf mit dem
+Median der vorherigen Läufe – so fällt ein Einbruch im Durchsatz nach einer Scraper-Änderung auf.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from typing import List, Optional
+
+from app.database import SessionLocal
+from app.metrics import db_write_seconds
+from app.models import ScrapeRun
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+# Anzahl vorheriger Läufe für die Vergleichsbasis und erlaubter Einbruch gegenüber deren Median
+BASELINE_RUNS = 10
+REGRESSION_TOLERANCE = 0.2
+
+RUN_LIST_COLUMNS = (
+    "id", "run", "scraper", "cluster_id", "status", "started_at", "finished_at", "duration_s",
+    "items_total", "items_succeeded", "items_failed", "items_skipped", "pages_fetched",
+    "pages_per_minute", "avg_item_seconds", "warning_count",
+)
+
+
+def build_scrape_run(run: str, scraper: str, started: float, finished: float, pages_fetched: int,
+                     **fields) -> ScrapeRun:
+    """`started`/`finished` als time.time()-Werte; Durchsatz und Warnungsanzahl werden hier abgeleitet."""
+    duration_s = max(finished - started, 0.0)
+    warning_counts = fields.pop("warning_counts", None) or {}
+    return ScrapeRun(
+        run=run,
+        scraper=scraper,
+        started_at=datetime.fromtimestamp(started, timezone.utc),
+        finished_at=datetime.fromtimestamp(finished, timezone.utc),
+        duration_s=round(duration_s, 3),
+        pages_fetched=pages_fetched,
+        pages_per_minute=round(pages_fetched / duration_s * 60, 2) if duration_s else None,
+        warning_count=sum(warning_counts.values()),
+        warning_counts=warning_counts,
+        **fields,
+    )
+
+
+def save_scrape_run(run: str, scraper: str, started: float, finished: float, pages_fetched: int, **fields) -> None:
+    """Speichert den Lauf in einer eigenen Session – ein Fehler hier darf den Scraper nie abbrechen."""
+    db = SessionLocal()
+    try:
+        with db_write_seconds.time(operation="scrape_run"):
+            db.add(build_scrape_run(run, scraper, started, finished, pages_fetched, **fields))
+            db.commit()
+        logging.info(f"🗂️ Lauf {run} in scrape_runs gespeichert")
+    except Exception as e:
+        db.rollback()
+        logging.error(f"❌ Lauf {run} konnte nicht gespeichert werden: {e}")
+    finally:
+        db.close()
+
+
+def list_runs(db: Session, scraper: Optional[str] = None, limit: int = 50) -> List[dict]:
+    query = select(*[getattr(ScrapeRun, name) for name in RUN_LIST_COLUMNS])
+    if scraper:
+        query = query.where(ScrapeRun.scraper == scraper)
+    rows = db.execute(query.order_by(ScrapeRun.started_at.desc()).limit(limit))
+    return [dict(row._mapping) for row in rows]
+
+
+def get_run(db: Session, run: str) -> Optional[dict]:
+    row = db.execute(select(ScrapeRun.__table__).where(ScrapeRun.run == run)).first()
+    return dict(row._mapping) if row else None
+
+
+def run_chart(db: Session, scraper: str, days: int = 90) -> List[dict]:
+    """
+    Dauer und Seiten/Minute je Lauf, älteste zuerst. `baseline_pages_per_minute` ist der Median der
+    bis zu BASELINE_RUNS vorherigen abgeschlossenen Läufe; `regression` markiert deutliche Einbrüche.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    rows = db.execute(
+        select(ScrapeRun.run, ScrapeRun.status, ScrapeRun.started_at, ScrapeRun.duration_s,
+               ScrapeRun.pages_fetched, ScrapeRun.pages_per_minute, ScrapeRun.items_succeeded,
+               ScrapeRun.items_failed)
+        .where(ScrapeRun.scraper == scraper, ScrapeRun.started_at >= since.replace(tzinfo=None))
+        .order_by(ScrapeRun.started_at)
+    ).all()
+
+    points = []
+    history = []
+    for row in rows:
+        point = dict(row._mapping)
+        baseline = median(history[-BASELINE_RUNS:]) if history else None
+        point["baseline_pages_per_minute"] = baseline
+        point["regression"] = bool(
+            baseline and point["pages_per_minute"] is not None
+            and point["pages_per_minute"] < baseline * (1 - REGRESSION_TOLERANCE)
+        )
+        points.append(point)
+        # Abgebrochene oder leere Läufe verfälschen die Vergleichsbasis nicht
+        if row.status == "done" and row.pages_fetched and row.pages_per_minute is not None:
+            history.append(row.pages_per_minute)
+    return points
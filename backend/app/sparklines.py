@@ -0,0 +1,138 @@
+"""
+Gebündelte Sparkline-Berechnung für viele ASINs: ein Bereichs-Query statt eines Queries pro
+Produkt und Feld, danach ein Füll-Durchlauf pro ASIN, der alle Felder gleichzeitig befüllt.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from app.bulk_ops import chunked
+from app.models import ProductChange
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+SPARKLINE_FIELDS = ["price", "main_category_rank", "second_category_rank", "rating", "review_count", "blm", "total"]
+SPARKLINE_DAYS = 30
+
+
+def get_sparkline_data_for_asins(asins: List[str], fields: List[str], db: Session) -> Dict[str, Dict[str, list]]:
+    """
+    Sparklines (max. 30 Tage ab dem ersten Change, Lücken mit dem letzten gültigen Wert gefüllt)
+    für viele ASINs und Felder: ein MIN-Query für die Startdaten, ein Bereichs-Query für alle
+    Changes, ein Füll-Durchlauf pro ASIN.
+    """
+    asins = list(dict.fromkeys(asins))
+    result = {asin: {field: [] for field in fields} for asin in asins}
+    if not asins or not fields:
+        return result
+
+    today = datetime.now().date()
+
+    first_change_dates = {}
+    for chunk in chunked(asins):
+        first_change_dates.update(
+            db.query(ProductChange.asin, func.min(ProductChange.change_date))
+            .filter(ProductChange.asin.in_(chunk))
+            .group_by(ProductChange.asin)
+            .all()
+        )
+
+    # Pro ASIN: Starttag und Anzahl Tage seit dem ersten Change (max. 30)
+    windows = {}
+    for asin, first_change in first_change_dates.items():
+        if first_change is None:
+            continue
+        first_day = first_change.date()
+        num_days = min((today - first_day).days, SPARKLINE_DAYS)
+        if num_days > 0:
+            windows[asin] = (first_day, num_days)
+
+    if not windows:
+        return result
+
+    range_end = max(first_day + timedelta(days=num_days) for first_day, num_days in windows.values())
+    columns = [getattr(ProductChange, field) for field in fields]
+
+    changes_by_asin = defaultdict(list)
+    for chunk in chunked(list(windows)):
+        rows = (
+            db.query(ProductChange.asin, ProductChange.change_date, *columns)
+            .filter(
+                ProductChange.asin.in_(chunk),
+                ProductChange.change_date < datetime.combine(range_end, datetime.min.time())
+            )
+            .order_by(ProductChange.asin, ProductChange.change_date, ProductChange.id)
+        )
+        for row in rows:
+            changes_by_asin[row[0]].append(row)
+
+    for asin, (first_day, num_days) in windows.items():
+        result[asin] = fill_sparklines(changes_by_asin[asin], fields, first_day, num_days)
+    return result
+
+
+def fill_sparklines(changes, fields: List[str], first_day, num_days: int) -> Dict[str, list]:
+    """Füllt alle Felder in einem Durchlauf über die Tage mit dem letzten gültigen Wert auf"""
+    series = {field: [None] * num_days for field in fields}
+    last_valid_values = [None] * len(fields)
+    change_index = 0
+
+    for i in range(num_days):
+        day = first_day + timedelta(days=i)
+        while change_index < len(changes) and changes[change_index][1].date() <= day:
+            for position, value in enumerate(changes[change_index][2:]):
+                if value is not None:
+                    last_valid_values[position] = value
+            change_index += 1
+
+        for position, field in enumerate(fields):
+            series[field][i] = last_valid_values[position]
+
+    return series
+
+
+def get_sparkline_grid_data_for_asins(asins: List[str], fields: List[str], db: Session,
+                                      days: int = SPARKLINE_DAYS) -> Dict[str, Dict[str, list]]:
+    """
+    Grid-Sparklines wie /get-sparkline-grid-data, aber für viele ASINs und Felder:
+    Tage ab dem ersten Change der letzten `days` Tage bis heute, pro Tag zählt der letzte Change,
+    Lücken werden mit dem Vortageswert gefüllt, fehlende Werte sind 0.
+    """
+    asins = list(dict.fromkeys(asins))
+    result = {asin: {field: [] for field in fields} for asin in asins}
+    if not asins or not fields:
+        return result
+
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+    today = datetime.now(timezone.utc).date()
+    columns = [getattr(ProductChange, field) for field in fields]
+
+    # Pro ASIN und Tag gewinnt der letzte Change des Tages
+    changes_by_day = defaultdict(dict)
+    for chunk in chunked(asins):
+        rows = (
+            db.query(ProductChange.asin, ProductChange.change_date, *columns)
+            .filter(
+                ProductChange.asin.in_(chunk),
+                ProductChange.change_date.isnot(None),
+                ProductChange.change_date >= cutoff_date
+            )
+            .order_by(ProductChange.asin, ProductChange.change_date, ProductChange.id)
+        )
+        for row in rows:
+            changes_by_day[row[0]][row[1].date()] = row[2:]
+
+    for asin, day_values in changes_by_day.items():
+        series = {field: [] for field in fields}
+        last_values = [None] * len(fields)
+        day = min(day_values)
+        while day <= today:
+            if day in day_values:
+                last_values = list(day_values[day])
+            for position, field in enumerate(fields):
+                value = last_values[position]
+                series[field].append(value if value is not None else 0)
+            day += timedelta(days=1)
+        result[asin] = series
+
+    return result
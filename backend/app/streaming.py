@@ -0,0 +1,40 @@
+"""
+Streaming-Antworten für große Verläufe (ProductChanges, Cluster-Details).
+
+Die Generatoren öffnen eine eigene Session, weil die Request-Session beim Streamen bereits
+geschlossen sein kann, und lesen per `yield_per` – der Speicherbedarf bleibt flach und das erste
+Byte geht raus, bevor die letzte Zeile gelesen ist.
+"""
+import json
+from typing import Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_FORMATS = ("ndjson", "array")
+STREAM_BATCH_SIZE = 500
+
+
+def dump_line(item) -> str:
+    return json.dumps(item, ensure_ascii=False, default=str)
+
+
+def iter_ndjson(items: Iterable) -> Iterator[str]:
+    for item in items:
+        yield dump_line(item) + "\n"
+
+
+def iter_json_array(items: Iterable) -> Iterator[str]:
+    """Gibt ein normales JSON-Array aus, aber stückweise (chunked transfer encoding)."""
+    yield "["
+    first = True
+    for item in items:
+        yield dump_line(item) if first else "," + dump_line(item)
+        first = False
+    yield "]"
+
+
+def streaming_json_response(items: Iterable, stream_format: str = "ndjson") -> StreamingResponse:
+    if stream_format == "array":
+        return StreamingResponse(iter_json_array(items), media_type="application/json")
+    return StreamingResponse(iter_ndjson(items), media_type=NDJSON_MEDIA_TYPE)
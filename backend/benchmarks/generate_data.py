@@ -0,0 +1,306 @@
+"""
+Synthetische Testdatenbank für Lasttests und Skalierungsmessungen.
+
+Erzeugt Nutzer, Cluster, Märkte und Produkte samt N Tagen Historie, wie sie die Orchestratoren
+schreiben würden: ProductChange nur an Tagen mit Änderung (Rang fast täglich, Preis selten,
+Reviews gelegentlich), pro Markt täglich ein MarketChange mit Snapshot der ersten Seite,
+hinzugekommenen/entfernten ASINs und Top-Suchvorschlägen. Alles per Bulk-INSERT und
+deterministisch über `--seed`.
+
+Start (im backend-Ordner):
+python -m benchmarks.generate_data --database-url sqlite:///bench.db --profile medium
+DATABASE_URL=sqlite:///bench.db python -m uvicorn app.main:app --port 9000
+python -m benchmarks.load_test --scenario mixed --user-count 5
+
+Login: admin/admin sowie bench1..benchN mit Passwort "bench".
+"""
+import argparse
+import math
+import random
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from app.auth import get_password_hash
+from app.bulk_ops import insert_association_rows
+from app.models import (Base, Market, MarketChange, MarketChangeAsin, MarketChangeSuggestion,
+                        MarketCluster, Product, ProductChange, User, market_change_products,
+                        market_cluster_markets, market_products)
+from sqlalchemy import create_engine, event, insert, inspect
+from sqlalchemy.orm import Session
+
+PROFILES = {
+    "small": dict(users=2, clusters_per_user=2, markets_per_cluster=3, products_per_market=50, days=30),
+    "medium": dict(users=5, clusters_per_user=4, markets_per_cluster=5, products_per_market=100, days=90),
+    "large": dict(users=10, clusters_per_user=5, markets_per_cluster=6, products_per_market=150, days=180),
+}
+
+# Wahrscheinlichkeit pro Produkt und Tag
+RANK_CHANGE_RATE = 0.7
+PRICE_CHANGE_RATE = 0.06
+REVIEW_CHANGE_RATE = 0.3
+RATING_CHANGE_RATE = 0.03
+# Anteil der ersten Seite, der pro Tag ausgetauscht wird, und Wechselrate der Suchvorschläge
+MARKET_CHURN = 0.03
+SUGGESTION_CHANGE_RATE = 0.1
+SUGGESTIONS_PER_MARKET = 5
+
+INSERT_BATCH_SIZE = 5000
+BENCH_PASSWORD = "bench"
+
+KEYWORD_WORDS = (
+    "bamboo", "steel", "silicone", "kids", "travel", "garden", "kitchen", "yoga", "camping", "pet",
+    "wireless", "organic", "portable", "vintage", "magnetic", "foldable", "led", "ceramic", "wooden",
+)
+KEYWORD_NOUNS = (
+    "cutting board", "water bottle", "lunch box", "desk lamp", "storage bin", "dog bowl", "mat",
+    "organizer", "phone stand", "spice rack", "plant pot", "backpack", "shelf", "knife set",
+)
+CATEGORIES = ("Home & Kitchen", "Sports & Outdoors", "Pet Supplies", "Office Products", "Toys & Games")
+
+
+def update_revenue(state: dict) -> None:
+    # Verkäufe/Monat grob aus dem Rang, Umsatz daraus
+    state["blm"] = max(0, int(30_000 / state["main_category_rank"] ** 0.75))
+    state["total"] = round(state["blm"] * state["price"], 2)
+
+
+def new_product_state(asin: str, rng: random.Random) -> dict:
+    state = {
+        "title": f"Produkt {asin}",
+        "price": round(math.exp(rng.uniform(math.log(8), math.log(90))), 2),
+        "main_category": rng.choice(CATEGORIES),
+        "main_category_rank": int(math.exp(rng.uniform(math.log(50), math.log(200_000)))),
+        "review_count": rng.randint(0, 5000),
+        "rating": round(rng.uniform(3.4, 4.9), 1),
+        "store": f"Brand {rng.randint(1, 400)}",
+        "img_path": f"https://m.media-amazon.com/images/I/{asin}.jpg",
+    }
+    update_revenue(state)
+    return state
+
+
+def advance_product_state(state: dict, rng: random.Random) -> None:
+    """Ein Tag weiter – auch vom Orchestrator-Benchmark für die synthetischen Produktseiten genutzt."""
+    if rng.random() < RANK_CHANGE_RATE:
+        state["main_category_rank"] = max(1, int(state["main_category_rank"] * rng.lognormvariate(0, 0.15)))
+    if rng.random() < PRICE_CHANGE_RATE:
+        state["price"] = round(state["price"] * rng.uniform(0.85, 1.15), 2)
+    if rng.random() < REVIEW_CHANGE_RATE:
+        state["review_count"] += rng.randint(1, 25)
+    if rng.random() < RATING_CHANGE_RATE:
+        state["rating"] = round(min(5.0, max(1.0, state["rating"] + rng.choice((-0.1, 0.1)))), 1)
+    update_revenue(state)
+
+
+class Generator:
+    def __init__(self, session: Session, rng: random.Random, days: int, products_per_market: int, overlap: float):
+        self.session = session
+        self.rng = rng
+        self.days = days
+        self.products_per_market = products_per_market
+        self.overlap = overlap
+        self.start = datetime.now(timezone.utc).replace(hour=6, minute=0, second=0, microsecond=0) \
+            - timedelta(days=days)
+        self.asin_counter = 0
+        # asin -> [erster Tag, letzter Tag] in irgendeinem Markt
+        self.active_days = {}
+        self.totals = {}
+        self.counts = {}
+
+    def day(self, index: int) -> datetime:
+        return self.start + timedelta(days=index, minutes=self.rng.randint(0, 600))
+
+    def new_asin(self) -> str:
+        self.asin_counter += 1
+        return f"B0{self.asin_counter:08d}"
+
+    def flush(self, model_or_table, rows: list) -> None:
+        if not rows:
+            return
+        target = model_or_table.__table__ if hasattr(model_or_table, "__table__") else model_or_table
+        self.counts[target.name] = self.counts.get(target.name, 0) + len(rows)
+        if hasattr(model_or_table, "__table__"):
+            self.session.execute(insert(model_or_table), rows)
+        else:
+            insert_association_rows(self.session, model_or_table, rows)
+        rows.clear()
+
+    # 🧭 Märkte: Snapshot der ersten Seite, täglich leicht durchmischt
+    def simulate_market(self, pool: list) -> list:
+        """Liefert pro Tag (snapshot, added, removed); neue ASINs bekommen einen Aktivitätszeitraum."""
+        shared = [asin for asin in pool if self.rng.random() < self.overlap][:self.products_per_market]
+        snapshot = shared + [self.new_asin() for _ in range(self.products_per_market - len(shared))]
+        history = [(list(snapshot), list(snapshot), [])]
+        current = list(snapshot)
+        for day_index in range(1, self.days):
+            churn = sum(self.rng.random() < MARKET_CHURN for _ in current)
+            removed = self.rng.sample(current, churn)
+            added = [self.new_asin() for _ in range(churn)]
+            removed_set = set(removed)
+            current = [asin for asin in current if asin not in removed_set] + added
+            history.append((list(current), added, removed))
+
+        for day_index, (snapshot, _, _) in enumerate(history):
+            for asin in snapshot:
+                first, last = self.active_days.get(asin, (day_index, day_index))
+                self.active_days[asin] = (min(first, day_index), max(last, day_index))
+        return history
+
+    # 📦 Produkte: Zustand pro Tag fortschreiben, nur Tage mit Änderung schreiben
+    def generate_products(self) -> None:
+        product_rows = [{"asin": asin, "last_time_scraped": self.day(last)}
+                        for asin, (_, last) in self.active_days.items()]
+        self.flush(Product, product_rows)
+
+        change_rows = []
+        for asin, (first, last) in self.active_days.items():
+            totals = self.totals[asin] = array("f", [0.0]) * (last - first + 1)
+
+            state = new_product_state(asin, self.rng)
+            previous = {}
+            for day_index in range(first, last + 1):
+                if day_index > first:
+                    advance_product_state(state, self.rng)
+                totals[day_index - first] = state["total"]
+
+                changes = [field for field, value in state.items() if previous.get(field) != value]
+                if changes:
+                    change_rows.append({**state, "asin": asin, "change_date": self.day(day_index),
+                                        "changes": ",".join(changes)})
+                    previous = dict(state)
+                if len(change_rows) >= INSERT_BATCH_SIZE:
+                    self.flush(ProductChange, change_rows)
+        self.flush(ProductChange, change_rows)
+
+    def total_on(self, asin: str, day_index: int) -> float:
+        first, _ = self.active_days[asin]
+        return float(self.totals[asin][day_index - first])
+
+    # 📈 MarketChanges mit Umsatz, Snapshot-Verknüpfungen, ASIN-Änderungen und Vorschlägen
+    def write_market_history(self, market_id: int, keyword: str, history: list, change_id: int) -> tuple:
+        change_rows, product_rows, asin_rows, suggestion_rows = [], [], [], []
+        suggestions = [f"{keyword} {word}" for word in self.rng.sample(KEYWORD_WORDS, SUGGESTIONS_PER_MARKET)]
+        revenue = 0.0
+        for day_index, (snapshot, added, removed) in enumerate(history):
+            change_id += 1
+            if day_index and self.rng.random() < SUGGESTION_CHANGE_RATE:
+                suggestions[self.rng.randrange(len(suggestions))] = f"{keyword} {self.rng.choice(KEYWORD_NOUNS)}"
+            revenue = round(sum(self.total_on(asin, day_index) for asin in snapshot), 2)
+            changes = []
+            if added:
+                changes.append(f"Neue Produkte: {', '.join(added)}")
+            if removed:
+                changes.append(f"Entfernte Produkte: {', '.join(removed)}")
+            change_rows.append({"id": change_id, "market_id": market_id, "total_revenue": revenue,
+                                "change_date": self.day(day_index),
+                                "changes": ",".join(changes) or "Kein Total Revenue Change, aber andere Änderungen"})
+            product_rows += [{"market_change_id": change_id, "asin": asin} for asin in snapshot]
+            asin_rows += [{"market_change_id": change_id, "market_id": market_id, "asin": asin, "status": "added"}
+                          for asin in added]
+            asin_rows += [{"market_change_id": change_id, "market_id": market_id, "asin": asin, "status": "removed"}
+                          for asin in removed]
+            suggestion_rows += [{"market_change_id": change_id, "position": position, "suggestion": suggestion}
+                                for position, suggestion in enumerate(suggestions)]
+
+        self.flush(MarketChange, change_rows)
+        self.flush(market_change_products, product_rows)
+        self.flush(MarketChangeAsin, asin_rows)
+        self.flush(MarketChangeSuggestion, suggestion_rows)
+        self.flush(market_products, [{"market_id": market_id, "asin": asin} for asin in history[-1][0]])
+        return change_id, revenue
+
+
+def generate(database_url: str, users: int, clusters_per_user: int, markets_per_cluster: int,
+             products_per_market: int, days: int, seed: int = 42, overlap: float = 0.15) -> dict:
+    engine = create_engine(database_url)
+    if database_url.startswith("sqlite"):
+        @event.listens_for(engine, "connect")
+        def fast_sqlite(dbapi_connection, connection_record):
+            # Nur für die Generierung: Absturzsicherheit ist hier egal, Tempo nicht
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.execute("PRAGMA journal_mode=MEMORY")
+            cursor.close()
+
+    if inspect(engine).has_table("users"):
+        raise SystemExit(f"❌ {database_url} enthält bereits Tabellen – bitte eine neue Datenbank angeben")
+    Base.metadata.create_all(engine)
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    with Session(engine) as session:
+        generator = Generator(session, rng, days, products_per_market, overlap)
+        # Einmal hashen und für alle Bench-Nutzer verwenden – bcrypt pro Nutzer würde Minuten kosten
+        password_hash = get_password_hash(BENCH_PASSWORD)
+        user_rows = [{"id": 1, "username": "admin", "email": "admin@admin.de",
+                      "hashed_password": get_password_hash("admin"), "is_verified": True, "credits": 100}]
+        user_rows += [{"id": index + 1, "username": f"bench{index}", "email": f"bench{index}@example.com",
+                       "hashed_password": password_hash, "is_verified": True, "credits": 100}
+                      for index in range(1, users + 1)]
+        generator.flush(User, user_rows)
+
+        # Märkte simulieren, bevor die Produkte geschrieben werden – erst dann steht fest, wann jede ASIN aktiv ist
+        markets = []
+        cluster_rows, link_rows = [], []
+        cluster_id = market_id = 0
+        for user_id in range(2, users + 2):
+            for _ in range(clusters_per_user):
+                cluster_id += 1
+                cluster_rows.append({"id": cluster_id, "user_id": user_id, "title": f"Cluster {cluster_id}",
+                                     "cluster_type": "dynamic", "is_initial_scraped": True, "total_revenue": 0.0})
+                pool = []
+                for _ in range(markets_per_cluster):
+                    market_id += 1
+                    keyword = f"{rng.choice(KEYWORD_WORDS)} {rng.choice(KEYWORD_NOUNS)} {market_id}"
+                    history = generator.simulate_market(pool)
+                    pool = history[0][0]
+                    markets.append((cluster_id, market_id, keyword, history))
+                    link_rows.append({"market_cluster_id": cluster_id, "market_id": market_id})
+
+        generator.flush(Market, [{"id": market_id, "keyword": keyword, "market_type": "dynamic"}
+                                 for _, market_id, keyword, _ in markets])
+        generator.generate_products()
+
+        change_id = 0
+        cluster_revenue = {}
+        for cluster_id, market_id, keyword, history in markets:
+            change_id, revenue = generator.write_market_history(market_id, keyword, history, change_id)
+            cluster_revenue[cluster_id] = cluster_revenue.get(cluster_id, 0.0) + revenue
+        for row in cluster_rows:
+            row["total_revenue"] = round(cluster_revenue.get(row["id"], 0.0), 2)
+        generator.flush(MarketCluster, cluster_rows)
+        generator.flush(market_cluster_markets, link_rows)
+        session.commit()
+
+    engine.dispose()
+    counts = dict(generator.counts)
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Erzeugt eine synthetische Datenbank für Lasttests")
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--clusters-per-user", type=int)
+    parser.add_argument("--markets-per-cluster", type=int)
+    parser.add_argument("--products-per-market", type=int)
+    parser.add_argument("--days", type=int)
+    parser.add_argument("--overlap", type=float, default=0.15,
+                        help="Anteil der Produkte, die ein Markt mit dem vorherigen Markt im Cluster teilt")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    sizes = {key: getattr(args, key) if getattr(args, key) is not None else value
+             for key, value in PROFILES[args.profile].items()}
+    print(f"🏗️ Erzeuge {args.database_url}: {sizes}")
+    counts = generate(args.database_url, seed=args.seed, overlap=args.overlap, **sizes)
+    print(f"✅ Fertig nach {counts.pop('seconds')}s")
+    for table, count in sorted(counts.items()):
+        print(f"  • {table:<28} {count:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Lasttest für die Dashboard-Routen der API.
+
+Simuliert parallele Nutzer, die je nach Szenario Cluster-Liste und Dashboard (`dashboard`),
+Cluster-Details mit Produktseiten und Sparklines (`browse`) oder Chart-Daten (`charts`) abrufen –
+`mixed` kombiniert alle drei. Gemessen werden pro Route Durchsatz sowie p50/p95/p99-Latenzen.
+Zusätzlich pingt eine Probe ständig `/` an – steigt deren Latenz, blockiert etwas den Event-Loop.
+
+Mit `--user-count N` melden sich bench1..benchN an (siehe benchmarks.generate_data), jeder
+simulierte Nutzer arbeitet auf einem zufälligen Cluster seines Logins.
+
+Start (API muss laufen, im backend-Ordner):
+python -m benchmarks.load_test --base-url http://127.0.0.1:9000 --concurrency 50 --duration 30
+python -m benchmarks.load_test --scenario mixed --user-count 5
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import aiohttp
+
+from scraper.phase_timer import percentile
+
+
+async def login(session, base_url, username, password) -> str:
+    async with session.post(f"{base_url}/users/token", data={"username": username, "password": password}) as response:
+        response.raise_for_status()
+        return (await response.json())["access_token"]
+
+
+async def pick_cluster_id(session, base_url, headers, rng=None):
+    async with session.get(f"{base_url}/market-clusters/", headers=headers) as response:
+        clusters = await response.json()
+    if not clusters:
+        return None
+    return rng.choice(clusters)["id"] if rng else clusters[0]["id"]
+
+
+async def load_cluster_sample(session, base_url, headers, cluster_id, asins_per_request=20):
+    """Markt-IDs und ASINs eines Clusters für die browse-/charts-Routen."""
+    async with session.get(f"{base_url}/market-clusters/{cluster_id}",
+                           params={"include_sparklines": "false"}, headers=headers) as response:
+        response.raise_for_status()
+        details = await response.json()
+    markets = [market for market in details.get("markets", []) if market.get("products")]
+    return {
+        "market_ids": [market["id"] for market in markets],
+        "asins": [product["asin"] for market in markets for product in market["products"][:asins_per_request]],
+    }
+
+
+# Routen als (Label, Pfad) – das Label fasst alle Cluster/Märkte/ASINs einer Route im Report zusammen
+def dashboard_routes(cluster_id):
+    routes = [("/market-clusters/",) * 2, ("/market-clusters/dashboard-overview",) * 2]
+    if cluster_id is not None:
+        routes += [
+            ("/market-clusters/{id}", f"/market-clusters/{cluster_id}"),
+            ("/chartdata/get-stacked-bar-data-for-cluster/{id}",
+             f"/chartdata/get-stacked-bar-data-for-cluster/{cluster_id}"),
+            ("/chartdata/get-sparkline-data-for-market-cluster/{id}",
+             f"/chartdata/get-sparkline-data-for-market-cluster/{cluster_id}"),
+        ]
+    return routes
+
+
+def browse_routes(cluster_id, sample):
+    if cluster_id is None:
+        return []
+    routes = [("/market-clusters/{id}?include_sparklines=false",
+               f"/market-clusters/{cluster_id}?include_sparklines=false")]
+    routes += [("/market-clusters/{id}/markets/{market_id}/products",
+                f"/market-clusters/{cluster_id}/markets/{market_id}/products?limit=20")
+               for market_id in sample["market_ids"]]
+    if sample["asins"]:
+        routes.append(("/market-clusters/{id}/sparklines",
+                       f"/market-clusters/{cluster_id}/sparklines?asins={','.join(sample['asins'][:20])}"))
+    return routes
+
+
+def chart_routes(cluster_id, sample, product_charts=5):
+    if cluster_id is None:
+        return []
+    routes = [
+        ("/chartdata/get-stacked-bar-data-for-cluster/{id}", f"/chartdata/get-stacked-bar-data-for-cluster/{cluster_id}"),
+        ("/chartdata/get-sparkline-data-for-market-cluster/{id}",
+         f"/chartdata/get-sparkline-data-for-market-cluster/{cluster_id}"),
+    ]
+    routes += [("/products/get-product-chart-data/{asin}", f"/products/get-product-chart-data/{asin}")
+               for asin in sample["asins"][:product_charts]]
+    return routes
+
+
+SCENARIOS = {
+    "dashboard": lambda cluster_id, sample: dashboard_routes(cluster_id),
+    "browse": browse_routes,
+    "charts": chart_routes,
+    "mixed": lambda cluster_id, sample: (dashboard_routes(cluster_id) + browse_routes(cluster_id, sample)
+                                         + chart_routes(cluster_id, sample)),
+}
+
+
+async def user_loop(session, base_url, headers, routes, deadline, latencies, errors, offset=0):
+    # Versetzter Start, damit nicht alle Nutzer gleichzeitig dieselbe Route treffen
+    index = offset
+    while time.perf_counter() < deadline:
+        label, route = routes[index % len(routes)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            async with session.get(f"{base_url}{route}", headers=headers) as response:
+                await response.read()
+                if response.status >= 400:
+                    errors[label] += 1
+        except aiohttp.ClientError:
+            errors[label] += 1
+        latencies[label].append(time.perf_counter() - start)
+
+
+async def probe_loop(session, base_url, deadline, latencies, interval=0.1):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        async with session.get(f"{base_url}/") as response:
+            await response.read()
+        latencies["/ (probe)"].append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+
+def print_report(latencies, errors, duration):
+    print(f"\n📊 Ergebnis nach {duration:.1f}s")
+    print(f"{'Route':<60} {'Req':>7} {'RPS':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Err':>5}")
+    for route, values in sorted(latencies.items()):
+        print(
+            f"{route:<60} {len(values):>7} {len(values) / duration:>8.1f} "
+            f"{percentile(values, 50) * 1000:>9.1f} {percentile(values, 95) * 1000:>9.1f} "
+            f"{percentile(values, 99) * 1000:>9.1f} {errors.get(route, 0):>5}"
+        )
+    all_values = [value for values in latencies.values() for value in values]
+    print(
+        f"{'Gesamt':<60} {len(all_values):>7} {len(all_values) / duration:>8.1f} "
+        f"{percentile(all_values, 50) * 1000:>9.1f} {percentile(all_values, 95) * 1000:>9.1f} "
+        f"{percentile(all_values, 99) * 1000:>9.1f} {sum(errors.values()):>5}"
+    )
+
+
+async def run(args):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    connector = aiohttp.TCPConnector(limit=args.concurrency + 1)
+
+    rng = random.Random(args.seed)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        if args.user_count:
+            credentials = [(f"bench{index}", args.password or "bench") for index in range(1, args.user_count + 1)]
+        else:
+            credentials = [(args.username, args.password or "admin")]
+        tokens = [await login(session, args.base_url, username, password) for username, password in credentials]
+
+        # Pro Login und Cluster nur einmal Details laden – die simulierten Nutzer teilen sich die Stichprobe
+        samples = {}
+        users = []
+        for index in range(args.concurrency):
+            headers = {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+            cluster_id = args.cluster_id or await pick_cluster_id(
+                session, args.base_url, headers, rng if args.user_count else None)
+            key = (index % len(tokens), cluster_id)
+            if key not in samples:
+                samples[key] = ({"market_ids": [], "asins": []} if cluster_id is None or args.scenario == "dashboard"
+                                else await load_cluster_sample(session, args.base_url, headers, cluster_id))
+            routes = SCENARIOS[args.scenario](cluster_id, samples[key])
+            if routes:
+                users.append((headers, routes, rng.randrange(len(routes))))
+
+        if not users:
+            raise SystemExit("❌ Keine Cluster gefunden – erst Testdaten erzeugen (benchmarks.generate_data)")
+
+        cluster_count = len({cluster_id for _, cluster_id in samples})
+        print(f"🚀 {args.concurrency} parallele Nutzer ({len(tokens)} Logins, {cluster_count} Cluster, "
+              f"Szenario {args.scenario}) für {args.duration}s gegen {args.base_url}")
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            probe_loop(session, args.base_url, deadline, latencies),
+            *(user_loop(session, args.base_url, headers, routes, deadline, latencies, errors, offset)
+              for headers, routes, offset in users),
+        )
+        print_report(latencies, errors, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lasttest für die Dashboard-Routen")
+    parser.add_argument("--base-url", default="http://127.0.0.1:9000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default=None, help="Standard: admin, mit --user-count bench")
+    parser.add_argument("--user-count", type=int, default=0, help="Anmeldung als bench1..benchN")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="dashboard")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--cluster-id", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=20.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
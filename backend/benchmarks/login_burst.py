@@ -0,0 +1,102 @@
+"""
+Login-Ansturm gegen die API.
+
+Viele parallele Logins (bcrypt) laufen, während eine Probe ständig unbeteiligte Routen abruft.
+Gemessen werden der Login-Durchsatz und die p50/p95/p99-Latenz der Probe – bleibt sie flach,
+blockiert die Passwort-Arbeit weder den Event-Loop noch den Threadpool der übrigen Routen.
+
+Start (API muss laufen, im backend-Ordner):
+python -m benchmarks.login_burst --base-url http://127.0.0.1:9000 --concurrency 50 --duration 20
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+import aiohttp
+
+from benchmarks.load_test import login, print_report
+from scraper.phase_timer import percentile
+
+PROBE_ROUTES = ["/", "/users/get-credits"]
+
+
+async def login_loop(session, base_url, username, password, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            async with session.post(f"{base_url}/users/token",
+                                    data={"username": username, "password": password}) as response:
+                await response.read()
+                if response.status >= 400:
+                    errors["/users/token"] += 1
+        except aiohttp.ClientError:
+            errors["/users/token"] += 1
+        latencies["/users/token"].append(time.perf_counter() - start)
+
+
+async def probe_loop(session, base_url, headers, deadline, latencies, errors, interval=0.05):
+    index = 0
+    while time.perf_counter() < deadline:
+        route = PROBE_ROUTES[index % len(PROBE_ROUTES)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            async with session.get(f"{base_url}{route}", headers=headers) as response:
+                await response.read()
+                if response.status >= 400:
+                    errors[f"{route} (probe)"] += 1
+        except aiohttp.ClientError:
+            errors[f"{route} (probe)"] += 1
+        latencies[f"{route} (probe)"].append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+
+async def measure_baseline(session, base_url, headers, samples=20):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    deadline = time.perf_counter() + samples * 0.05
+    await probe_loop(session, base_url, headers, deadline, latencies, errors)
+    return [value for values in latencies.values() for value in values]
+
+
+async def run(args):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    # Eigene Verbindungen für die Probe, damit sie nicht hinter den Logins ansteht
+    login_connector = aiohttp.TCPConnector(limit=args.concurrency)
+
+    async with aiohttp.ClientSession() as probe_session, \
+            aiohttp.ClientSession(connector=login_connector) as login_session:
+        token = await login(probe_session, args.base_url, args.username, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        baseline = await measure_baseline(probe_session, args.base_url, headers)
+        print(f"🧊 Probe ohne Last: p50 {percentile(baseline, 50) * 1000:.1f} ms, "
+              f"p99 {percentile(baseline, 99) * 1000:.1f} ms")
+
+        print(f"🚀 {args.concurrency} parallele Logins für {args.duration}s gegen {args.base_url}")
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            probe_loop(probe_session, args.base_url, headers, deadline, latencies, errors),
+            *(login_loop(login_session, args.base_url, args.username, args.password, deadline, latencies, errors)
+              for _ in range(args.concurrency)),
+        )
+        duration = time.perf_counter() - start
+        print_report(latencies, errors, duration)
+        print(f"\n🔐 Login-Durchsatz: {len(latencies['/users/token']) / duration:.1f} Logins/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login-Ansturm mit Latenz-Probe auf unbeteiligten Routen")
+    parser.add_argument("--base-url", default="http://127.0.0.1:9000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
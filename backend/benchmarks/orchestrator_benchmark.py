@@ -0,0 +1,276 @@
+"""
+Offline-Benchmark für Product_Orchestrator.update_products und MarketOrchestrator.update_markets.
+
+Erzeugt eine frische Datenbank (benchmarks.generate_data, ein Cluster) und lässt beide Orchestratoren
+gegen FakeWebDriver laufen – ohne Browser und ohne Amazon. Die Seiten kommen aus einem synthetischen
+Shop, der die Produktwerte mit denselben Änderungsraten wie der Generator fortschreibt (oder mit
+`--pages-dir` aus aufgezeichnetem HTML, siehe scraper/fake_webdriver.py). Die Gesamtzeit wird zerlegt in
+  Netzwerk   – simulierte Latenz des FakeNetwork (`--latency-ms`, `--jitter-ms`)
+  DB         – Zeit aller Queries (app.query_stats)
+  Throttle   – Wartezeit auf einen Slot des AdaptiveThrottle
+  Overhead   – der Rest: Orchestrierung, Extraktion aus dem DOM, Logging
+"Netzwerk-Anteil" ist die Scheduling-Effizienz: wie viel der Laufzeit auf Seiten gewartet wird.
+
+Start (im backend-Ordner):
+python -m benchmarks.orchestrator_benchmark --markets 5 --products-per-market 40
+python -m benchmarks.orchestrator_benchmark --latency-ms 300 --jitter-ms 100 --failure-rate 0.02
+"""
+import argparse
+import html
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# App-Module werden erst in run() bzw. lokal importiert – app.database liest DATABASE_URL beim Import
+
+# Felder des ProductChange, die der synthetische Shop fortschreibt
+PRODUCT_STATE_FIELDS = ("title", "price", "main_category", "main_category_rank", "review_count", "rating",
+                        "store", "img_path", "blm", "total")
+
+PRODUCT_PAGE = """<html><head><title>{title}</title></head><body>
+<div id="nav-global-location-popover-link">Delivering to New York 10001 Update location</div>
+<div id="centerCol">
+  <h1><span id="productTitle">{title}</span></h1>
+  <a id="bylineInfo" href="/stores/{store_slug}">Visit the {store} Store</a>
+  <div id="socialProofingAsinFaceout_feature_div"><div><div>{blm}+ bought in past month</div></div></div>
+  <div id="apex_offerDisplay_desktop"><span class="a-price"><span class="a-offscreen">${price:.2f}</span></span></div>
+</div>
+<div id="imgTagWrapperId"><img src="{img_path}" alt="{title}"></div>
+<form action="/cart/add"><input id="add-to-cart-button" type="submit" value="Add to Cart"></form>
+<div id="detailBulletsWrapper_feature_div"><ul>
+  <li><span>ASIN: {asin}</span></li>
+  <li><span>Customer Reviews: {rating} {review_count:,} ratings</span></li>
+  <li><span>Best Sellers Rank: #{main_category_rank:,} in {main_category} (See Top 100 in {main_category})</span></li>
+</ul></div>
+<div class="a-section"><h2>Technical Details</h2>
+  <table><tr><th>Item Weight</th><td>1.2 pounds</td></tr><tr><th>Country of Origin</th><td>China</td></tr></table>
+</div>
+</body></html>"""
+
+SEARCH_FORM = """<form action="/s" role="search">
+  <input type="text" name="k" role="searchbox" value="">
+  <div id="sac-autocomplete-results-container">{suggestions}</div>
+</form>"""
+
+SEARCH_RESULT = """<div data-asin="{asin}" class="s-result-item">
+  <img class="s-image" src="{img_path}"><h2><span>{title}</span></h2>
+  <span class="a-price"><span class="a-offscreen">${price:.2f}</span></span>
+</div>"""
+
+
+class SyntheticAmazon:
+    """
+    Seitenquelle für FakeWebDriver: Produkt-, Such- und Startseiten aus dem Datenbankstand.
+
+    Jede Seite wird beim ersten Abruf einen "Tag" weitergeschrieben (Rang, Preis, Reviews, Churn der
+    ersten Seite, Suchvorschläge) und danach unverändert ausgeliefert – wie ein Tag auf Amazon.
+    """
+
+    def __init__(self, session_factory, seed: int = 42):
+        from app.models import Market, MarketChange, ProductChange
+
+        self.rng = random.Random(seed)
+        self.products = {}
+        self.markets = {}
+        self.suggestions = {}
+        self.pages = {}
+        self.new_asins = 0
+
+        with session_factory() as db:
+            for change in db.query(ProductChange).order_by(ProductChange.change_date):
+                self.products[change.asin] = {field: getattr(change, field) for field in PRODUCT_STATE_FIELDS}
+            for market in db.query(Market):
+                self.markets[market.keyword] = [product.asin for product in market.products]
+                latest = (db.query(MarketChange).filter(MarketChange.market_id == market.id)
+                          .order_by(MarketChange.change_date.desc()).first())
+                self.suggestions[market.keyword] = list(latest.top_suggestion_list) if latest else []
+
+    def __call__(self, url: str):
+        parsed = urlparse(url)
+        if "/dp/" in parsed.path:
+            key = parsed.path.split("/dp/")[1][:10]
+            render = self.product_page
+        elif parsed.path.rstrip("/") == "/s":
+            key = (parse_qs(parsed.query).get("k") or [""])[0]
+            render = self.search_page
+        else:
+            key, render = "", self.home_page
+        if (render.__name__, key) not in self.pages:
+            self.pages[(render.__name__, key)] = render(key)
+        return self.pages[(render.__name__, key)]
+
+    def product_state(self, asin: str) -> dict:
+        from benchmarks.generate_data import advance_product_state, new_product_state
+
+        if asin not in self.products:
+            self.products[asin] = new_product_state(asin, self.rng)
+        elif not self.products[asin].get("_advanced"):
+            advance_product_state(self.products[asin], self.rng)
+        self.products[asin]["_advanced"] = True
+        return self.products[asin]
+
+    def product_page(self, asin: str) -> str:
+        state = self.product_state(asin)
+        values = {key: html.escape(value) if isinstance(value, str) else value for key, value in state.items()}
+        return PRODUCT_PAGE.format(asin=asin, store_slug=asin.lower(), **values)
+
+    def search_page(self, keyword: str):
+        from benchmarks.generate_data import MARKET_CHURN
+
+        if keyword not in self.markets:
+            return None
+        current = self.markets[keyword]
+        removed = {asin for asin in current if self.rng.random() < MARKET_CHURN}
+        for _ in removed:
+            self.new_asins += 1
+            current.append(f"BZ{self.new_asins:08d}")
+        self.markets[keyword] = current = [asin for asin in current if asin not in removed]
+
+        results = []
+        for asin in current:
+            state = self.product_state(asin)
+            results.append(SEARCH_RESULT.format(asin=asin, img_path=html.escape(state["img_path"] or ""),
+                                                title=html.escape(state["title"] or ""), price=state["price"] or 0))
+        return (f"<html><head><title>Amazon.com : {html.escape(keyword)}</title></head><body>"
+                f"{SEARCH_FORM.format(suggestions='')}<div class='s-main-slot'>{''.join(results)}</div></body></html>")
+
+    def home_page(self, _key: str) -> str:
+        from benchmarks.generate_data import KEYWORD_NOUNS, SUGGESTION_CHANGE_RATE
+
+        # Kein JavaScript: der Autocomplete-Container enthält die Vorschläge aller Märkte, der Scraper filtert
+        lines = []
+        for keyword, suggestions in self.suggestions.items():
+            if suggestions and self.rng.random() < SUGGESTION_CHANGE_RATE:
+                suggestions[self.rng.randrange(len(suggestions))] = f"{keyword} {self.rng.choice(KEYWORD_NOUNS)}"
+            lines += [f"<div>{html.escape(suggestion)}</div>" for suggestion in suggestions]
+        return (f"<html><head><title>Amazon.com Best Sellers</title></head><body>"
+                f"{SEARCH_FORM.format(suggestions=''.join(lines))}</body></html>")
+
+
+def measure(name: str, network, run) -> dict:
+    """Führt `run()` aus und zerlegt die Laufzeit in Netzwerk, DB, Throttle-Wartezeit und Overhead."""
+    from app.query_stats import track_queries
+    from scraper.block_detector import throttle
+    from scraper.phase_timer import PhaseTimer
+
+    timer = PhaseTimer()
+    timer.instrument(throttle, ["acquire"], prefix="throttle.")
+    network_before = network.stats()
+    start = time.perf_counter()
+    try:
+        with track_queries() as queries:
+            items = run()
+    finally:
+        del throttle.acquire  # Instanz-Attribut entfernen → wieder die ungemessene Methode
+    wall = time.perf_counter() - start
+
+    network_after = network.stats()
+    network_seconds = network_after["seconds"] - network_before["seconds"]
+    throttle_seconds = sum(timer.durations.get("throttle.acquire", []))
+    return {
+        "name": name,
+        "items": items,
+        "wall": wall,
+        "network": network_seconds,
+        "db": queries.seconds,
+        "queries": queries.count,
+        "throttle": throttle_seconds,
+        "overhead": max(0.0, wall - network_seconds - queries.seconds - throttle_seconds),
+        "requests": network_after["requests"] - network_before["requests"],
+        "failures": network_after["failures"] - network_before["failures"],
+        "blocks": network_after["blocks"] - network_before["blocks"],
+    }
+
+
+def print_report(results):
+    print("\n📊 Orchestrator-Benchmark")
+    print(f"{'Lauf':<10} {'Items':>6} {'Seiten':>7} {'Gesamt s':>9} {'Netz s':>8} {'DB s':>7} {'Queries':>8} "
+          f"{'Throttle s':>11} {'Overhead s':>11} {'ms/Item':>8} {'Netz-Anteil':>12}")
+    for result in results:
+        items = max(result["items"], 1)
+        print(
+            f"{result['name']:<10} {result['items']:>6} {result['requests']:>7} {result['wall']:>9.2f} "
+            f"{result['network']:>8.2f} {result['db']:>7.2f} {result['queries']:>8} {result['throttle']:>11.2f} "
+            f"{result['overhead']:>11.2f} {result['overhead'] / items * 1000:>8.1f} "
+            f"{result['network'] / result['wall'] if result['wall'] else 0:>12.0%}"
+        )
+        if result["failures"] or result["blocks"]:
+            print(f"{'':<10} simuliert: {result['failures']} Verbindungsfehler, {result['blocks']} Sperrseiten")
+
+
+def run(args, workdir: Path):
+    database_url = f"sqlite:///{workdir / 'orchestrator_bench.db'}"
+    # Vor dem ersten App-Import setzen – app.database liest die URL beim Import
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("LOG_DIR", str(workdir / "logs"))
+
+    from app.database import SessionLocal
+    from benchmarks.generate_data import generate
+    from scraper.fake_webdriver import FakeNetwork, RecordedPages, fake_driver_factory
+    from scraper.Market_Orchestrator import MarketOrchestrator
+    from scraper.Product_Orchestrator import Product_Orchestrator
+
+    counts = generate(database_url, users=1, clusters_per_user=1, markets_per_cluster=args.markets,
+                      products_per_market=args.products_per_market, days=args.days, seed=args.seed)
+    print(f"🏗️ Testdaten in {counts['seconds']}s: {args.markets} Märkte, {counts['products']} Produkte, "
+          f"{counts['product_changes']} ProductChanges")
+
+    pages = RecordedPages(args.pages_dir) if args.pages_dir else SyntheticAmazon(SessionLocal, seed=args.seed)
+    network = FakeNetwork(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                          failure_rate=args.failure_rate, block_rate=args.block_rate, seed=args.seed)
+    driver_factory = fake_driver_factory(pages, network)
+    log_level = getattr(logging, args.log_level)
+
+    def run_products():
+        orchestrator = Product_Orchestrator(cluster_to_scrape=1, driver_factory=driver_factory, pause_scale=0,
+                                            logs_dir=workdir / "logs")
+        logging.getLogger().setLevel(log_level)
+        orchestrator.update_products()
+        return orchestrator.products_total
+
+    def run_markets():
+        orchestrator = MarketOrchestrator(cluster_to_scrape=1, driver_factory=driver_factory, pause_scale=0,
+                                          logs_dir=workdir / "logs")
+        logging.getLogger().setLevel(log_level)
+        orchestrator.update_markets()
+        return orchestrator.markets_total
+
+    # Produkte zuerst – wie im Scheduler, der Markt-Lauf braucht gescrapte Produkte
+    results = [measure("products", network, run_products), measure("markets", network, run_markets)]
+    print_report(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline-Benchmark der Orchestratoren mit FakeWebDriver")
+    parser.add_argument("--markets", type=int, default=5)
+    parser.add_argument("--products-per-market", type=int, default=40)
+    parser.add_argument("--days", type=int, default=14, help="Historie der erzeugten Testdaten")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Anteil der Seitenaufrufe mit Verbindungsfehler")
+    parser.add_argument("--block-rate", type=float, default=0.0,
+                        help="Anteil Sperrseiten – Achtung: der Throttle pausiert dann wie im Echtbetrieb")
+    parser.add_argument("--pages-dir", help="Aufgezeichnetes HTML statt synthetischer Seiten")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="WARNING",
+                        help="INFO entspricht dem Produktivbetrieb, kostet aber Overhead")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Datenbank und Logs im Temp-Ordner behalten")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="orchestrator-bench-"))
+    try:
+        run(args, workdir)
+    finally:
+        if args.keep:
+            print(f"📁 Datenbank und Logs: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,47 @@
 import logging
 import time
+from collections import Counter
 from datetime import datetime, timezone
-import sys
+from pathlib import Path
+from app.bulk_ops import ensure_products, sync_association
+from app.cache import bump_data_version
 from app.database import SessionLocal
-from app.models import Market, MarketChange, MarketCluster, Product, ProductChange
+from app.logging_config import log_context, setup_logging
+from app.metrics import db_write_seconds
+from app.models import (Market, MarketChange, MarketCluster, ProductChange,
+                        market_change_products, market_products)
+from app.query_stats import QUERY_COUNT_WARN, track_queries
+from app.scrape_runs import save_scrape_run
 from scraper.first_page_amazon_scraper import AmazonFirstPageScraper
+from scraper.block_detector import throttle
+from scraper.sampling_profiler import PROFILE_DIR, profile_run
 from sqlalchemy.orm import Session
 
-LOG_FILE_MARKET = "market_scraping_log.txt"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE_MARKET, mode="a", encoding="utf-8"),  # ✅ In Market-Log-Datei schreiben
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 class MarketOrchestrator:
-    def __init__(self, cluster_to_scrape=None):
+    def __init__(self, cluster_to_scrape=None, driver_factory=None, pause_scale=1.0, logs_dir=None):
         self.start_time = None
         self.cluster_to_scrape = cluster_to_scrape
+        # Werden an AmazonFirstPageScraper durchgereicht – Standard Firefox, im Benchmark ein FakeWebDriver
+        self.driver_factory = driver_factory
+        self.pause_scale = pause_scale
+        # 📂 Ziel für Sampling-Profile des Laufs (Standard: scraper/logs)
+        self.logs_dir = Path(logs_dir) if logs_dir else PROFILE_DIR
         self.market_times = []
-        open(LOG_FILE_MARKET, "w").close()  # ✅ Market-Logs beim Start leeren
+        self.page_outcomes = Counter()
+        self.markets_total = 0
+        self.timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.log_file = setup_logging()
 
     def format_time(self, seconds):
         minutes, seconds = divmod(seconds, 60)
         return f"{int(minutes)}m {int(seconds)}s"
 
+    def log_market_queries(self, keyword, stats):
+        if stats.count >= QUERY_COUNT_WARN:
+            logging.warning(f"⚠️ {stats.count} Queries ({stats.ms:.0f} ms DB) für Markt {keyword}")
+        else:
+            logging.debug(f"🗄️ {stats.count} Queries ({stats.ms:.0f} ms DB) für Markt {keyword}")
+
     def get_latest_market_change(self, db: Session, market_id: int):
         logging.info(f"🔍 Suche letzten MarketChange für Market ID {market_id}...")
         return (
@@ -41,14 +55,22 @@ class MarketOrchestrator:
         logging.info(f"🔍 Scraping market: {keyword}")
         start_time = time.time()
         
-        scraper = AmazonFirstPageScraper(headless=True, show_details=False)
-        result = scraper.get_first_page_data(keyword)
+        scraper = AmazonFirstPageScraper(headless=True, show_details=False,
+                                         driver_factory=self.driver_factory, pause_scale=self.pause_scale)
+        throttle.acquire()
+        try:
+            result = scraper.get_first_page_data(keyword)
+        finally:
+            throttle.release(blocked=scraper.blocked is not None)
         
         elapsed_time = time.time() - start_time
         
+        self.page_outcomes["ok" if result else "blocked" if scraper.blocked else "error"] += 1
         if result:
             self.market_times.append(elapsed_time)
             logging.info(f"✅ Scraping abgeschlossen für {keyword} in {elapsed_time:.2f} Sekunden")
+        elif scraper.blocked:
+            logging.warning(f"🛑 Amazon hat die Suche nach {keyword} blockiert ({scraper.blocked}) – {throttle.stats()}")
         else:
             logging.warning(f"❌ Scraping fehlgeschlagen für {keyword}")
         
@@ -97,15 +119,13 @@ class MarketOrchestrator:
             removed_asins = []
             new_suggestions = []
 
-            old_asins = set(last_market_change.new_products.split(
-                ",")) if last_market_change.new_products else set()
+            old_asins = set(last_market_change.new_asins)
             new_asins = set(p["asin"] for p in new_data["first_page_products"])
 
             added_asins = list(new_asins - old_asins)
             removed_asins = list(old_asins - new_asins)
 
-            old_suggestions = set(last_market_change.top_suggestions.split(
-                ",")) if last_market_change.top_suggestions else set()
+            old_suggestions = set(last_market_change.top_suggestion_list)
             new_suggestions = set(new_data["top_search_suggestions"])
 
             changes = []
@@ -122,52 +142,42 @@ class MarketOrchestrator:
             return changes, added_asins, removed_asins, list(new_suggestions)
     
     def update_market_changes(self, db: Session, market: Market, new_market_change: MarketChange, new_data, added_asins, removed_asins):
-        """ 🔄 Aktualisiert MarketChange mit neuen Produkten und Änderungen """
+        """ 🔄 Aktualisiert Market und MarketChange per ASIN-Mengen-Diff mit Bulk-INSERT/DELETE """
         logging.info(f"📢 Aktualisiere MarketChange für {market.keyword}...")
 
-        new_market_change.new_products = ",".join(added_asins)
-        new_market_change.removed_products = ",".join(removed_asins)
-        new_market_change.top_suggestions = ",".join(
-            new_data["top_search_suggestions"])
-
-        # Neue Produkte hinzufügen
-        for product_data in new_data["first_page_products"]:
-            product = db.query(Product).filter(
-                Product.asin == product_data["asin"]).first()
-            if not product:
-                logging.info(
-                    f"🆕 Neues Produkt {product_data['asin']} wird erstellt.")
-                product = Product(
-                    asin=product_data["asin"], last_time_scraped=None)
-                db.add(product)
-                db.commit()
-                db.refresh(product)
-
-            if product not in market.products:
-                market.products.append(product)
-            if product not in new_market_change.products:
-                new_market_change.products.append(product)
-
-        # Entfernte Produkte aus Market entfernen
-        if removed_asins:
-            removed_products = db.query(Product).filter(
-                Product.asin.in_(removed_asins)).all()
-            for product in removed_products:
-                if product in market.products:
-                    market.products.remove(product)
-                if product in new_market_change.products:
-                    new_market_change.products.remove(product)
+        current_asins = list(dict.fromkeys(p["asin"] for p in new_data["first_page_products"]))
 
-        db.commit()
-        logging.info(f"✅ MarketChange für {market.keyword} aktualisiert.")
+        created_asins = ensure_products(db, current_asins)
+        if created_asins:
+            logging.info(f"🆕 {len(created_asins)} neue Produkte angelegt.")
+
+        linked, unlinked = sync_association(
+            db, market_products, "market_id", market.id, current_asins, removed_asins)
+        sync_association(
+            db, market_change_products, "market_change_id", new_market_change.id, current_asins, removed_asins)
+
+        with db_write_seconds.time(operation="market_change"):
+            db.commit()
+        bump_data_version()
+        logging.info(
+            f"✅ MarketChange für {market.keyword} aktualisiert "
+            f"(+{len(linked)} / -{len(unlinked)} Produkte im Markt).")
 
     def update_markets(self):
+        # Alle Einträge dieses Laufs tragen run und cluster_id – filterbar im JSON-Log
+        run = f"markets-{self.timestamp}"
+        with log_context(run=run, cluster_id=self.cluster_to_scrape), profile_run(run, self.logs_dir):
+            self.scrape_markets()
+
+    def scrape_markets(self):
         db = SessionLocal()
         self.start_time = time.time()
         self.market_times = []
         updated_markets = 0
         failed_markets = 0
         skipped_markets = 0
+        succeeded_markets = 0
+        status = "failed"
 
         try:
             if self.cluster_to_scrape is None:
@@ -187,7 +197,7 @@ class MarketOrchestrator:
                     logging.warning(f"⚠️ Keine Märkte gefunden für Cluster {self.cluster_to_scrape}")
                     return
             
-            total_markets = len(markets)
+            total_markets = self.markets_total = len(markets)
             
             logging.info(f"🚀 Starte Markt-Update für {total_markets} Märkte...")
             
@@ -195,59 +205,57 @@ class MarketOrchestrator:
                 logging.info(f" ------------------------------------------------------------ ")
                 logging.info(f"[{index}/{total_markets}] Verarbeite Markt: {market.keyword}")
                 
-                try:
-                    last_market_change = self.get_latest_market_change(
-                    db, market.id)
-
-                    scraped_products = [
-                    p for p in market.products if p.last_time_scraped is not None]
-                    if not scraped_products:
-                        skipped_markets += 1
-                        logging.info(
-                        f"⚠️ Noch keine Scraping-Daten für {market.keyword}. Warte auf Product Orchestrator.")
-                        continue
-
-                    new_total_revenue = self.calculate_total_revenue(db=db, market=market)
-
-                    new_data = self.fetch_current_market_data(market.keyword)
-                    changes, added_asins, removed_asins, new_suggestions = self.detect_changes(
-                    last_market_change, new_data)
-
-                    if new_total_revenue != last_market_change.total_revenue or changes:
-                        logging.info(
-                            f"⚡ Erstelle neuen MarketChange für {market.keyword}")
-
-                        new_market_change = MarketChange(
-                            market_id=market.id,
-                            change_date=datetime.now(timezone.utc),
-                            total_revenue=new_total_revenue,
-                                new_products=",".join(added_asins),
-                                removed_products=",".join(removed_asins),
-                                top_suggestions=",".join(new_suggestions),
-                                changes=",".join(
-                                    changes) if changes else "Kein Total Revenue Change, aber andere Änderungen"
-                        )
-                        db.add(new_market_change)
-                        db.commit()
-                        db.refresh(new_market_change)
-                        updated_markets += 1
-
-                        self.update_market_changes(
-                            db, market, new_market_change, new_data, added_asins, removed_asins)
-                    else:
-                        logging.info(
-                            f"✅ Keine Änderungen für {market.keyword}, MarketChange bleibt unverändert.")
-
-                    # if market_data:
-                    #     self.update_market_in_db(db, market, market_data)
-                    #     updated_markets += 1
-                    # else:
-                    #     logging.warning(f"❌ Scraping fehlgeschlagen für Markt: {market.keyword}")
-                    #     failed_markets += 1
-                        
-                except Exception as e:
-                    logging.error(f"❌ Fehler beim Verarbeiten von Markt {market.keyword}: {e}")
-                    failed_markets += 1
+                with track_queries() as market_queries:
+                    try:
+                        last_market_change = self.get_latest_market_change(
+                        db, market.id)
+
+                        scraped_products = [
+                        p for p in market.products if p.last_time_scraped is not None]
+                        if not scraped_products:
+                            skipped_markets += 1
+                            logging.info(
+                            f"⚠️ Noch keine Scraping-Daten für {market.keyword}. Warte auf Product Orchestrator.")
+                            continue
+
+                        new_total_revenue = self.calculate_total_revenue(db=db, market=market)
+
+                        new_data = self.fetch_current_market_data(market.keyword)
+                        if not new_data:
+                            failed_markets += 1
+                            continue
+
+                        changes, added_asins, removed_asins, new_suggestions = self.detect_changes(
+                        last_market_change, new_data)
+
+                        if new_total_revenue != last_market_change.total_revenue or changes:
+                            logging.info(
+                                f"⚡ Erstelle neuen MarketChange für {market.keyword}")
+
+                            new_market_change = MarketChange(
+                                market_id=market.id,
+                                change_date=datetime.now(timezone.utc),
+                                total_revenue=new_total_revenue,
+                                    changes=",".join(
+                                        changes) if changes else "Kein Total Revenue Change, aber andere Änderungen"
+                            )
+                            new_market_change.set_asins(added_asins, removed_asins)
+                            new_market_change.set_top_suggestions(new_data["top_search_suggestions"])
+                            db.add(new_market_change)
+                            db.flush()
+                            updated_markets += 1
+
+                            self.update_market_changes(
+                                db, market, new_market_change, new_data, added_asins, removed_asins)
+                        else:
+                            logging.info(
+                                f"✅ Keine Änderungen für {market.keyword}, MarketChange bleibt unverändert.")
+                        succeeded_markets += 1
+
+                    except Exception as e:
+                        logging.error(f"❌ Fehler beim Verarbeiten von Markt {market.keyword}: {e}")
+                        failed_markets += 1
+                self.log_market_queries(market.keyword, market_queries)
 
             self.update_market_cluster_total_revenue(db=db)
            # Gesamtzeit berechnen
@@ -262,30 +270,26 @@ class MarketOrchestrator:
             logging.info(f"📦 Erfolgreich aktualisiert: {updated_markets}/{total_markets}")
             logging.info(f"❌ Fehlgeschlagene Märkte: {failed_markets}")
             logging.info(f"📦 Skipped Märkte: {skipped_markets}")
+            status = "done"
 
         except Exception as e:
             logging.critical(f"❌ Schwerwiegender Fehler im Markt-Update: {e}")
         finally:
             db.close()
-
-    def update_market_in_db(self, db, market, market_data):
-        try:
-            change = MarketChange(
-                market_id=market.id,
-                change_date=datetime.now(timezone.utc),
-                top_suggestions=",".join(market_data["top_search_suggestions"]),
-                products_count=len(market_data["first_page_products"])
-            )
-            db.add(change)
-            
-            market.top_suggestions = ",".join(market_data["top_search_suggestions"])
-            market.last_time_scraped = datetime.now(timezone.utc)
-            
-            db.commit()
-            logging.info(f"✅ Markt {market.keyword} erfolgreich in der Datenbank aktualisiert.")
-        except Exception as e:
-            logging.error(f"❌ Fehler beim Aktualisieren des Markts in der Datenbank: {e}")
-            db.rollback()
+            if self.markets_total:
+                save_scrape_run(
+                    f"markets-{self.timestamp}", "markets", self.start_time, time.time(),
+                    pages_fetched=sum(self.page_outcomes.values()),
+                    cluster_id=self.cluster_to_scrape,
+                    status=status,
+                    items_total=self.markets_total,
+                    items_succeeded=succeeded_markets,
+                    items_failed=failed_markets,
+                    items_skipped=skipped_markets,
+                    avg_item_seconds=round(sum(self.market_times) / len(self.market_times), 3)
+                    if self.market_times else None,
+                    page_outcomes=dict(self.page_outcomes),
+                )
 
     def update_market_cluster_total_revenue(self, db: Session):
         logging.info("🔄 Aktualisiere total_revenue für alle MarketCluster...")
@@ -298,6 +302,7 @@ class MarketOrchestrator:
             cluster.total_revenue = total_revenue
             logging.info(f"🏆 MarketCluster '{cluster.title}' aktualisiert: {total_revenue:.2f}€")
         db.commit()
+        bump_data_version()
 
 if __name__ == "__main__":
     orchestrator = MarketOrchestrator()
@@ -2,7 +2,6 @@ import logging
 import os
 from pathlib import Path
 import shutil
-import sys
 import time
 from datetime import date, datetime, timezone
 from statistics import mean
@@ -17,14 +16,34 @@ from webdriver_manager.chrome import ChromeDriverManager
 from sqlalchemy.orm import Session
 
 import scraper.selenium_config as selenium_config
+from app.cache import bump_data_version
 from app.database import SessionLocal
+from app.logging_config import log_context, log_level, setup_logging
+from app.metrics import (active_drivers, asin_scrape_seconds, db_write_seconds,
+                         extraction_failures, pages_fetched)
 from app.models import Market, MarketCluster, Product, ProductChange, market_products
+from app.query_stats import QUERY_COUNT_WARN, track_queries
+from app.scrape_logs import fail_rows, record_scrape_log_entries, warning_rows
+from app.scrape_runs import save_scrape_run
 from scraper.product_selenium_scraper import AmazonProductScraper, OutOfStockException
+from scraper.block_detector import BlockedPageException, throttle
+from scraper.phase_timer import PhaseTimer, TimedDriver
+from scraper.sampling_profiler import profile_run
 
 from collections import Counter
 
+# Extraktor-Methoden des AmazonProductScraper, die einzeln pro Phase gemessen werden
+PRODUCT_SCRAPER_PHASES = (
+    "get_product_infos", "open_page", "is_out_of_stock", "does_product_has_page",
+    "get_blm", "get_price", "getting_bs_and_rank_data", "get_breadcrumb_categories",
+    "get_title", "get_review_count", "get_rating", "get_variants", "get_store",
+    "get_image_path", "get_location", "get_product_infos_box_content",
+    "get_technical_details_box_content",
+)
+
 class Product_Orchestrator:
-    def __init__(self, just_scrape_3_products=False, cluster_to_scrape=None, show_details=False):
+    def __init__(self, just_scrape_3_products=False, cluster_to_scrape=None, show_details=False,
+                 driver_factory=None, pause_scale=1.0, logs_dir=None):
 
         
         self.just_scrape_3_products = just_scrape_3_products
@@ -33,41 +52,47 @@ class Product_Orchestrator:
         self.failed_products = []
         self.cluster_to_scrape = cluster_to_scrape
         self.show_details = show_details
+        # 🔌 Liefert den WebDriver – Standard Chrome, im Benchmark ein FakeWebDriver (scraper/fake_webdriver.py)
+        self.driver_factory = driver_factory or self.create_chrome_driver
+        # Skaliert feste Wartezeiten (z.B. nach dem Laden der Startseite); 0 im Offline-Benchmark
+        self.pause_scale = pause_scale
 
         # ⏰ Timestamp für Datei-Namen
         self.timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        self.log_file = f"scraping-{self.timestamp}.txt"
-        self.fail_file = f"fails-{self.timestamp}.txt"
 
-        LOGS_DIR = Path(__file__).resolve().parent / "logs"
-        LOGS_DIR.mkdir(exist_ok=True)
+        # 📂 Ziel für fails-/warnings-/phases-Reports und Sampling-Profile – Benchmarks und Tests nutzen eigene Ordner
+        self.logs_dir = Path(logs_dir) if logs_dir else Path(__file__).resolve().parent / "logs"
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
 
-        self.log_file = LOGS_DIR / f"scraping-{self.timestamp}.txt"
-        self.fail_file = LOGS_DIR / f"fails-{self.timestamp}.txt"
+        self.fail_file = self.logs_dir / f"fails-{self.timestamp}.txt"
         self.warning_products = []
-        self.warning_file = LOGS_DIR / f"warnings-{self.timestamp}.txt"
+        self.warning_file = self.logs_dir / f"warnings-{self.timestamp}.txt"
+        self.phase_file = self.logs_dir / f"phases-{self.timestamp}.json"
+        self.phase_timer = PhaseTimer()
+        self.page_outcomes = Counter()
+        self.products_total = 0
+        self.run_status = "failed"
+
+        # 🧾 JSON-Lines-Log mit Rotation, geschrieben im Hintergrund-Thread
+        self.log_file = setup_logging()
+        # DEBUG nur während update_products – das Level des Web-Prozesses bleibt danach unverändert
+        self.run_log_level = logging.DEBUG if self.show_details else None
 
+        logging.info("🚀 Product Orchestrator gestartet.")
 
-        # 🧾 Logging konfigurieren
-        logging.basicConfig(
-            level=logging.DEBUG if self.show_details else logging.INFO,
-            format="%(asctime)s [%(levelname)s] %(message)s",
-            handlers=[
-                logging.FileHandler(self.log_file, mode="a", encoding="utf-8"),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        self.driver = TimedDriver(self.create_driver(), self.phase_timer)
+        active_drivers.inc(scraper="product")
+        self.scraper = AmazonProductScraper(self.driver, show_details=show_details)
+        self.scraper.warning_callback = self.add_warning
+        self.phase_timer.instrument(self.scraper, PRODUCT_SCRAPER_PHASES, prefix="scraper.")
 
-        logging.info("🚀 Product Orchestrator gestartet.")
-      
+        self.check_connection()
+        self.set_cookies()
 
-         # Entferne DEBUG-Logs von Selenium & Co.
-        logging.getLogger("selenium.webdriver.remote.remote_connection").setLevel(logging.WARNING)
-        logging.getLogger("urllib3").setLevel(logging.WARNING)
-        logging.getLogger("seleniumwire").setLevel(logging.WARNING)
-        logging.getLogger("httpcore").setLevel(logging.WARNING)
-        logging.getLogger("httpx").setLevel(logging.WARNING)
+    def create_driver(self):
+        return self.driver_factory()
 
+    def create_chrome_driver(self):
         # 🌍 WebDriver konfigurieren
         chrome_options = Options()
         chrome_options.add_argument("--headless=new")
@@ -87,7 +112,7 @@ class Product_Orchestrator:
         chrome_options.add_argument(f"user-agent={selenium_config.user_agent}")
 
         unique_id = uuid.uuid4().hex
-        chrome_options.add_argument(f'--user-data-dir=/tmp/chrome-user-data-{cluster_to_scrape}-{unique_id}')
+        chrome_options.add_argument(f'--user-data-dir=/tmp/chrome-user-data-{self.cluster_to_scrape}-{unique_id}')
 
         if os.getenv("INSIDE_DOCKER") == "1":
             logging.info("🐳 Running inside Docker – using system-installed ChromeDriver")
@@ -115,15 +140,39 @@ class Product_Orchestrator:
 
             service = Service(executable_path=str(chromedriver_path))
 
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver = webdriver.Chrome(service=service, options=chrome_options)
         logging.info(f"🔧 Verwende ChromeDriver: {service.path}")
-        self.scraper = AmazonProductScraper(self.driver, show_details=show_details)
-        self.scraper.warning_callback = self.add_warning
+        return driver
 
-        self.check_connection()
+    def rotate_session(self):
+        """Verwirft die aktuelle (gesperrte) Browser-Session und startet mit frischem Profil neu."""
+        logging.warning("🔄 Rotiere WebDriver-Session wegen Sperrseiten...")
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logging.error(f"❌ Fehler beim Schließen der alten Session: {e}")
+        active_drivers.dec(scraper="product")
+
+        self.driver = TimedDriver(self.create_driver(), self.phase_timer)
+        active_drivers.inc(scraper="product")
+        throttle.note_rotation()
+        self.scraper.driver = self.driver
         self.set_cookies()
 
+    def record_product_queries(self, asin, stats):
+        # Gesamte DB-Zeit des Produkts im Phasen-Report, neben den einzeln gemessenen DB-Schritten
+        self.phase_timer.record("db.total_per_product", stats.seconds)
+        if stats.count >= QUERY_COUNT_WARN:
+            logging.warning(f"⚠️ {stats.count} Queries ({stats.ms:.0f} ms DB) für {asin}")
+        else:
+            logging.debug(f"🗄️ {stats.count} Queries ({stats.ms:.0f} ms DB) für {asin}")
+
+    def count_page(self, outcome):
+        pages_fetched.inc(scraper="product", outcome=outcome)
+        self.page_outcomes[outcome] += 1
+
     def add_warning(self, asin, url, message, location=None,  warning_type="unknown"):
+        extraction_failures.inc(warning_type=warning_type)
         self.warning_products.append({
             'asin': asin,
             'url': url,
@@ -179,7 +228,7 @@ class Product_Orchestrator:
     def set_cookies(self):
         try:
             self.driver.get("https://www.amazon.com")
-            time.sleep(2)  # Warten bis Seite stabil geladen ist
+            time.sleep(2 * self.pause_scale)  # Warten bis Seite stabil geladen ist
             for cookie in selenium_config.cookies:
                 self.driver.add_cookie(cookie)
             logging.info("🍪 Cookies erfolgreich gesetzt.")
@@ -233,7 +282,49 @@ class Product_Orchestrator:
             return True
         return False
 
+    def persist_log_entries(self):
+        """Fehler und Warnungen des Laufs gebündelt in scrape_log_entries – abfragbar über /scraping/log-entries."""
+        run = f"products-{self.timestamp}"
+        rows = fail_rows(run, self.failed_products) + warning_rows(run, self.warning_products)
+        if not rows:
+            return
+        db = SessionLocal()
+        try:
+            with db_write_seconds.time(operation="scrape_log_entries"):
+                record_scrape_log_entries(db, rows)
+                db.commit()
+            logging.info(f"🗂️ {len(rows)} Log-Einträge in scrape_log_entries gespeichert")
+        except Exception as e:
+            db.rollback()
+            logging.error(f"❌ Log-Einträge konnten nicht gespeichert werden: {e}")
+        finally:
+            db.close()
+
+    def save_run(self, succeeded):
+        failed = len(self.failed_products)
+        save_scrape_run(
+            f"products-{self.timestamp}", "products", self.start_time, time.time(),
+            pages_fetched=sum(self.page_outcomes.values()),
+            cluster_id=self.cluster_to_scrape,
+            status=self.run_status,
+            items_total=self.products_total,
+            items_succeeded=succeeded,
+            items_failed=failed,
+            items_skipped=max(self.products_total - succeeded - failed, 0),
+            avg_item_seconds=round(mean(self.scraping_times), 3) if self.scraping_times else None,
+            warning_counts=dict(Counter(w["type"] for w in self.warning_products)),
+            page_outcomes=dict(self.page_outcomes),
+            phase_timings=self.phase_timer.summary(),
+        )
+
     def update_products(self):
+        # Alle Einträge dieses Laufs tragen run und cluster_id – filterbar im JSON-Log
+        run = f"products-{self.timestamp}"
+        with log_level(self.run_log_level), log_context(run=run, cluster_id=self.cluster_to_scrape), \
+                profile_run(run, self.logs_dir):
+            self.scrape_products()
+
+    def scrape_products(self):
         db = SessionLocal()
         scraped_asins = set()
         self.start_time = time.time()
@@ -269,9 +360,8 @@ class Product_Orchestrator:
             if self.just_scrape_3_products:
                 products = products[:3]
 
-            total_products = len(products)
+            total_products = self.products_total = len(products)
             if total_products == 0:
-                self.close_driver()
                 logging.warning("ALL PRODUCTS ARE SCRAPED TODAY")
                 return 
             
@@ -283,72 +373,99 @@ class Product_Orchestrator:
                 logging.info(f"📦 [{index}/{total_products}] Scrape Produkt: {product.asin}")
                 if self.show_details: logging.info("="*80 + "\n")
 
-                try:
-                    start = time.time()
-                    last = self.get_latest_product_change(db, product.asin)
-                    data = self.scraper.get_product_infos(product.asin)
-                    self.scraping_times.append(time.time() - start)
+                # Queries und DB-Zeit pro Produkt – macht N+1-Muster im Lauf sichtbar
+                with track_queries() as product_queries:
+                    try:
+                        start = time.time()
+                        with self.phase_timer.span("db.latest_product_change"):
+                            last = self.get_latest_product_change(db, product.asin)
+                        # Differenz zu scraper.get_product_infos = Wartezeit auf den Throttle-Slot
+                        with self.phase_timer.span("product.scrape_incl_throttle"), throttle.slot():
+                            data = self.scraper.get_product_infos(product.asin)
+                        self.scraping_times.append(time.time() - start)
+                        asin_scrape_seconds.observe(time.time() - start)
+                        self.count_page("ok" if data else "empty")
+
+                        if not data:
+                            reason = "Complete scrape failed"
+                            logging.warning(f"❌ {reason} für {product.asin}")
+                            self.failed_products.append({
+                                'asin': product.asin,
+                                'url': f"https://www.amazon.com/dp/{product.asin}?language=en_US",
+                                'missing': [reason],
+                                'context': "Scraper returned None"
+                            })
+                        else:
+                            changes, _ = self.detect_product_changes(last, data)
+                            if changes:
+                                logging.info(f" ⚡ Änderungen: {', '.join(changes)}")
+
+                                pc = ProductChange(
+                                    asin=product.asin,
+                                    title=data.get("title"),
+                                    price=data.get("price"),
+                                    main_category=data.get("main_category"),
+                                    second_category=data.get("second_category"),
+                                    main_category_rank=data.get("main_category_rank"),
+                                    second_category_rank=data.get("second_category_rank"),
+                                    img_path=data.get("img_path"),
+                                    blm=data.get("blm"),
+                                    total=data.get("total"),
+                                    store=data.get("store"),
+                                    manufacturer=data.get("manufacturer"),
+                                    review_count=data.get("review_count"),
+                                    rating=data.get("rating"),
+                                    change_date=datetime.now(timezone.utc),
+                                    changes=",".join(changes)
+                                )
+                                db.add(pc)
+                                product.product_changes.append(pc)
+
+                        product.last_time_scraped = datetime.now(timezone.utc)
+                        with self.phase_timer.span("db.commit"), db_write_seconds.time(operation="product_change"):
+                            db.commit()
+                        bump_data_version()
+                        scraped_asins.add(product.asin)
+
+                    except BlockedPageException as e:
+                        # Nicht als gescraped markieren – Produkt wird im nächsten Lauf erneut versucht
+                        self.count_page("blocked")
+                        logging.warning(f"🛑 {product.asin} von Amazon blockiert ({e.block_type}) – {throttle.stats()}")
+                        self.failed_products.append({
+                            'asin': product.asin,
+                            'url': f"https://www.amazon.com/dp/{product.asin}",
+                            'missing': [f"Blocked ({e.block_type})"],
+                            'context': str(e)
+                        })
+                        if throttle.should_rotate():
+                            self.rotate_session()
+
+                    except OutOfStockException as e:
+                        logging.warning(f"🚫 {product.asin} ist out of stock: {e}")
+                        self.count_page("out_of_stock")
+                        product.last_time_scraped = datetime.now(timezone.utc)
+                        db.commit()
+                        bump_data_version()
+                        self.failed_products.append({
+                            'asin': product.asin,
+                            'url': f"https://www.amazon.com/dp/{product.asin}",
+                            'missing': ["Out of stock"],
+                            'context': str(e)
+                        })
 
-                    if not data:
-                        reason = "Complete scrape failed"
-                        logging.warning(f"❌ {reason} für {product.asin}")
+                    except Exception as e:
+                        logging.error(f"❌ Fehler bei {product.asin}: {e}")
+                        self.count_page("error")
+                        product.last_time_scraped = datetime.now(timezone.utc)
+                        db.commit()
+                        bump_data_version()
                         self.failed_products.append({
                             'asin': product.asin,
-                            'url': f"https://www.amazon.com/dp/{product.asin}?language=en_US",
-                            'missing': [reason],
-                            'context': "Scraper returned None"
+                            'url': f"https://www.amazon.com/dp/{product.asin}",
+                            'missing': ["Exception"],
+                            'context': str(e)
                         })
-                    else:
-                        changes, _ = self.detect_product_changes(last, data)
-                        if changes:
-                            logging.info(f" ⚡ Änderungen: {', '.join(changes)}")
-
-                            pc = ProductChange(
-                                asin=product.asin,
-                                title=data.get("title"),
-                                price=data.get("price"),
-                                main_category=data.get("main_category"),
-                                second_category=data.get("second_category"),
-                                main_category_rank=data.get("main_category_rank"),
-                                second_category_rank=data.get("second_category_rank"),
-                                img_path=data.get("img_path"),
-                                blm=data.get("blm"),
-                                total=data.get("total"),
-                                store=data.get("store"),
-                                manufacturer=data.get("manufacturer"),
-                                review_count=data.get("review_count"),
-                                rating=data.get("rating"),
-                                change_date=datetime.now(timezone.utc),
-                                changes=",".join(changes)
-                            )
-                            db.add(pc)
-                            product.product_changes.append(pc)
-
-                    product.last_time_scraped = datetime.now(timezone.utc)
-                    db.commit()
-                    scraped_asins.add(product.asin)
-
-                except OutOfStockException as e:
-                    logging.warning(f"🚫 {product.asin} ist out of stock: {e}")
-                    product.last_time_scraped = datetime.now(timezone.utc)
-                    db.commit()
-                    self.failed_products.append({
-                        'asin': product.asin,
-                        'url': f"https://www.amazon.com/dp/{product.asin}",
-                        'missing': ["Out of stock"],
-                        'context': str(e)
-                    })
-
-                except Exception as e:
-                    logging.error(f"❌ Fehler bei {product.asin}: {e}")
-                    product.last_time_scraped = datetime.now(timezone.utc)
-                    db.commit()
-                    self.failed_products.append({
-                        'asin': product.asin,
-                        'url': f"https://www.amazon.com/dp/{product.asin}",
-                        'missing': ["Exception"],
-                        'context': str(e)
-                    })
+                self.record_product_queries(product.asin, product_queries)
 
             # Fehler-Log schreiben
             if self.failed_products:
@@ -361,6 +478,7 @@ class Product_Orchestrator:
                         f.write(f"🚫 Grund: {', '.join(fail['missing'])}\n")
                         f.write(f"⚠️ Kontext: {fail.get('context', 'Unbekannter Fehler')}\n")
                         f.write("-" * 60 + "\n\n")
+            self.run_status = "done"
 
         finally:
             total_time = time.time() - self.start_time
@@ -380,15 +498,28 @@ class Product_Orchestrator:
                 logging.info(f"📄 Warnings-Log: {self.warning_file}")
                 self.write_warning_file()
 
+            # Wo die Zeit pro Produkt hingeht – Grundlage, welchen Extraktor man optimiert
+            self.phase_timer.log_report()
+            if self.phase_timer.durations:
+                logging.info(f"📄 Phasen-Report: {self.phase_timer.write_json(self.phase_file)}")
+
             db.close()
+            self.persist_log_entries()
+            if self.products_total:
+                self.save_run(len(scraped_asins))
             self.close_driver()
 
            
 
 
     def close_driver(self):
+        # Mehrfacher Aufruf ist harmlos – der Gauge active_drivers darf nur einmal pro Driver sinken
+        if self.driver is None:
+            return
         logging.info("🔻 Schließe WebDriver...")
         self.driver.quit()
+        self.driver = None
+        active_drivers.dec(scraper="product")
         logging.info("✅ WebDriver beendet.")
 
 
@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 🛑 Erkennungsmerkmale von Amazon-Sperrseiten (Captcha, Robot-Check, "Sorry"-Seiten)
+BLOCK_MARKERS = {
+    "captcha": (
+        "/errors/validatecaptcha",
+        "enter the characters you see below",
+        "type the characters you see in this image",
+    ),
+    "robot_check": (
+        "make sure you're not a robot",
+        "to discuss automated access to amazon data",
+        "api-services-support@amazon.com",
+    ),
+    "sorry_page": (
+        "sorry! something went wrong",
+        "sorry, something went wrong on our end",
+        "503 - service unavailable error",
+    ),
+}
+
+# Sperrseiten sind klein – echte Produkt- und Suchseiten liegen deutlich darüber
+MAX_BLOCK_PAGE_SIZE = 60_000
+
+
+class BlockedPageException(Exception):
+    def __init__(self, message, block_type="unknown"):
+        super().__init__(message)
+        self.block_type = block_type
+
+
+def detect_block(html: str) -> str | None:
+    """Gibt den Typ der Sperrseite zurück (captcha, robot_check, sorry_page) oder None."""
+    if not html or len(html) > MAX_BLOCK_PAGE_SIZE:
+        return None
+
+    page_text = html.lower()
+    for block_type, markers in BLOCK_MARKERS.items():
+        if any(marker in page_text for marker in markers):
+            return block_type
+    return None
+
+
+class AdaptiveThrottle:
+    """
+    Globaler AIMD-Regler für Amazon-Requests aller Orchestratoren.
+
+    Erfolgreiche Seiten erhöhen das Parallelitätslimit additiv und verkürzen den Abstand
+    zwischen Requests, Sperrseiten halbieren das Limit und verdoppeln den Abstand.
+    Steigt die Sperrquote im Fenster über `pause_threshold`, pausieren alle Scraper für `cooldown` Sekunden.
+    Für einen Session-Wechsel zählen nur Requests seit dem letzten Wechsel (`note_rotation`).
+    """
+
+    def __init__(self, initial_limit=2.0, min_limit=1.0, max_limit=6.0, increase_step=0.5,
+                 decrease_factor=0.5, base_interval=1.0, max_interval=60.0, window_size=30,
+                 min_samples=5, rotate_threshold=0.1, pause_threshold=0.3, cooldown=120.0):
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.interval = 0.0
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.window = deque(maxlen=window_size)
+        self.min_samples = min_samples
+        self.rotate_threshold = rotate_threshold
+        self.pause_threshold = pause_threshold
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.requests_since_rotation = 0
+        self.paused_until = 0.0
+        self.last_start = 0.0
+        self.total_requests = 0
+        self.total_blocks = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                wait = max(self.paused_until - now, self.last_start + self.interval - now)
+                if self.in_flight < max(int(self.limit), 1) and wait <= 0:
+                    self.in_flight += 1
+                    self.last_start = now
+                    return
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, blocked=False):
+        with self._condition:
+            self.in_flight -= 1
+            self.total_requests += 1
+            self.requests_since_rotation += 1
+            self.window.append(blocked)
+
+            if blocked:
+                self.total_blocks += 1
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                self.interval = min(self.max_interval, max(self.interval * 2, self.base_interval))
+            else:
+                self.limit = min(self.max_limit, self.limit + self.increase_step / self.limit)
+                self.interval = max(0.0, self.interval - self.base_interval / 4)
+
+            if blocked and len(self.window) >= self.min_samples and self.block_rate() >= self.pause_threshold:
+                self.paused_until = time.monotonic() + self.cooldown
+                self.window.clear()
+                logging.warning(
+                    f"⏸️ Sperrquote zu hoch – pausiere alle Scraper für {self.cooldown:.0f}s "
+                    f"(Limit: {self.limit:.1f}, Abstand: {self.interval:.1f}s)"
+                )
+
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Reserviert einen Request-Slot; BlockedPageException zählt als Sperre, alles andere als Erfolg."""
+        self.acquire()
+        blocked = False
+        try:
+            yield
+        except BlockedPageException:
+            blocked = True
+            raise
+        finally:
+            self.release(blocked=blocked)
+
+    def block_rate(self) -> float:
+        if not self.window:
+            return 0.0
+        return sum(self.window) / len(self.window)
+
+    def should_rotate(self) -> bool:
+        """True, wenn die Sperrquote seit dem letzten Session-Wechsel einen weiteren rechtfertigt."""
+        with self._condition:
+            if self.requests_since_rotation < self.min_samples:
+                return False
+            recent = list(self.window)[-self.requests_since_rotation:]
+            return len(recent) >= self.min_samples and sum(recent) / len(recent) >= self.rotate_threshold
+
+    def note_rotation(self):
+        """Nach einem Session-Wechsel: Sperren der alten Session lösen keinen weiteren Wechsel aus."""
+        with self._condition:
+            self.requests_since_rotation = 0
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "limit": round(self.limit, 2),
+                "interval": round(self.interval, 2),
+                "in_flight": self.in_flight,
+                "block_rate": round(self.block_rate(), 3),
+                "paused_for": max(0.0, round(self.paused_until - time.monotonic(), 1)),
+                "total_requests": self.total_requests,
+                "total_blocks": self.total_blocks,
+            }
+
+
+# 🌍 Gemeinsamer Regler für alle Orchestratoren im Prozess
+throttle = AdaptiveThrottle()
@@ -1,4 +1,7 @@
 import pytest
+from app.models import Base
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
 def pytest_addoption(parser):
     """Fügt das `--asin` CLI-Argument zu PyTest hinzu."""
@@ -8,3 +11,17 @@ def pytest_addoption(parser):
 def asin_param(request):
     """Stellt die ASIN als Fixture bereit."""
     return request.config.getoption("--asin")
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Sessionmaker auf einer frischen SQLite-Datei mit allen Tabellen (auch aus mehreren Threads nutzbar)."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def db(session_factory):
+    """Eine Session auf der Test-Datenbank."""
+    with session_factory() as session:
+        yield session
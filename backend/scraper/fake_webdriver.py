@@ -0,0 +1,302 @@
+"""
+Offline-WebDriver für Benchmarks und Tests der Orchestratoren.
+
+`FakeWebDriver` bildet die Teile der Selenium-API nach, die unsere Scraper nutzen (get, page_source,
+find_element(s) per XPath/CSS/Tag/ID, text, get_attribute, send_keys mit Formular-Submit, Cookies),
+und wertet sie per lxml auf aufgezeichnetem oder generiertem HTML aus. Ein gemeinsames `FakeNetwork`
+simuliert Latenz, Verbindungsfehler und Sperrseiten und misst die Netzwerkzeit getrennt vom Rest.
+
+Seitenquelle ist ein Callable `url -> html | None`, z.B. `RecordedPages("pfad/zu/aufnahmen")`:
+  dp/<ASIN>.html   bzw. dp.html als Vorlage für alle Produkte ({{asin}} wird ersetzt)
+  s/<suchwort>.html bzw. s.html als Vorlage für alle Suchen ({{keyword}} wird ersetzt)
+  index.html       alles andere (Startseite, Bestseller)
+Aufnahmen entstehen z.B. mit `Path(...).write_text(driver.page_source)` in einer echten Session.
+"""
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse
+
+import lxml.html
+from lxml import etree
+from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+
+# Elemente, die in Seleniums `.text` eine eigene Zeile bekommen
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "fieldset", "figcaption", "figure",
+    "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p",
+    "pre", "section", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+}
+INVISIBLE_TAGS = {"head", "noscript", "script", "style", "template"}
+SUBMIT_KEYS = (Keys.RETURN, Keys.ENTER)
+
+NOT_FOUND_PAGE = """<html><head><title>Page Not Found</title></head><body>
+<p>Looking for something? We're sorry. The Web address you entered is not a functioning page on our site.</p>
+</body></html>"""
+
+CAPTCHA_PAGE = """<html><head><title>Amazon.com</title></head><body>
+<form action="/errors/validateCaptcha"><h4>Enter the characters you see below</h4>
+<p>Sorry, we just need to make sure you're not a robot.</p></form></body></html>"""
+
+
+def visible_text(element) -> str:
+    """Annäherung an Seleniums `.text`: Blockelemente getrennt durch Zeilenumbrüche, Leerraum zusammengefasst."""
+    parts = []
+
+    def walk(node):
+        if not isinstance(node.tag, str) or node.tag in INVISIBLE_TAGS or node.get("hidden") is not None:
+            return
+        block = node.tag in BLOCK_TAGS
+        if block or node.tag == "br":
+            parts.append("\n")
+        if node.text:
+            parts.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                parts.append(child.tail)
+        if block:
+            parts.append("\n")
+
+    walk(element)
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def find_nodes(context, by: str, value: str, include_self: bool) -> list:
+    try:
+        if by == By.XPATH:
+            nodes = context.xpath(value)
+        elif by == By.CSS_SELECTOR:
+            nodes = context.cssselect(value)
+        elif by == By.CLASS_NAME:
+            nodes = context.cssselect("." + value)
+        elif by == By.ID:
+            nodes = context.xpath("descendant-or-self::*[@id=$value]", value=value)
+        elif by == By.NAME:
+            nodes = context.xpath("descendant-or-self::*[@name=$value]", value=value)
+        elif by == By.TAG_NAME:
+            nodes = context.xpath("descendant-or-self::*[local-name()=$value]", value=value.lower())
+        elif by in (By.LINK_TEXT, By.PARTIAL_LINK_TEXT):
+            nodes = [link for link in context.iter("a")
+                     if (value in visible_text(link) if by == By.PARTIAL_LINK_TEXT else visible_text(link) == value)]
+        else:
+            raise InvalidSelectorException(f"Unbekannte Suchstrategie: {by}")
+    except (etree.XPathError, SyntaxError) as e:
+        raise InvalidSelectorException(f"Ungültiger Selektor {value!r}: {e}")
+
+    elements = [node for node in nodes if isinstance(node, etree._Element) and isinstance(node.tag, str)]
+    if not include_self:
+        # Wie querySelectorAll auf einem Element: nur Nachfahren
+        elements = [node for node in elements if node is not context]
+    return elements
+
+
+class FakeNetwork:
+    """Simulierte Latenz, Verbindungsfehler und Sperrseiten – von allen Fake-Drivern eines Laufs geteilt."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 block_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.block_rate = block_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self.blocks = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def fetch(self, url: str, pages: Callable[[str], Optional[str]]) -> str:
+        with self._lock:
+            delay = max(0.0, self.rng.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+            failed = self.rng.random() < self.failure_rate
+            blocked = not failed and self.rng.random() < self.block_rate
+            self.requests += 1
+            self.failures += failed
+            self.blocks += blocked
+            self.seconds += delay
+
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise WebDriverException(f"net::ERR_CONNECTION_RESET beim Laden von {url} (simuliert)")
+        if blocked:
+            return CAPTCHA_PAGE
+        return pages(url) or NOT_FOUND_PAGE
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "failures": self.failures, "blocks": self.blocks,
+                    "seconds": round(self.seconds, 3)}
+
+
+class FakeWebElement:
+    def __init__(self, driver: "FakeWebDriver", node):
+        self._driver = driver
+        self._node = node
+
+    @property
+    def tag_name(self) -> str:
+        return self._node.tag
+
+    @property
+    def text(self) -> str:
+        return visible_text(self._node)
+
+    def get_attribute(self, name: str):
+        if name in ("textContent", "innerText"):
+            return self._node.text_content() if name == "textContent" else visible_text(self._node)
+        if name == "outerHTML":
+            return lxml.html.tostring(self._node, encoding="unicode", with_tail=False)
+        if name == "innerHTML":
+            return (self._node.text or "") + "".join(
+                lxml.html.tostring(child, encoding="unicode") for child in self._node)
+        return self._node.get(name)
+
+    get_dom_attribute = get_attribute
+
+    def find_element(self, by=By.ID, value=None):
+        return self._driver._first(self._node, by, value, include_self=False)
+
+    def find_elements(self, by=By.ID, value=None):
+        return self._driver._all(self._node, by, value, include_self=False)
+
+    def is_displayed(self) -> bool:
+        return all(node.get("hidden") is None for node in self._node.iterancestors()) \
+            and self._node.get("hidden") is None
+
+    def is_enabled(self) -> bool:
+        return self._node.get("disabled") is None
+
+    def clear(self) -> None:
+        self._node.set("value", "")
+
+    def send_keys(self, *values) -> None:
+        typed = "".join(str(value) for value in values)
+        text = "".join(char for char in typed if char not in SUBMIT_KEYS)
+        if text:
+            self._node.set("value", (self._node.get("value") or "") + text)
+        if any(key in typed for key in SUBMIT_KEYS):
+            self.submit()
+
+    def submit(self) -> None:
+        form = self._node if self._node.tag == "form" else next(self._node.iterancestors("form"), None)
+        if form is None:
+            return
+        fields = {field.get("name"): field.get("value") or "" for field in form.iter("input") if field.get("name")}
+        action = urljoin(self._driver.current_url, form.get("action") or self._driver.current_url)
+        self._driver.get(f"{action.split('?')[0]}?{urlencode(fields)}")
+
+    def click(self) -> None:
+        href = self._node.get("href")
+        if self._node.tag == "a" and href:
+            self._driver.get(urljoin(self._driver.current_url, href))
+        elif self._node.tag in ("button", "input") and (self._node.get("type") or "submit") == "submit":
+            self.submit()
+
+
+class FakeWebDriver:
+    """Selenium-kompatibler Driver ohne Browser; `pages(url)` liefert das HTML der angefragten Seite."""
+
+    def __init__(self, pages: Callable[[str], Optional[str]], network: Optional[FakeNetwork] = None):
+        self.pages = pages
+        self.network = network or FakeNetwork()
+        self.current_url = "about:blank"
+        self.page_source = "<html><head></head><body></body></html>"
+        self._document = lxml.html.document_fromstring(self.page_source)
+        self._cookies = {}
+        self.closed = False
+
+    @property
+    def title(self) -> str:
+        return self._document.findtext(".//title") or ""
+
+    def get(self, url: str) -> None:
+        if self.closed:
+            raise WebDriverException("Session wurde bereits beendet")
+        html = self.network.fetch(url, self.pages)
+        self.current_url = url
+        self.page_source = html
+        self._document = lxml.html.document_fromstring(html)
+
+    def refresh(self) -> None:
+        self.get(self.current_url)
+
+    def _all(self, context, by, value, include_self):
+        return [FakeWebElement(self, node) for node in find_nodes(context, by, value, include_self)]
+
+    def _first(self, context, by, value, include_self):
+        elements = self._all(context, by, value, include_self)
+        if not elements:
+            raise NoSuchElementException(f"Kein Element für {by}={value!r} auf {self.current_url}")
+        return elements[0]
+
+    def find_element(self, by=By.ID, value=None):
+        return self._first(self._document, by, value, include_self=True)
+
+    def find_elements(self, by=By.ID, value=None):
+        return self._all(self._document, by, value, include_self=True)
+
+    def execute_script(self, script, *args):
+        return None
+
+    def add_cookie(self, cookie: dict) -> None:
+        self._cookies[cookie["name"]] = dict(cookie)
+
+    def get_cookies(self) -> list:
+        return list(self._cookies.values())
+
+    def delete_all_cookies(self) -> None:
+        self._cookies.clear()
+
+    def implicitly_wait(self, seconds) -> None:
+        pass
+
+    def set_page_load_timeout(self, seconds) -> None:
+        pass
+
+    def quit(self) -> None:
+        self.closed = True
+
+
+def fake_driver_factory(pages: Callable[[str], Optional[str]], network: Optional[FakeNetwork] = None):
+    """Factory für `driver_factory` der Orchestratoren; alle erzeugten Driver teilen sich ein FakeNetwork."""
+    network = network or FakeNetwork()
+    return lambda: FakeWebDriver(pages, network)
+
+
+class RecordedPages:
+    """Liefert aufgezeichnete HTML-Seiten aus einem Verzeichnis (Aufbau siehe Modul-Docstring)."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._cache = {}
+
+    def _read(self, name: str) -> Optional[str]:
+        if name not in self._cache:
+            path = self.directory / name
+            self._cache[name] = path.read_text(encoding="utf-8") if path.is_file() else None
+        return self._cache[name]
+
+    def __call__(self, url: str) -> Optional[str]:
+        parsed = urlparse(url)
+        match = re.search(r"/dp/([A-Z0-9]{10})", parsed.path)
+        if match:
+            asin = match.group(1)
+            html = self._read(f"dp/{asin}.html") or self._read("dp.html")
+            return html.replace("{{asin}}", asin) if html else None
+
+        if parsed.path.rstrip("/") == "/s":
+            keyword = (parse_qs(parsed.query).get("k") or [""])[0]
+            slug = re.sub(r"[^a-z0-9]+", "-", keyword.lower()).strip("-")
+            html = self._read(f"s/{slug}.html") or self._read("s.html")
+            return html.replace("{{keyword}}", keyword) if html else None
+
+        return self._read("index.html")
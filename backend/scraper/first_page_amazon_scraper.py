@@ -3,6 +3,8 @@ import re
 import time
 
 import scraper.selenium_config as selenium_config
+from app.metrics import active_drivers, pages_fetched
+from scraper.block_detector import BlockedPageException, detect_block
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
@@ -13,7 +15,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 
 
 class AmazonFirstPageScraper:
-    def __init__(self, headless=True, show_details=True):
+    def __init__(self, headless=True, show_details=True, driver_factory=None, pause_scale=1.0):
         self.user_agent = selenium_config.user_agent
         self.cookies = selenium_config.cookies
         self.options = Options()
@@ -34,6 +36,10 @@ class AmazonFirstPageScraper:
         self.top_search_suggestions = []
         self.first_page_products = []
         self.driver = None
+        self.blocked = None
+        # Standard Firefox; der Benchmark reicht einen FakeWebDriver durch und setzt pause_scale auf 0
+        self.driver_factory = driver_factory or self.create_firefox_driver
+        self.pause_scale = pause_scale
 
         # Set log level
         self.options.log.level = "error"
@@ -53,15 +59,15 @@ class AmazonFirstPageScraper:
             except Exception as e:
                 if attempt == retries - 1:
                     print(f"Critical error: Failed to load {url} after {retries} attempts: {e}")
-                time.sleep(wait)
+                time.sleep(wait * self.pause_scale)
         raise Exception(f"Failed to load {url} after {retries} attempts")
 
     def scroll_down(self, duration=5) -> None:
         start = time.time()
-        while time.time() - start < duration:
+        while time.time() - start < duration * self.pause_scale:
             self.driver.execute_script(
                 f"window.scrollBy(0, {random.randint(900, 1400)});")
-            time.sleep(random.uniform(0.5, 1.5))
+            time.sleep(random.uniform(0.5, 1.5) * self.pause_scale)
 
     def open_page(self, searchterm) -> None:
         self.searchterm = searchterm
@@ -71,6 +77,12 @@ class AmazonFirstPageScraper:
         for cookie in selenium_config.cookies:
             self.driver.add_cookie(cookie)
 
+    def check_for_block(self) -> None:
+        block_type = detect_block(self.driver.page_source)
+        if block_type:
+            self.blocked = block_type
+            raise BlockedPageException(f"Amazon blocked search for '{self.searchterm}' ({block_type})", block_type)
+
     def get_top_search_suggestions(self):
         try:
             wait = WebDriverWait(self.driver, 15)
@@ -79,7 +91,7 @@ class AmazonFirstPageScraper:
                 By.XPATH, '//input[@role="searchbox"]')
             search_box.clear()
             search_box.send_keys(self.searchterm)
-            time.sleep(2)
+            time.sleep(2 * self.pause_scale)
 
             autocomplete = wait.until(EC.visibility_of_element_located(
                 (By.XPATH, '//*[@id="sac-autocomplete-results-container"]')))
@@ -208,24 +220,38 @@ class AmazonFirstPageScraper:
             print(f"Critical error: Failed to get first page products: {e}")
             return []
 
+    def create_firefox_driver(self):
+        return webdriver.Firefox(options=self.options)
+
     def close_driver(self):
         try:
             if self.driver:
                 self.driver.quit()
         except Exception as e:
             print(f"Error closing driver: {e}")
+        finally:
+            if self.driver:
+                active_drivers.dec(scraper="first_page")
+            # Beendete Session nicht beim nächsten Aufruf wiederverwenden
+            self.driver = None
 
     def get_first_page_data(self, searchterm) -> list:
+        self.blocked = None
         try:
             if not self.driver:
-                self.driver = webdriver.Firefox(options=self.options)
+                self.driver = self.driver_factory()
+                active_drivers.inc(scraper="first_page")
             self.open_page(searchterm)
+            self.check_for_block()
             top_search_suggestions = self.get_top_search_suggestions()
+            self.check_for_block()
             first_page_products = self.get_first_page_products()
             self.top_search_suggestions = top_search_suggestions
             self.first_page_products = first_page_products
+            pages_fetched.inc(scraper="first_page", outcome="ok")
             return {"top_search_suggestions": self.top_search_suggestions, "first_page_products": self.first_page_products}
         except Exception as e:
+            pages_fetched.inc(scraper="first_page", outcome="blocked" if self.blocked else "error")
             print(f"❌❌❌ [get_first_page_data] Error getting first page data! Message: {str(e)}\n")
             return None
         finally:
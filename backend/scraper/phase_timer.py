@@ -0,0 +1,114 @@
+import functools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+# WebDriver-Aufrufe, die einzeln gemessen werden – alles andere reicht der Proxy ungemessen durch
+TIMED_DRIVER_METHODS = ("get", "find_element", "find_elements", "execute_script", "add_cookie", "refresh")
+TIMED_DRIVER_PROPERTIES = ("page_source",)
+
+
+def percentile(values, pct):
+    """Nearest-Rank-Perzentil (pct in Prozent) – auch von den Lasttests in benchmarks/ genutzt."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class PhaseTimer:
+    """
+    Sammelt Laufzeiten pro Phase (Extraktor-Methode, WebDriver-Aufruf, DB-Schritt).
+
+    Spans dürfen verschachtelt sein – jede Phase zählt ihre eigene, inklusive Zeit. Eine Phase,
+    die mehrfach pro Seite läuft (z.B. `get_location` über Warning-Callbacks), taucht im Report
+    mit entsprechend höherem `count` auf.
+    """
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.durations[phase].append(seconds)
+
+    @contextmanager
+    def span(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def wrap(self, func, phase: str):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            with self.span(phase):
+                return func(*args, **kwargs)
+        return timed
+
+    def instrument(self, obj, method_names, prefix: str = "") -> None:
+        """Ersetzt die Methoden direkt auf der Instanz – interne `self.x()`-Aufrufe werden so mitgemessen."""
+        for name in method_names:
+            setattr(obj, name, self.wrap(getattr(obj, name), f"{prefix}{name}"))
+
+    def summary(self) -> dict:
+        with self._lock:
+            durations = {phase: list(values) for phase, values in self.durations.items()}
+
+        report = {}
+        for phase, values in sorted(durations.items(), key=lambda item: sum(item[1]), reverse=True):
+            report[phase] = {
+                "count": len(values),
+                "total_s": round(sum(values), 3),
+                "mean_ms": round(sum(values) / len(values) * 1000, 1),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "max_ms": round(max(values) * 1000, 1),
+            }
+        return report
+
+    def log_report(self, logger=logging) -> None:
+        report = self.summary()
+        if not report:
+            return
+        logger.info("⏱️ Laufzeit pro Phase (sortiert nach Gesamtzeit):")
+        logger.info(f"{'Phase':<45} {'Anzahl':>7} {'Summe s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for phase, stats in report.items():
+            logger.info(
+                f"{phase:<45} {stats['count']:>7} {stats['total_s']:>9.1f} "
+                f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['max_ms']:>9.1f}"
+            )
+
+    def write_json(self, path) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.summary(), indent=2), encoding="utf-8")
+        return path
+
+
+class TimedDriver:
+    """Proxy um einen Selenium-WebDriver, der die teuren Aufrufe als `driver.<name>` misst."""
+
+    def __init__(self, driver, timer: PhaseTimer):
+        self._driver = driver
+        self._timer = timer
+
+    @property
+    def wrapped_driver(self):
+        return self._driver
+
+    def __getattr__(self, name):
+        if name in TIMED_DRIVER_PROPERTIES:
+            with self._timer.span(f"driver.{name}"):
+                return getattr(self._driver, name)
+
+        attribute = getattr(self._driver, name)
+        if name in TIMED_DRIVER_METHODS:
+            return self._timer.wrap(attribute, f"driver.{name}")
+        return attribute
@@ -5,6 +5,7 @@ import logging
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
 from scraper import selenium_config
+from scraper.block_detector import BlockedPageException, detect_block
 
 
 class OutOfStockException(Exception):
@@ -77,6 +78,12 @@ class AmazonProductScraper:
     def open_page(self):
         self.log(f"🌐 Öffne Produktseite: {self.asin} ({self.url})")
         self.driver.get(self.url)
+
+        block_type = detect_block(self.driver.page_source)
+        if block_type:
+            self.log(f"\t🛑 Sperrseite erkannt ({block_type})")
+            raise BlockedPageException(f"{self.asin} blocked by Amazon ({block_type})", block_type)
+
         #self.scroll_down()
         self.product_info_box_content = self.get_product_infos_box_content()
         self.technical_details_box_content = self.get_technical_details_box_content()
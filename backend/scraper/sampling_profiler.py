@@ -0,0 +1,105 @@
+"""
+Opt-in Sampling-Profiler für Orchestrator-Läufe.
+
+Ein Hintergrund-Thread liest alle `SCRAPER_PROFILE_INTERVAL_MS` den Stack des Orchestrator-Threads
+(sys._current_frames) und zählt gleiche Stacks. Das Ergebnis landet als `profile-<run>.folded`
+neben den Run-Logs – im "folded"-Format von flamegraph.pl, direkt ladbar in speedscope.app.
+
+Gemessen wird Wall-Clock-Zeit: Warten auf Selenium, Throttle oder DB taucht genauso auf wie CPU.
+Einschalten per `SCRAPER_PROFILE=1` oder zur Laufzeit über `PUT /scraping/profiling`.
+"""
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+PROFILE_DIR = Path(__file__).resolve().parent / "logs"
+PROFILE_INTERVAL_MS = float(os.getenv("SCRAPER_PROFILE_INTERVAL_MS", "10"))
+PROFILE_MAX_DEPTH = 128
+
+# None = Einstellung aus der Umgebung, sonst vom Admin gesetzt
+_override: Optional[bool] = None
+
+
+def profiling_from_env() -> bool:
+    return os.getenv("SCRAPER_PROFILE", "").lower() in ("1", "true", "yes")
+
+
+def profiling_enabled() -> bool:
+    return profiling_from_env() if _override is None else _override
+
+
+def set_profiling(enabled: Optional[bool]) -> None:
+    global _override
+    _override = enabled
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    # Erste Zeile der Funktion statt aktueller Zeile – sonst zerfällt eine Funktion in viele Stacks
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame) -> str:
+    labels = []
+    while frame is not None and len(labels) < PROFILE_MAX_DEPTH:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """Zählt Stacks eines Threads in festen Intervallen; `stop()` beendet den Sampler-Thread."""
+
+    def __init__(self, thread_id: Optional[int] = None, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval_ms / 1000
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[fold_stack(frame)] += 1
+            del frame
+
+    def write_folded(self, path) -> Path:
+        path = Path(path)
+        lines = [f"{stack} {count}" for stack, count in self.samples.most_common()]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return path
+
+
+@contextmanager
+def profile_run(run: str, profile_dir: Path = PROFILE_DIR):
+    """Profiliert den Block, wenn Profiling eingeschaltet ist; sonst ohne jeden Overhead."""
+    if not profiling_enabled():
+        yield None
+        return
+
+    profiler = SamplingProfiler().start()
+    logging.info(f"📈 Sampling-Profiler aktiv (alle {profiler.interval * 1000:.0f} ms)")
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        try:
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            path = profiler.write_folded(profile_dir / f"profile-{run}.folded")
+            logging.info(f"📈 Profil mit {sum(profiler.samples.values())} Samples: {path}")
+        except OSError as e:
+            logging.error(f"❌ Profil konnte nicht geschrieben werden: {e}")
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Module, die nur die Scraping-Jobs brauchen – die API darf sie beim Start nicht laden
+SCRAPER_ONLY_MODULES = (
+    "selenium", "webdriver_manager", "scraper.Product_Orchestrator", "scraper.Market_Orchestrator",
+    "scraper.first_page_amazon_scraper", "scraper.product_selenium_scraper",
+)
+
+
+def test_api_import_does_not_load_browser_automation(tmp_path):
+    # Eigener Prozess: andere Tests haben Selenium in diesem Interpreter längst importiert
+    code = (
+        "import sys, app.main\n"
+        f"print('loaded:', [name for name in {SCRAPER_ONLY_MODULES!r} if name in sys.modules])\n"
+    )
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'startup.db'}", "LOG_DIR": str(tmp_path)}
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "loaded: []"
+
+
+def test_in_memory_sqlite_engine_starts_without_pool_sizing():
+    # SingletonThreadPool kennt pool_size/max_overflow nicht – Import darf daran nicht scheitern
+    code = "import app.database as d\nprint(type(d.engine.pool).__name__, d.pool_kwargs('sqlite:///file.db'))\n"
+    env = {**os.environ, "DATABASE_URL": "sqlite://"}
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == \
+        "SingletonThreadPool {'pool_size': 20, 'max_overflow': 30}"
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+from app.auth import get_current_user
+from app.models import User
+from app.routes import scraping
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from scraper.block_detector import AdaptiveThrottle, BlockedPageException, detect_block
+
+CAPTCHA_PAGE = """
+<html><body>
+<h4>Enter the characters you see below</h4>
+<form method="get" action="/errors/validateCaptcha" name=""></form>
+</body></html>
+"""
+
+ROBOT_PAGE = """
+<html><body>
+<p>Sorry, we just need to make sure you're not a robot.</p>
+<p>To discuss automated access to Amazon data please contact api-services-support@amazon.com.</p>
+</body></html>
+"""
+
+SORRY_PAGE = "<html><title>Sorry! Something went wrong!</title><body><img alt='Dogs of Amazon'></body></html>"
+
+PRODUCT_PAGE = "<html><body><span id='productTitle'>Creatine Monohydrate</span>" + "x" * 1000 + "</body></html>"
+
+
+@pytest.mark.parametrize("html, expected", [
+    (CAPTCHA_PAGE, "captcha"),
+    (ROBOT_PAGE, "robot_check"),
+    (SORRY_PAGE, "sorry_page"),
+    (PRODUCT_PAGE, None),
+    ("", None),
+])
+def test_detect_block(html, expected):
+    assert detect_block(html) == expected
+
+
+def test_large_pages_are_never_blocks():
+    """Echte Produktseiten sind groß – Marker im Fließtext dürfen keinen Fehlalarm auslösen."""
+    html = PRODUCT_PAGE + "enter the characters you see below" + "y" * 100_000
+    assert detect_block(html) is None
+
+
+def test_aimd_increases_on_success_and_halves_on_block():
+    throttle = AdaptiveThrottle(initial_limit=4.0, max_limit=8.0, base_interval=0.0, cooldown=0.0)
+
+    for _ in range(4):
+        with throttle.slot():
+            pass
+    assert throttle.limit > 4.0
+
+    limit_before = throttle.limit
+    with pytest.raises(BlockedPageException):
+        with throttle.slot():
+            raise BlockedPageException("blocked", "captcha")
+    assert throttle.limit == pytest.approx(limit_before / 2)
+    assert throttle.total_blocks == 1
+
+
+def test_high_block_rate_pauses_and_requests_rotation():
+    throttle = AdaptiveThrottle(base_interval=0.0, min_samples=4, rotate_threshold=0.25,
+                                pause_threshold=0.5, cooldown=30.0)
+    for blocked in (False, False, False, True):
+        throttle.acquire()
+        throttle.release(blocked=blocked)
+    assert throttle.should_rotate()
+    assert throttle.stats()["paused_for"] == 0
+
+    for _ in range(2):
+        throttle.acquire()
+        throttle.release(blocked=True)
+    assert throttle.stats()["paused_for"] > 0
+
+
+def test_rotation_only_counts_requests_of_the_new_session():
+    throttle = AdaptiveThrottle(base_interval=0.0, min_samples=3, rotate_threshold=0.1, pause_threshold=1.1)
+    for _ in range(3):
+        throttle.acquire()
+        throttle.release(blocked=True)
+    assert throttle.should_rotate()
+
+    throttle.note_rotation()
+    for blocked in (True, True):
+        throttle.acquire()
+        throttle.release(blocked=blocked)
+        assert not throttle.should_rotate()
+
+    throttle.acquire()
+    throttle.release(blocked=False)
+    assert throttle.should_rotate()  # 2 von 3 Requests der neuen Session gesperrt
+
+
+def test_concurrency_never_exceeds_limit():
+    throttle = AdaptiveThrottle(initial_limit=2.0, max_limit=2.0, base_interval=0.0)
+    peak = 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal peak
+        with throttle.slot():
+            with lock:
+                peak = max(peak, throttle.in_flight)
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak <= 2
+    assert throttle.in_flight == 0
+
+
+@pytest.mark.parametrize("username, status", [("admin", 200), ("alice", 403)])
+def test_throttle_stats_route_is_admin_only(username, status):
+    app = FastAPI()
+    app.include_router(scraping.router, prefix="/scraping")
+    app.dependency_overrides[get_current_user] = lambda: User(username=username, email=f"{username}@example.com")
+
+    response = TestClient(app).get("/scraping/throttle")
+    assert response.status_code == status
+    if status == 200:
+        assert "block_rate" in response.json()
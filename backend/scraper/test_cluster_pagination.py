@@ -0,0 +1,109 @@
+import pytest
+from app.auth import get_current_user
+from app.cache import response_cache
+from app.database import get_db
+from app.models import User
+from app.routes import market_clusters
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from scraper.test_query_budgets import seed_cluster
+
+PRODUCTS_PER_MARKET = 11
+
+
+@pytest.fixture
+def api(session_factory):
+    with session_factory() as session:
+        ids = seed_cluster(session, PRODUCTS_PER_MARKET)
+
+    def override_db():
+        with session_factory() as session:
+            yield session
+
+    def override_user():
+        with session_factory() as session:
+            return session.get(User, ids["user_id"])
+
+    app = FastAPI()
+    app.include_router(market_clusters.router, prefix="/market-clusters")
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = override_user
+    response_cache.clear()
+    yield TestClient(app), ids
+    response_cache.clear()
+
+
+def products_url(ids):
+    return f"/market-clusters/{ids['cluster_id']}/markets/{ids['market_id']}/products"
+
+
+def collect_pages(client, url, limit):
+    """Folgt `next_cursor` bis zum Ende; gibt alle ASINs in Seitenreihenfolge zurück"""
+    asins, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit} if cursor is None else {"limit": limit, "after": cursor}
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["products"]) <= limit
+        asins.extend(product["asin"] for product in body["products"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return asins, pages
+
+
+@pytest.mark.parametrize("limit", [1, 3, PRODUCTS_PER_MARKET, 50])
+def test_paging_covers_all_products_without_duplicates_or_gaps(api, limit):
+    client, ids = api
+    unpaged = client.get(products_url(ids)).json()
+    expected = [product["asin"] for product in unpaged["products"]]
+    assert len(expected) == unpaged["products_in_market_count"] == PRODUCTS_PER_MARKET
+
+    asins, pages = collect_pages(client, products_url(ids), limit)
+
+    assert asins == expected
+    assert len(set(asins)) == len(asins)
+    assert pages == -(-PRODUCTS_PER_MARKET // limit)
+
+
+def test_cluster_details_cursor_continues_on_market_endpoint(api):
+    client, ids = api
+    details = client.get(f"/market-clusters/{ids['cluster_id']}", params={"limit": 4}).json()
+    market = next(market for market in details["markets"] if market["id"] == ids["market_id"])
+    assert len(market["products"]) == 4
+
+    rest = client.get(products_url(ids), params={"limit": 50, "after": market["next_cursor"]}).json()
+    asins = [product["asin"] for product in market["products"] + rest["products"]]
+
+    assert rest["next_cursor"] is None
+    assert sorted(asins) == asins
+    assert len(set(asins)) == PRODUCTS_PER_MARKET
+
+
+def test_fields_projection_always_keeps_cursor(api):
+    client, ids = api
+    body = client.get(products_url(ids), params={"limit": 2, "fields": "title, price"}).json()
+
+    assert [set(product) for product in body["products"]] == [{"asin", "title", "price"}] * 2
+    assert body["next_cursor"] == body["products"][-1]["asin"]
+
+
+@pytest.mark.parametrize("params", [
+    {"after": "M0P1; DROP TABLE products"},
+    {"after": ""},
+    {"after": "m0p1"},
+    {"fields": "asin,secret"},
+    {"fields": "sparkline_data_unknown"},
+])
+def test_invalid_cursor_or_fields_are_rejected(api, params):
+    client, ids = api
+    assert client.get(products_url(ids), params=params).status_code == 400
+    assert client.get(f"/market-clusters/{ids['cluster_id']}", params=params).status_code == 400
+
+
+def test_unknown_market_or_foreign_cluster(api):
+    client, ids = api
+    url = f"/market-clusters/{ids['cluster_id']}/markets/999/products"
+    assert client.get(url).status_code == 404
+    assert client.get(f"/market-clusters/999/markets/{ids['market_id']}/products").status_code == 404
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from app.credits import apply_credit_change
+from app.models import CreditTransaction, User
+from sqlalchemy import event
+
+
+@pytest.fixture(autouse=True)
+def alice(session_factory):
+    with session_factory() as session:
+        session.add(User(id=1, username="alice", email="alice@example.com", hashed_password="x", credits=10))
+        session.commit()
+
+
+def balance(factory, user_id=1):
+    with factory() as session:
+        return session.get(User, user_id).credits
+
+
+def test_debit_and_ledger(session_factory):
+    with session_factory() as session:
+        assert apply_credit_change(session, 1, -4, "reduce") == 6
+        assert apply_credit_change(session, 1, 5, "admin_add", actor_id=1) == 11
+        ledger = session.query(CreditTransaction).order_by(CreditTransaction.id).all()
+
+    assert [(entry.amount, entry.balance_after, entry.reason) for entry in ledger] == [
+        (-4, 6, "reduce"), (5, 11, "admin_add")
+    ]
+
+
+def test_debit_never_overdraws(session_factory):
+    with session_factory() as session:
+        assert apply_credit_change(session, 1, -11, "reduce") is None
+        assert session.query(CreditTransaction).count() == 0
+    assert balance(session_factory) == 10
+
+
+def test_unknown_user(session_factory):
+    with session_factory() as session:
+        assert apply_credit_change(session, 99, 5, "add") is None
+
+
+def test_debit_is_single_update(session_factory):
+    with session_factory() as session:
+        statements = []
+
+        @event.listens_for(session.get_bind(), "before_cursor_execute")
+        def _collect(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        apply_credit_change(session, 1, -1, "reduce")
+
+    assert statements[0].startswith("UPDATE users") and "RETURNING" in statements[0]
+    assert len(statements) == 2  # UPDATE ... RETURNING + Ledger-INSERT
+
+
+def test_concurrent_debits_are_exact(session_factory):
+    def debit():
+        with session_factory() as session:
+            return apply_credit_change(session, 1, -1, "reduce")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: debit(), range(25)))
+
+    assert sum(result is not None for result in results) == 10
+    assert balance(session_factory) == 0
+    with session_factory() as session:
+        assert session.query(CreditTransaction).count() == 10
@@ -0,0 +1,112 @@
+from datetime import date, datetime
+
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+import pytest
+from app.auth import get_current_user
+from app.database import get_db
+from app.export import export_product_changes, read_watermark
+from app.models import Market, MarketCluster, Product, ProductChange, User
+from app.routes import products
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+DAY_ONE, DAY_TWO, DAY_THREE = datetime(2025, 5, 1, 9), datetime(2025, 5, 2, 9), datetime(2025, 5, 3, 9)
+
+
+@pytest.fixture
+def db(db):
+    """Cluster 1 enthält nur A1; A2 liegt außerhalb."""
+    cluster = MarketCluster(id=1, title="Küche", user=User(username="alice", email="a@example.com", hashed_password="x"))
+    cluster.markets.append(Market(keyword="schneidebrett", products=[Product(asin="A1")]))
+    db.add_all([cluster, Product(asin="A2")])
+    add_changes(db, [("A1", DAY_ONE, 10.0), ("A2", DAY_ONE, 20.0), ("A1", DAY_TWO, 11.0)])
+    return db
+
+
+def add_changes(db, rows):
+    db.add_all(ProductChange(asin=asin, change_date=day, changes="price", price=price) for asin, day, price in rows)
+    db.commit()
+
+
+def partitions(output_dir) -> dict:
+    """{tag: [(asin, preis), ...]} über alle Parquet-Dateien der Tagespartitionen"""
+    result = {}
+    for path in sorted(output_dir.glob("day=*/part-*.parquet")):
+        table = pq.read_table(path)
+        result.setdefault(path.parent.name.removeprefix("day="), []).extend(
+            zip(table.column("asin").to_pylist(), table.column("price").to_pylist()))
+    return result
+
+
+def test_incremental_export_only_appends_new_rows(db, tmp_path):
+    first = export_product_changes(db, tmp_path, incremental=True)
+    assert first["rows"] == 3
+    assert partitions(tmp_path) == {"2025-05-01": [("A1", 10.0), ("A2", 20.0)], "2025-05-02": [("A1", 11.0)]}
+    assert read_watermark(tmp_path)["last_id"] == first["last_id"] == 3
+
+    add_changes(db, [("A2", DAY_TWO, 21.0), ("A1", DAY_THREE, 12.0)])
+    second = export_product_changes(db, tmp_path, incremental=True)
+
+    assert second["rows"] == 2
+    assert len(second["files"]) == 2
+    assert partitions(tmp_path) == {
+        "2025-05-01": [("A1", 10.0), ("A2", 20.0)],
+        "2025-05-02": [("A1", 11.0), ("A2", 21.0)],
+        "2025-05-03": [("A1", 12.0)],
+    }
+    assert read_watermark(tmp_path)["last_id"] == 5
+
+
+def test_incremental_export_without_new_rows_keeps_watermark(db, tmp_path):
+    export_product_changes(db, tmp_path, incremental=True)
+    watermark = read_watermark(tmp_path)
+
+    summary = export_product_changes(db, tmp_path, incremental=True)
+
+    assert (summary["rows"], summary["files"]) == (0, [])
+    assert read_watermark(tmp_path) == watermark
+
+
+def test_cluster_and_date_slice(db, tmp_path):
+    summary = export_product_changes(db, tmp_path, cluster_id=1, start=date(2025, 5, 2), end=date(2025, 5, 2))
+    assert summary["rows"] == 1
+    assert partitions(tmp_path) == {"2025-05-02": [("A1", 11.0)]}
+
+
+def test_arrow_format(db, tmp_path):
+    summary = export_product_changes(db, tmp_path, file_format="arrow")
+    tables = [pa_ipc.open_file(path).read_all() for path in summary["files"]]
+    assert sum(table.num_rows for table in tables) == 3
+    assert all(path.endswith(".arrow") for path in summary["files"])
+
+
+@pytest.fixture
+def client(db, session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(products, "EXPORT_DIR", tmp_path)
+
+    def override_db():
+        with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(products.router, prefix="/products")
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: User(username="admin", email="admin@example.com")
+    return TestClient(app)
+
+
+def test_export_route_writes_slice_to_own_folder(client, tmp_path):
+    response = client.post("/products/export-product-changes", json={"cluster_id": 1})
+    assert response.status_code == 200
+    assert response.json()["rows"] == 2
+    assert partitions(tmp_path / "cluster-1") == {"2025-05-01": [("A1", 10.0)], "2025-05-02": [("A1", 11.0)]}
+
+    # Zweiter Aufruf ist inkrementell (Standard) – nichts Neues
+    assert client.post("/products/export-product-changes", json={"cluster_id": 1}).json()["rows"] == 0
+
+
+def test_export_route_rejects_non_admins_and_unknown_formats(client):
+    assert client.post("/products/export-product-changes", json={"format": "csv"}).status_code == 400
+    client.app.dependency_overrides[get_current_user] = lambda: User(username="alice", email="a@example.com")
+    assert client.post("/products/export-product-changes", json={}).status_code == 403
@@ -0,0 +1,90 @@
+import pytest
+from scraper.block_detector import detect_block
+from scraper.fake_webdriver import FakeNetwork, FakeWebDriver, RecordedPages, fake_driver_factory
+from scraper.first_page_amazon_scraper import AmazonFirstPageScraper
+from scraper.product_selenium_scraper import AmazonProductScraper
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from selenium.webdriver.common.by import By
+
+PRODUCT_TEMPLATE = """<html><head><title>Schneidebrett</title></head><body>
+<div id="centerCol">
+  <span id="productTitle">Bambus Schneidebrett {{asin}}</span>
+  <a id="bylineInfo">Visit the Kitchen Pro Store</a>
+  <div id="socialProofingAsinFaceout_feature_div"><div>2K+ bought in past month</div></div>
+  <div id="apex_offerDisplay_desktop"><span class="a-price"><span class="a-offscreen">$24.99</span></span></div>
+</div>
+<div id="imgTagWrapperId"><img src="https://m.media-amazon.com/images/I/{{asin}}.jpg"></div>
+<input id="add-to-cart-button" type="submit">
+<div id="detailBulletsWrapper_feature_div"><ul>
+  <li><span>Customer Reviews: 4.6 1,234 ratings</span></li>
+  <li><span>Best Sellers Rank: #1,532 in Home &amp; Kitchen (See Top 100) #12 in Cutting Boards</span></li>
+</ul></div>
+<div class="a-section"><h2>Technical Details</h2><table><tr><th>Manufacturer</th><td>Bamboo Co</td></tr></table></div>
+</body></html>"""
+
+HOME_PAGE = """<html><body><form action="/s">
+<input role="searchbox" name="k">
+<div id="sac-autocomplete-results-container"><div>garden hose 50ft</div><div>garden hose reel</div><div>lawn mower</div></div>
+</form></body></html>"""
+
+SEARCH_PAGE = """<html><body>
+<div data-asin="B000000001"><h2>Hose A</h2><span class="a-price"><span class="a-offscreen">$19.99</span></span></div>
+<div data-asin=""><h2>Werbung</h2></div>
+<div data-asin="B000000002"><h2>Hose B</h2><span class="a-price-whole">7</span><span class="a-price-fraction">50</span></div>
+</body></html>"""
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    (tmp_path / "dp.html").write_text(PRODUCT_TEMPLATE, encoding="utf-8")
+    (tmp_path / "index.html").write_text(HOME_PAGE, encoding="utf-8")
+    (tmp_path / "s.html").write_text(SEARCH_PAGE, encoding="utf-8")
+    return RecordedPages(tmp_path)
+
+
+def test_product_scraper_extracts_recorded_page(recorded):
+    scraper = AmazonProductScraper(FakeWebDriver(recorded), show_details=False)
+    data = scraper.get_product_infos("B0CT2R7199")
+
+    assert data["title"] == "Bambus Schneidebrett B0CT2R7199"
+    assert (data["price"], data["blm"], data["total"]) == (24.99, 2000, 49980.0)
+    assert (data["main_category"], data["main_category_rank"]) == ("Home & Kitchen", 1532)
+    assert (data["second_category"], data["second_category_rank"]) == ("Cutting Boards", 12)
+    assert (data["review_count"], data["rating"]) == (1234, 4.6)
+    assert data["store"] == "Kitchen Pro"
+    assert data["manufacturer"] == "Bamboo Co"
+    assert data["img_path"].endswith("/B0CT2R7199.jpg")
+
+
+def test_first_page_scraper_submits_search_form(recorded):
+    scraper = AmazonFirstPageScraper(show_details=False, driver_factory=fake_driver_factory(recorded), pause_scale=0)
+    result = scraper.get_first_page_data("garden hose")
+
+    assert result["top_search_suggestions"] == ["garden hose 50ft", "garden hose reel"]
+    assert [(p["asin"], p["price"], p["title"]) for p in result["first_page_products"]] == [
+        ("B000000001", 19.99, "Hose A"), ("B000000002", 7.5, "Hose B")]
+    assert scraper.driver is None
+
+
+def test_element_queries_follow_selenium_semantics(recorded):
+    driver = FakeWebDriver(recorded)
+    driver.get("https://www.amazon.com/")
+    container = driver.find_element(By.ID, "sac-autocomplete-results-container")
+
+    assert container.text.split("\n") == ["garden hose 50ft", "garden hose reel", "lawn mower"]
+    assert len(container.find_elements(By.CSS_SELECTOR, "div")) == 3
+    assert container.find_element(By.XPATH, "./ancestor::form").get_attribute("action") == "/s"
+    with pytest.raises(NoSuchElementException):
+        driver.find_element(By.XPATH, '//*[@id="productTitle"]')
+
+
+def test_network_simulates_failures_blocks_and_latency(recorded):
+    failing = FakeWebDriver(recorded, FakeNetwork(failure_rate=1.0))
+    with pytest.raises(WebDriverException):
+        failing.get("https://www.amazon.com/dp/B0CT2R7199")
+
+    network = FakeNetwork(latency=0.01, block_rate=1.0, seed=1)
+    driver = FakeWebDriver(recorded, network)
+    driver.get("https://www.amazon.com/dp/B0CT2R7199")
+    assert detect_block(driver.page_source) == "captcha"
+    assert network.stats() == {"requests": 1, "failures": 0, "blocks": 1, "seconds": 0.01}
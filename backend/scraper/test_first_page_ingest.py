@@ -0,0 +1,65 @@
+import pytest
+from app.models import (Market, MarketChange, Product, ProductChange, market_change_products,
+                        market_products)
+from app.query_stats import assert_max_queries
+from app.routes.scraping import ingest_first_page_products
+from sqlalchemy import event, func, select
+
+# auf den aktuellen Stand gesetzt – darf nicht mit der Anzahl Produkte wachsen
+INGEST_QUERY_BUDGET = 10
+
+
+@pytest.fixture
+def market(db):
+    market = Market(keyword="kaffeetasse")
+    stale = Product(asin="OLD0000000")
+    existing = Product(asin="B000000000")
+    market.products.extend([stale, existing])
+    db.add(market)
+    db.commit()
+    return market
+
+
+def first_page(count):
+    return [{"asin": f"B{index:09d}", "title": f"Tasse {index}", "price": 9.99 + index} for index in range(count)]
+
+
+def count_commits(session):
+    commits = []
+    event.listen(session, "after_commit", lambda _: commits.append(True))
+    return commits
+
+
+def test_duplicates_and_existing_asins_are_written_once(db, market):
+    products = first_page(3) + [{"asin": "B000000001", "title": "Duplikat"}]
+
+    ingest_first_page_products(db, market, products, ["tasse groß", "tasse klein"])
+
+    asins = ["B000000000", "B000000001", "B000000002"]
+    assert db.scalar(select(func.count()).select_from(Product).where(Product.asin.in_(asins))) == 3
+    # vorhandene Verknüpfungen bleiben, neue kommen genau einmal dazu
+    assert sorted(db.scalars(select(market_products.c.asin).where(market_products.c.market_id == market.id))) == \
+        asins + ["OLD0000000"]
+    # erster Treffer gewinnt, der Duplikat-Eintrag erzeugt keinen zweiten Change
+    changes = db.query(ProductChange).order_by(ProductChange.asin).all()
+    assert [(change.asin, change.title) for change in changes] == [
+        ("B000000000", "Tasse 0"), ("B000000001", "Tasse 1"), ("B000000002", "Tasse 2")]
+
+    market_change = db.query(MarketChange).filter(MarketChange.market_id == market.id).one()
+    assert sorted(market_change.new_asins) == asins
+    assert market_change.top_suggestion_list == ["tasse groß", "tasse klein"]
+    assert sorted(db.scalars(select(market_change_products.c.asin).where(
+        market_change_products.c.market_change_id == market_change.id))) == asins
+
+
+@pytest.mark.parametrize("product_count", [5, 50])
+def test_ingest_uses_one_commit_and_constant_queries(db, market, product_count):
+    engine = db.get_bind()
+    commits = count_commits(db)
+
+    with assert_max_queries(engine, INGEST_QUERY_BUDGET):
+        ingest_first_page_products(db, market, first_page(product_count), ["tasse"])
+
+    assert len(commits) == 1
+    assert db.scalar(select(func.count()).select_from(ProductChange)) == product_count
+
@@ -0,0 +1,49 @@
+import gzip
+
+import pytest
+from app.auth import get_current_user
+from app.models import User
+from app.routes import scraping
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    (tmp_path / "fails-2025-05-01_10-00-00.txt").write_text("❌ Scraping Fehler\n", encoding="utf-8")
+    (tmp_path / "scraper.jsonl.2025-05-01.gz").write_bytes(gzip.compress(b'{"level": "INFO"}\n'))
+    (tmp_path / "profile-products-1.folded").write_text("main;scrape 3\n", encoding="utf-8")
+    monkeypatch.setattr(scraping, "LOGS_DIR", tmp_path)
+
+    app = FastAPI()
+    app.include_router(scraping.router, prefix="/scraping")
+    app.dependency_overrides[get_current_user] = lambda: User(username="admin", email="admin@example.com")
+    return TestClient(app)
+
+
+def test_lists_all_log_files(client):
+    assert client.get("/scraping/logs").json() == [
+        "scraper.jsonl.2025-05-01.gz", "profile-products-1.folded", "fails-2025-05-01_10-00-00.txt"]
+
+
+@pytest.mark.parametrize("filename, media_type", [
+    ("fails-2025-05-01_10-00-00.txt", "text/plain; charset=utf-8"),
+    ("profile-products-1.folded", "text/plain; charset=utf-8"),
+    ("scraper.jsonl.2025-05-01.gz", "application/gzip"),
+])
+def test_media_type_follows_suffix(client, filename, media_type):
+    response = client.get(f"/scraping/logs/{filename}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == media_type
+
+
+def test_gzip_archive_is_served_unchanged(client):
+    response = client.get("/scraping/logs/scraper.jsonl.2025-05-01.gz")
+    assert "attachment" in response.headers["content-disposition"]
+    assert gzip.decompress(response.content) == b'{"level": "INFO"}\n'
+
+
+def test_logs_are_admin_only(client):
+    client.app.dependency_overrides[get_current_user] = lambda: User(username="alice", email="alice@example.com")
+    assert client.get("/scraping/logs").status_code == 403
+    assert client.get("/scraping/logs/fails-2025-05-01_10-00-00.txt").status_code == 403
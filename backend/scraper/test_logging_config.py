@@ -0,0 +1,91 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueListener
+
+from app.logging_config import (CompressingRotatingFileHandler, ContextQueueHandler, JsonFormatter,
+                                log_context)
+
+
+def make_logger(tmp_path, max_bytes=0, rotate_seconds=0, retention_seconds=0):
+    handler = CompressingRotatingFileHandler(
+        tmp_path / "scraper.jsonl", max_bytes=max_bytes, rotate_seconds=rotate_seconds,
+        backup_count=5, retention_seconds=retention_seconds)
+    handler.setFormatter(JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+
+    logger = logging.getLogger(f"test-{tmp_path.name}")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.handlers = [ContextQueueHandler(log_queue)]
+    return logger, listener, handler
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_json_lines_with_context_and_exception(tmp_path):
+    logger, listener, handler = make_logger(tmp_path)
+    with log_context(run="products-1", cluster_id=3):
+        logger.info("📦 Scrape %s", "B0TEST")
+        try:
+            raise ValueError("kaputt")
+        except ValueError:
+            logger.exception("❌ Fehler")
+    logger.warning("ohne Kontext", extra={"asin": "B0X"})
+    listener.stop()
+    handler.close()
+
+    first, second, third = read_lines(tmp_path / "scraper.jsonl")
+    assert first["msg"] == "📦 Scrape B0TEST"
+    assert first["run"] == "products-1" and first["cluster_id"] == 3
+    assert "ValueError: kaputt" in second["exc"]
+    assert "run" not in third and third["asin"] == "B0X"
+
+
+def test_long_messages_are_truncated(tmp_path):
+    logger, listener, handler = make_logger(tmp_path)
+    logger.debug("x" * 10_000)
+    listener.stop()
+    handler.close()
+
+    entry = read_lines(tmp_path / "scraper.jsonl")[0]
+    assert len(entry["msg"]) < 2100 and entry["msg"].endswith("Zeichen gekürzt]")
+
+
+def test_size_rotation_compresses_archives(tmp_path):
+    logger, listener, handler = make_logger(tmp_path, max_bytes=500)
+    for index in range(40):
+        logger.info("Zeile %d", index)
+    listener.stop()
+    handler.close()
+
+    archives = sorted(tmp_path.glob("scraper.jsonl.*.gz"))
+    assert archives
+    with gzip.open(archives[0], "rt", encoding="utf-8") as archive:
+        assert json.loads(archive.readline())["msg"].startswith("Zeile")
+
+
+def test_time_rotation_and_retention(tmp_path):
+    old_archive = tmp_path / "scraper.jsonl.5.gz"
+    old_archive.write_bytes(gzip.compress(b"{}\n"))
+    os.utime(old_archive, (time.time() - 3600, time.time() - 3600))
+
+    logger, listener, handler = make_logger(tmp_path, rotate_seconds=60, retention_seconds=600)
+    logger.info("vorher")
+    listener.stop()
+    handler.opened_at -= 120
+    listener.start()
+    logger.info("nachher")
+    listener.stop()
+    handler.close()
+
+    assert read_lines(tmp_path / "scraper.jsonl")[0]["msg"] == "nachher"
+    assert (tmp_path / "scraper.jsonl.1.gz").exists()
+    assert not old_archive.exists()
@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+from app import auth
+from app.database import get_db
+from app.models import User
+from app.routes import users
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from passlib.hash import bcrypt
+
+LOW_ROUNDS = 4
+
+
+@pytest.fixture
+def client(session_factory):
+    with session_factory() as session:
+        session.add(User(id=2, username="alice", email="alice@example.com", is_verified=True,
+                         hashed_password=bcrypt.using(rounds=LOW_ROUNDS).hash("geheim")))
+        session.commit()
+
+    def override_db():
+        with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(users.router, prefix="/users")
+    app.dependency_overrides[get_db] = override_db
+    return TestClient(app)
+
+
+def stored_hash(session_factory):
+    with session_factory() as session:
+        return session.get(User, 2).hashed_password
+
+
+def login(client, password):
+    return client.post("/users/token", data={"username": "alice", "password": password})
+
+
+def test_login_upgrades_hash_with_lower_rounds(client, session_factory, monkeypatch):
+    threads = []
+    verify_and_update = auth.pwd_context.verify_and_update
+
+    def recording_verify(*args):
+        threads.append(threading.current_thread().name)
+        return verify_and_update(*args)
+
+    monkeypatch.setattr(auth.pwd_context, "verify_and_update", recording_verify)
+    old_hash = stored_hash(session_factory)
+
+    assert login(client, "geheim").status_code == 200
+
+    new_hash = stored_hash(session_factory)
+    assert bcrypt.from_string(old_hash).rounds == LOW_ROUNDS
+    assert bcrypt.from_string(new_hash).rounds == auth.BCRYPT_ROUNDS
+    assert auth.verify_password("geheim", new_hash)
+    # bcrypt läuft im eigenen Passwort-Pool, nicht im Event-Loop
+    assert threads and all(name.startswith("password-hash") for name in threads)
+
+    # aktueller Hash → kein weiteres Update
+    assert login(client, "geheim").status_code == 200
+    assert stored_hash(session_factory) == new_hash
+
+
+def test_wrong_password_keeps_old_hash(client, session_factory):
+    old_hash = stored_hash(session_factory)
+
+    assert login(client, "falsch").status_code == 401
+    assert stored_hash(session_factory) == old_hash
@@ -0,0 +1,122 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from app.database import get_db
+from app.models import Base, Market, MarketChange
+from app.routes import products
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[1] / "alembic"
+BEFORE = "add_review_count_and_rating"
+REVISION = "normalize_market_change_lists"
+
+
+def alembic_config(url: str) -> Config:
+    # ohne alembic.ini – sonst stellt env.py per fileConfig das Logging der Tests um
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def create_legacy_schema(engine):
+    """Schema vor der Migration: Kommalisten direkt in market_changes, keine Zeilentabellen"""
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE market_change_suggestions"))
+        conn.execute(text("DROP TABLE market_change_asins"))
+        for column in ("new_products", "removed_products", "top_suggestions"):
+            conn.execute(text(f"ALTER TABLE market_changes ADD COLUMN {column} VARCHAR"))
+        conn.execute(text("INSERT INTO markets (id, keyword) VALUES (1, 'tasse'), (2, 'becher')"))
+        conn.execute(text(
+            "INSERT INTO market_changes (id, market_id, change_date, new_products, removed_products, top_suggestions) "
+            "VALUES (1, 1, '2025-04-01 10:00:00', 'A1,A2,A1', '', 'tasse groß,tasse klein'), "
+            "(2, 1, '2025-04-02 10:00:00', 'A3', 'A2', NULL), "
+            "(3, 2, '2025-04-02 11:00:00', NULL, NULL, ',becher,')"
+        ))
+        conn.execute(text("INSERT INTO products (asin) VALUES ('A1'), ('A3')"))
+        conn.execute(text("INSERT INTO market_change_products (market_change_id, asin) VALUES (1, 'A1'), (2, 'A3')"))
+
+
+def test_migration_backfills_rows_and_downgrade_restores_lists(tmp_path):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine = create_engine(url)
+    create_legacy_schema(engine)
+    config = alembic_config(url)
+    command.stamp(config, BEFORE)
+
+    command.upgrade(config, REVISION)
+
+    with engine.connect() as conn:
+        asins = conn.execute(text(
+            "SELECT market_change_id, market_id, asin, status FROM market_change_asins ORDER BY id")).fetchall()
+        suggestions = conn.execute(text(
+            "SELECT market_change_id, position, suggestion FROM market_change_suggestions ORDER BY id")).fetchall()
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(market_changes)"))}
+        linked = conn.execute(text("SELECT COUNT(*) FROM market_change_products")).scalar()
+    assert [tuple(row) for row in asins] == [
+        (1, 1, "A1", "added"), (1, 1, "A2", "added"), (2, 1, "A3", "added"), (2, 1, "A2", "removed")]
+    assert [tuple(row) for row in suggestions] == [(1, 0, "tasse groß"), (1, 1, "tasse klein"), (3, 0, "becher")]
+    assert not columns & {"new_products", "removed_products", "top_suggestions"}
+    # market_changes wird nicht neu angelegt – abhängige Zeilen überleben trotz foreign_keys=ON
+    assert linked == 2
+
+    command.downgrade(config, BEFORE)
+
+    with engine.connect() as conn:
+        lists = conn.execute(text(
+            "SELECT id, new_products, removed_products, top_suggestions FROM market_changes ORDER BY id")).fetchall()
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+    # Duplikate und leere Einträge gehen beim Upgrade verloren, sonst kommt der alte Stand zurück
+    assert [tuple(row) for row in lists] == [
+        (1, "A1,A2", "", "tasse groß,tasse klein"), (2, "A3", "A2", ""), (3, "", "", "becher")]
+    assert not tables & {"market_change_asins", "market_change_suggestions"}
+    engine.dispose()
+
+
+@pytest.fixture
+def history_api(session_factory):
+    with session_factory() as session:
+        tasse, becher = Market(keyword="tasse"), Market(keyword="becher")
+        session.add_all([tasse, becher])
+        session.flush()
+        for market, day, added, removed in [
+            (tasse, 3, ["A1", "A2"], []),
+            (becher, 5, ["A1"], []),
+            (tasse, 8, ["A3"], ["A1"]),
+        ]:
+            change = MarketChange(market_id=market.id, change_date=datetime(2025, 4, day, 10, 0))
+            change.set_asins(added, removed)
+            change.set_top_suggestions([f"{market.keyword} {day}"])
+            session.add(change)
+        session.commit()
+        market_ids = {"tasse": tasse.id, "becher": becher.id}
+
+    def override_db():
+        with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(products.router, prefix="/products")
+    app.dependency_overrides[get_db] = override_db
+    return TestClient(app), market_ids
+
+
+def test_market_history_lists_entries_and_exits_in_order(history_api):
+    client, market_ids = history_api
+
+    history = client.get("/products/market-history/A1").json()
+
+    assert history == [
+        {"market_id": market_ids["tasse"], "keyword": "tasse", "status": "added", "change_date": "2025-04-03 10:00:00"},
+        {"market_id": market_ids["becher"], "keyword": "becher", "status": "added", "change_date": "2025-04-05 10:00:00"},
+        {"market_id": market_ids["tasse"], "keyword": "tasse", "status": "removed", "change_date": "2025-04-08 10:00:00"},
+    ]
+    filtered = client.get("/products/market-history/A1", params={"market_id": market_ids["becher"]}).json()
+    assert [entry["keyword"] for entry in filtered] == ["becher"]
+    assert client.get("/products/market-history/UNKNOWN").json() == []
@@ -0,0 +1,67 @@
+import pytest
+from app.bulk_ops import ensure_products, linked_asins, sync_association
+from app.models import Market, MarketChange, market_products
+from sqlalchemy import event
+
+
+@pytest.fixture(autouse=True)
+def market(db):
+    db.add(Market(id=1, keyword="creatine"))
+    db.add(MarketChange(id=1, market_id=1))
+    db.commit()
+
+
+def count_queries(session):
+    counter = {"queries": 0}
+
+    @event.listens_for(session.get_bind(), "before_cursor_execute")
+    def _count(*args):
+        counter["queries"] += 1
+
+    return counter
+
+
+def test_sync_adds_missing_and_removes_dropped(db):
+    ensure_products(db, ["A", "B", "C", "D"])
+    sync_association(db, market_products, "market_id", 1, ["A", "B", "C"])
+
+    added, removed = sync_association(db, market_products, "market_id", 1, ["B", "C", "D"], removed_asins=["A"])
+
+    assert added == ["D"]
+    assert removed == ["A"]
+    assert linked_asins(db, market_products, "market_id", 1) == {"B", "C", "D"}
+
+
+def test_sync_keeps_asin_that_is_back_on_first_page(db):
+    ensure_products(db, ["A"])
+    sync_association(db, market_products, "market_id", 1, ["A"])
+
+    added, removed = sync_association(db, market_products, "market_id", 1, ["A"], removed_asins=["A"])
+
+    assert added == [] and removed == []
+    assert linked_asins(db, market_products, "market_id", 1) == {"A"}
+
+
+def test_sync_never_duplicates_rows(db):
+    ensure_products(db, ["A", "B"])
+    sync_association(db, market_products, "market_id", 1, ["A", "B", "A"])
+    sync_association(db, market_products, "market_id", 1, ["A", "B"])
+
+    rows = db.execute(market_products.select()).all()
+    assert len(rows) == 2
+
+
+@pytest.mark.parametrize("market_size", [10, 400])
+def test_query_count_independent_of_market_size(db, market_size):
+    old_asins = [f"OLD{i}" for i in range(market_size)]
+    new_asins = [f"NEW{i}" for i in range(market_size)]
+    ensure_products(db, old_asins)
+    sync_association(db, market_products, "market_id", 1, old_asins)
+
+    counter = count_queries(db)
+    ensure_products(db, new_asins)
+    sync_association(db, market_products, "market_id", 1, new_asins, removed_asins=old_asins)
+
+    # existing_asins + INSERT products + Snapshot + INSERT + DELETE
+    assert counter["queries"] == 5
+    assert linked_asins(db, market_products, "market_id", 1) == set(new_asins)
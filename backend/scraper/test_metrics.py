@@ -0,0 +1,82 @@
+from app.metrics import Registry, RequestMetricsMiddleware, http_request_seconds
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+def test_render_counter_gauge_histogram():
+    registry = Registry()
+    pages = registry.counter("pages_total", "Seiten", ("outcome",))
+    drivers = registry.gauge("drivers", "Driver")
+    latency = registry.histogram("latency_seconds", "Latenz", buckets=(0.1, 1.0))
+
+    pages.inc(outcome="ok")
+    pages.inc(2, outcome="ok")
+    drivers.inc()
+    drivers.dec()
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE pages_total counter" in lines
+    assert 'pages_total{outcome="ok"} 3' in lines
+    assert "drivers 0" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_gauge_collector_replaces_values():
+    registry = Registry()
+    depth = registry.gauge("queue_depth", "Queue", ("status",))
+    jobs = {("queued",): 2, ("products",): 1}
+    depth.set_collector(lambda: jobs)
+
+    assert 'queue_depth{status="queued"} 2' in registry.render()
+    jobs.pop(("queued",))
+    assert 'status="queued"' not in registry.render()
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    failures = registry.counter("failures_total", "Fehler", ("warning_type",))
+    failures.inc(warning_type='a"b\\c')
+    assert 'failures_total{warning_type="a\\"b\\\\c"} 1' in registry.render()
+
+
+def test_middleware_labels_route_template():
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    before = http_request_seconds.count(method="GET", route="/items/{item_id}", status="200")
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/nope")
+
+    assert http_request_seconds.count(method="GET", route="/items/{item_id}", status="200") == before + 2
+    assert http_request_seconds.count(method="GET", route="unmatched", status="404") >= 1
+
+
+def test_route_template_includes_router_prefix():
+    from fastapi import APIRouter
+
+    router = APIRouter()
+
+    @router.get("/{cluster_id}/markets/{market_id}")
+    def get_market(cluster_id: int, market_id: int):
+        return {}
+
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+    app.include_router(router, prefix="/market-clusters")
+
+    route = "/market-clusters/{cluster_id}/markets/{market_id}"
+    before = http_request_seconds.count(method="GET", route=route, status="200")
+    TestClient(app).get("/market-clusters/3/markets/7")
+    assert http_request_seconds.count(method="GET", route=route, status="200") == before + 1
@@ -0,0 +1,67 @@
+import json
+
+from scraper.phase_timer import PhaseTimer, TimedDriver
+
+
+class FakeDriver:
+    page_source = "<html></html>"
+
+    def __init__(self):
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def quit(self):
+        return "quit"
+
+
+class FakeScraper:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def get_location(self):
+        return "Berlin"
+
+    def get_product_infos(self, asin):
+        self.driver.get(f"https://www.amazon.com/dp/{asin}")
+        self.driver.page_source
+        return [self.get_location(), self.get_location()]
+
+
+def test_nested_spans_and_driver_calls_are_counted(tmp_path):
+    timer = PhaseTimer()
+    driver = FakeDriver()
+    scraper = FakeScraper(TimedDriver(driver, timer))
+    timer.instrument(scraper, ("get_product_infos", "get_location"), prefix="scraper.")
+
+    for asin in ("A", "B", "C"):
+        assert scraper.get_product_infos(asin) == ["Berlin", "Berlin"]
+
+    report = timer.summary()
+    assert report["scraper.get_product_infos"]["count"] == 3
+    assert report["scraper.get_location"]["count"] == 6
+    assert report["driver.get"]["count"] == 3
+    assert report["driver.page_source"]["count"] == 3
+    assert driver.visited == [f"https://www.amazon.com/dp/{asin}" for asin in "ABC"]
+
+    path = timer.write_json(tmp_path / "phases.json")
+    assert set(json.loads(path.read_text())["scraper.get_location"]) == {
+        "count", "total_s", "mean_ms", "p50_ms", "p95_ms", "max_ms"
+    }
+
+
+def test_untimed_driver_attributes_pass_through():
+    timer = PhaseTimer()
+    assert TimedDriver(FakeDriver(), timer).quit() == "quit"
+    assert not timer.durations
+
+
+def test_span_records_on_exception():
+    timer = PhaseTimer()
+    try:
+        with timer.span("boom"):
+            raise ValueError()
+    except ValueError:
+        pass
+    assert timer.summary()["boom"]["count"] == 1
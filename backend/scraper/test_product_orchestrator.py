@@ -0,0 +1,92 @@
+import logging
+
+import pytest
+import scraper.Product_Orchestrator as product_orchestrator
+from app import logging_config, scrape_runs
+from app.metrics import active_drivers
+from app.models import Market, MarketCluster, Product, User
+from scraper.block_detector import AdaptiveThrottle
+from scraper.fake_webdriver import FakeNetwork, RecordedPages, fake_driver_factory
+from scraper.sampling_profiler import set_profiling
+from scraper.test_fake_webdriver import PRODUCT_TEMPLATE
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch, session_factory):
+    """Product_Orchestrator auf FakeWebDriver und Test-Datenbank; Logs und Reports landen in tmp_path."""
+    (tmp_path / "dp.html").write_text(PRODUCT_TEMPLATE, encoding="utf-8")
+    monkeypatch.setattr(logging_config, "LOG_DIR", tmp_path / "logs")
+    monkeypatch.setattr(product_orchestrator, "SessionLocal", session_factory)
+    monkeypatch.setattr(scrape_runs, "SessionLocal", session_factory)
+    def create(network=None, **kwargs):
+        return product_orchestrator.Product_Orchestrator(
+            driver_factory=fake_driver_factory(RecordedPages(tmp_path), network or FakeNetwork()), pause_scale=0,
+            logs_dir=tmp_path / "reports", **kwargs)
+
+    return create
+
+
+def seed_cluster(session_factory, asins):
+    with session_factory() as session:
+        cluster = MarketCluster(id=1, title="Küche", user=User(username="alice", email="alice@example.com", hashed_password="x"))
+        cluster.markets.append(Market(keyword="schneidebrett", products=[Product(asin=asin) for asin in asins]))
+        session.add(cluster)
+        session.commit()
+
+
+def test_reports_and_profile_are_written_to_logs_dir(orchestrator, session_factory, tmp_path):
+    seed_cluster(session_factory, ["B0CT2R7199"])
+    run = orchestrator(cluster_to_scrape=1)
+    set_profiling(True)
+    try:
+        run.update_products()
+    finally:
+        set_profiling(None)
+
+    assert run.products_total == 1
+    with session_factory() as session:
+        assert scrape_runs.get_run(session, f"products-{run.timestamp}")["items_succeeded"] == 1
+    assert sorted(path.name for path in (tmp_path / "reports").iterdir()) == [
+        f"phases-{run.timestamp}.json", f"profile-products-{run.timestamp}.folded"]
+
+
+def test_empty_run_closes_driver_once(orchestrator):
+    before = active_drivers.value(scraper="product")
+    run = orchestrator()
+    run.update_products()
+    run.close_driver()
+
+    assert run.products_total == 0
+    assert run.driver is None
+    assert active_drivers.value(scraper="product") == before
+
+
+def test_show_details_only_lowers_log_level_during_run(orchestrator, monkeypatch):
+    root = logging.getLogger()
+    previous = root.level
+    root.setLevel(logging.WARNING)
+    try:
+        run = orchestrator(show_details=True)
+        levels = []
+        monkeypatch.setattr(run, "scrape_products", lambda: levels.append(root.level))
+        run.update_products()
+
+        assert levels == [logging.DEBUG]
+        assert root.level == logging.WARNING
+    finally:
+        root.setLevel(previous)
+
+
+def test_consecutive_blocks_rotate_session_once(orchestrator, session_factory, monkeypatch):
+    seed_cluster(session_factory, [f"B00000000{index}" for index in range(4)])
+    monkeypatch.setattr(product_orchestrator, "throttle", AdaptiveThrottle(
+        base_interval=0.0, min_samples=3, rotate_threshold=0.1, pause_threshold=1.1, cooldown=0.0))
+    run = orchestrator(cluster_to_scrape=1, network=FakeNetwork(block_rate=1.0))
+    rotations = []
+    rotate_session = run.rotate_session
+    monkeypatch.setattr(run, "rotate_session", lambda: rotations.append(1) or rotate_session())
+    run.update_products()
+
+    # Drittes Produkt reißt die Schwelle, das vierte trifft schon die neue Session
+    assert len(run.failed_products) == 4
+    assert len(rotations) == 1
@@ -0,0 +1,82 @@
+"""
+Query-Budgets der wichtigsten Lese-Endpunkte. Jeder Endpunkt läuft gegen einen kleinen und einen
+zehnmal größeren Cluster – die Anzahl Queries darf nicht mit der Produktzahl wachsen (N+1).
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.auth import get_current_user
+from app.cache import response_cache
+from app.database import get_db
+from app.models import Market, MarketChange, MarketCluster, Product, ProductChange, User
+from app.query_stats import assert_max_queries
+from app.routes import chartdata, market_clusters
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# (Pfad, maximale Queries) – auf den aktuellen Stand gesetzt, jede zusätzliche Query fällt auf.
+# {cluster_id} und {market_id} werden pro Seed ersetzt.
+ENDPOINT_BUDGETS = [
+    ("/market-clusters/", 2),
+    ("/market-clusters/dashboard-overview", 3),
+    ("/market-clusters/{cluster_id}", 16),
+    ("/market-clusters/{cluster_id}/markets/{market_id}/products", 8),
+    ("/chartdata/get-stacked-bar-data-for-cluster/{cluster_id}", 5),
+]
+
+
+def seed_cluster(session, products_per_market: int) -> dict:
+    now = datetime.now(timezone.utc)
+    user = User(username="alice", email="alice@example.com", hashed_password="x", is_verified=True)
+    cluster = MarketCluster(title="Küche", user=user, is_initial_scraped=True)
+    session.add_all([user, cluster])
+
+    for market_index in range(2):
+        market = Market(keyword=f"keyword {market_index}")
+        cluster.markets.append(market)
+        market_change = MarketChange(market=market, change_date=now - timedelta(days=1), total_revenue=100.0)
+        session.add(market_change)
+        for product_index in range(products_per_market):
+            product = Product(asin=f"M{market_index}P{product_index}", last_time_scraped=now)
+            market.products.append(product)
+            market_change.products.append(product)
+            for day in range(0, 30, 5):
+                session.add(ProductChange(
+                    asin=product.asin, change_date=now - timedelta(days=30 - day), changes="price",
+                    title=f"Produkt {product_index}", price=9.99, blm=day, total=day * 10.0,
+                    main_category_rank=100 + day, rating=4.5, review_count=day,
+                ))
+    session.commit()
+    return {"cluster_id": cluster.id, "market_id": cluster.markets[0].id, "user_id": user.id}
+
+
+@pytest.fixture(params=[5, 50], ids=["small", "large"])
+def api(request, session_factory):
+    with session_factory() as session:
+        ids = seed_cluster(session, request.param)
+
+    def override_db():
+        with session_factory() as session:
+            yield session
+
+    def override_user():
+        with session_factory() as session:
+            return session.get(User, ids["user_id"])
+
+    app = FastAPI()
+    app.include_router(market_clusters.router, prefix="/market-clusters")
+    app.include_router(chartdata.router, prefix="/chartdata")
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = override_user
+
+    return TestClient(app), session_factory.kw["bind"], ids
+
+
+@pytest.mark.parametrize("path,max_queries", ENDPOINT_BUDGETS)
+def test_endpoint_query_budget(api, path, max_queries):
+    client, engine, ids = api
+    response_cache.clear()
+
+    with assert_max_queries(engine, max_queries):
+        response = client.get(path.format(**ids))
+    assert response.status_code == 200
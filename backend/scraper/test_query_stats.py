@@ -0,0 +1,71 @@
+import logging
+
+import pytest
+from app import query_stats
+from app.query_stats import QueryStatsMiddleware, assert_max_queries, track_queries
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    yield engine
+    engine.dispose()
+
+
+def test_nested_blocks_count_for_both(engine):
+    with engine.connect() as conn, track_queries() as outer:
+        conn.execute(text("SELECT 1"))
+        with track_queries() as inner:
+            conn.execute(text("SELECT 2"))
+            conn.execute(text("SELECT 3"))
+
+    assert (outer.count, inner.count) == (3, 2)
+    assert outer.seconds >= inner.seconds > 0
+
+
+def test_failed_statement_does_not_break_timing(engine):
+    with engine.connect() as conn, track_queries() as stats:
+        with pytest.raises(Exception):
+            conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 1"))
+        assert not conn.info["query_started_at"]
+    assert stats.count == 1
+
+
+def test_slow_query_is_logged_with_parameters(engine, monkeypatch, caplog):
+    monkeypatch.setattr(query_stats, "SLOW_QUERY_MS", 0.000001)
+    with caplog.at_level(logging.WARNING, logger="app.query_stats"), engine.connect() as conn:
+        conn.execute(text("SELECT :asin"), {"asin": "B000000001"})
+    assert "Langsame Query" in caplog.text and "B000000001" in caplog.text
+
+
+def test_middleware_sets_headers(engine):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, headers=True)
+
+    @app.get("/items")
+    def list_items():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return []
+
+    response = TestClient(app).get("/items")
+    assert response.headers["x-db-query-count"] == "2"
+    assert float(response.headers["x-db-time-ms"]) >= 0
+
+
+def test_assert_max_queries_lists_statements(engine):
+    with engine.connect() as conn:
+        with assert_max_queries(engine, 2):
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+        with pytest.raises(AssertionError, match="3 Queries statt höchstens 2") as error:
+            with assert_max_queries(engine, 2):
+                for value in range(3):
+                    conn.execute(text(f"SELECT {value}"))
+    assert "SELECT 2" in str(error.value)
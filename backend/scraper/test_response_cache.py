@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+import pytest
+from app.auth import get_current_user
+from app.cache import bump_data_version, response_cache
+from app.database import get_db
+from app.models import ProductChange, User
+from app.routes import market_clusters, products
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from scraper.test_query_budgets import seed_cluster
+
+
+@pytest.fixture
+def api(session_factory):
+    with session_factory() as session:
+        ids = seed_cluster(session, 3)
+
+    def override_db():
+        with session_factory() as session:
+            yield session
+
+    def override_user():
+        with session_factory() as session:
+            return session.get(User, ids["user_id"])
+
+    app = FastAPI()
+    app.include_router(market_clusters.router, prefix="/market-clusters")
+    app.include_router(products.router, prefix="/products")
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = override_user
+    response_cache.clear()
+    yield TestClient(app), ids["cluster_id"], session_factory
+    response_cache.clear()
+
+
+def test_repeated_request_is_served_from_cache(api):
+    client, cluster_id, _ = api
+    path = f"/market-clusters/{cluster_id}"
+    first = client.get(path)
+    misses, hits = response_cache.misses, response_cache.hits
+    second = client.get(path)
+
+    assert second.json() == first.json()
+    assert (response_cache.misses, response_cache.hits) == (misses, hits + 1)
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+def test_bump_data_version_invalidates_cached_details(api):
+    client, cluster_id, _ = api
+    path = f"/market-clusters/{cluster_id}"
+    client.get(path)
+    misses = response_cache.misses
+    bump_data_version()
+    client.get(path)
+
+    assert response_cache.misses == misses + 1
+
+
+def test_cluster_change_misses_cache_and_changes_etag(api):
+    client, cluster_id, _ = api
+    path = f"/market-clusters/{cluster_id}"
+    before = client.get(path)
+    misses = response_cache.misses
+    assert client.put(f"/market-clusters/update/{cluster_id}", json={"title": "Garten"}).status_code == 200
+    after = client.get(path)
+
+    assert response_cache.misses == misses + 1
+    assert after.json()["title"] == "Garten"
+    assert after.headers["etag"] != before.headers["etag"]
+
+
+def test_if_none_match_returns_304_without_body(api):
+    client, cluster_id, _ = api
+    path = f"/market-clusters/{cluster_id}"
+    etag = client.get(path).headers["etag"]
+    misses, hits = response_cache.misses, response_cache.hits
+
+    response = client.get(path, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    # 304 kommt vor dem Cache – die Details werden gar nicht erst gebaut oder nachgeschlagen
+    assert (response_cache.misses, response_cache.hits) == (misses, hits)
+
+
+def test_stale_etag_gets_full_response(api):
+    client, cluster_id, _ = api
+    path = f"/market-clusters/{cluster_id}"
+    response = client.get(path, headers={"If-None-Match": 'W/"veraltet"'})
+
+    assert response.status_code == 200
+    assert response.json()["markets"]
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value, usegmt=True)
+
+
+def test_if_modified_since_alone_never_hides_cluster_changes(api):
+    client, cluster_id, _ = api
+    path = f"/market-clusters/{cluster_id}"
+    assert "last-modified" not in client.get(path).headers
+
+    client.put(f"/market-clusters/update/{cluster_id}", json={"title": "Garten"})
+    response = client.get(path, headers={"If-Modified-Since": http_date(datetime.now(timezone.utc))})
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Garten"
+
+
+def test_product_last_modified_covers_day_rollover_and_new_changes(api):
+    client, _, session_factory = api
+    path = "/products/product-changes/M0P0"
+    last_modified = client.get(path).headers["last-modified"]
+    start_of_today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # Neuester Change liegt Tage zurück – Last-Modified ist trotzdem der heutige Tagesbeginn
+    assert parsedate_to_datetime(last_modified) == start_of_today
+    assert client.get(path, headers={"If-Modified-Since": last_modified}).status_code == 304
+    yesterday = http_date(start_of_today - timedelta(seconds=1))
+    assert client.get(path, headers={"If-Modified-Since": yesterday}).status_code == 200
+
+    with session_factory() as session:
+        session.add(ProductChange(asin="M0P0", change_date=datetime.now(timezone.utc) + timedelta(seconds=1),
+                                  changes="price", price=8.99))
+        session.commit()
+    assert client.get(path, headers={"If-Modified-Since": last_modified}).status_code == 200
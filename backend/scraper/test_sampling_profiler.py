@@ -0,0 +1,53 @@
+import time
+
+import pytest
+from scraper.sampling_profiler import SamplingProfiler, profile_run, profiling_enabled, set_profiling
+
+
+@pytest.fixture(autouse=True)
+def reset_override(monkeypatch):
+    monkeypatch.delenv("SCRAPER_PROFILE", raising=False)
+    yield
+    set_profiling(None)
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_samples_fold_the_calling_stack(tmp_path):
+    profiler = SamplingProfiler(interval_ms=1).start()
+    busy_wait(0.1)
+    profiler.stop()
+
+    assert sum(profiler.samples.values()) > 10
+    stack = profiler.samples.most_common(1)[0][0]
+    assert "test_samples_fold_the_calling_stack (test_sampling_profiler.py:" in stack
+    assert stack.split(";")[-1].startswith("busy_wait (test_sampling_profiler.py:")
+
+    lines = profiler.write_folded(tmp_path / "profile.folded").read_text().splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_toggle_env_and_override(monkeypatch):
+    assert not profiling_enabled()
+    monkeypatch.setenv("SCRAPER_PROFILE", "1")
+    assert profiling_enabled()
+    set_profiling(False)
+    assert not profiling_enabled()
+    set_profiling(None)
+    assert profiling_enabled()
+
+
+def test_profile_run_writes_file_only_when_enabled(tmp_path):
+    with profile_run("products-off", tmp_path) as profiler:
+        assert profiler is None
+    assert not list(tmp_path.iterdir())
+
+    set_profiling(True)
+    with profile_run("products-on", tmp_path) as profiler:
+        busy_wait(0.1)
+    assert profiler.samples
+    assert (tmp_path / "profile-products-on.folded").read_text().strip()
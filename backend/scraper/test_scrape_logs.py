@@ -0,0 +1,80 @@
+from datetime import date, datetime
+
+from app.scrape_logs import (fail_rows, import_report_files, parse_report_file, query_scrape_log_entries,
+                             record_scrape_log_entries, summarize_scrape_log_entries, warning_rows)
+
+FAILS_REPORT = """❌ Scraping Fehler – 2025-05-01 10:00:00
+============================================================
+🧾 ASIN: B000000001
+🔗 URL: https://www.amazon.com/dp/B000000001
+🚫 Grund: Exception
+⚠️ Kontext: Message: timeout
+  Stacktrace: zeile 2
+------------------------------------------------------------
+
+🧾 ASIN: B000000002
+🔗 URL: https://www.amazon.com/dp/B000000002
+🚫 Grund: Blocked
+⚠️ Kontext: Captcha
+------------------------------------------------------------
+"""
+
+
+def seed(db):
+    day_one, day_two = datetime(2025, 5, 1, 12), datetime(2025, 5, 2, 12)
+    rows = fail_rows("products-1", [{"asin": "A1", "url": "u", "missing": ["Exception"], "context": "x"}], day_one)
+    rows += warning_rows("products-1", [
+        {"asin": "A1", "url": "u", "message": "kein Preis", "type": "price"},
+        {"asin": "A2", "url": "u", "message": "kein Rating", "type": "rating"},
+    ], day_one)
+    rows += warning_rows("products-2", [
+        {"asin": f"B{index}", "url": "u", "message": "kein Preis", "type": "price"} for index in range(5)
+    ], day_two)
+    record_scrape_log_entries(db, rows)
+    db.commit()
+
+
+def test_filters(db):
+    seed(db)
+    assert [item["kind"] for item in query_scrape_log_entries(db, asin="A1")["items"]] == ["warning", "fail"]
+    assert len(query_scrape_log_entries(db, warning_type="price")["items"]) == 6
+    assert len(query_scrape_log_entries(db, run="products-1", kind="warning")["items"]) == 2
+    assert len(query_scrape_log_entries(db, start=date(2025, 5, 2))["items"]) == 5
+    assert len(query_scrape_log_entries(db, end=date(2025, 5, 1))["items"]) == 3
+
+
+def test_keyset_pagination(db):
+    seed(db)
+    seen = []
+    page = query_scrape_log_entries(db, limit=3)
+    while True:
+        seen += [item["id"] for item in page["items"]]
+        if page["next_cursor"] is None:
+            break
+        page = query_scrape_log_entries(db, limit=3, before_id=page["next_cursor"])
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 8
+
+
+def test_summary(db):
+    seed(db)
+    summary = summarize_scrape_log_entries(db, run="products-1")
+    assert {(row["kind"], row["warning_type"]): row["count"] for row in summary} == {
+        ("fail", None): 1, ("warning", "price"): 1, ("warning", "rating"): 1
+    }
+
+
+def test_parse_and_import_report(db, tmp_path):
+    report = tmp_path / "fails-2025-05-01_10-00-00.txt"
+    report.write_text(FAILS_REPORT, encoding="utf-8")
+
+    entries = parse_report_file(report)
+    assert [entry["asin"] for entry in entries] == ["B000000001", "B000000002"]
+    assert entries[0]["missing"] == ["Exception"]
+    assert entries[0]["context"] == "Message: timeout\nStacktrace: zeile 2"
+
+    assert import_report_files(db, tmp_path) == 2
+    assert import_report_files(db, tmp_path) == 0  # bereits übernommen
+    items = query_scrape_log_entries(db, run="products-2025-05-01_10-00-00")["items"]
+    assert {item["asin"] for item in items} == {"B000000001", "B000000002"}
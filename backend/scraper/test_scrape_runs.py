@@ -0,0 +1,41 @@
+import time
+
+from app.scrape_runs import build_scrape_run, get_run, list_runs, run_chart
+
+
+def add_run(db, index, pages, duration=60.0, status="done", scraper="products"):
+    started = time.time() - 3600 + index * 60
+    db.add(build_scrape_run(
+        f"{scraper}-{index}", scraper, started, started + duration, pages, status=status,
+        items_total=pages, items_succeeded=pages, warning_counts={"price": 2, "blm": 1},
+    ))
+    db.commit()
+
+
+def test_derived_fields(db):
+    add_run(db, 0, pages=30, duration=120.0)
+    run = get_run(db, "products-0")
+    assert run["pages_per_minute"] == 15.0
+    assert run["warning_count"] == 3
+    assert run["warning_counts"] == {"price": 2, "blm": 1}
+    assert get_run(db, "products-unknown") is None
+
+
+def test_chart_flags_throughput_regression(db):
+    for index, pages in enumerate([60, 62, 58, 61]):
+        add_run(db, index, pages)
+    add_run(db, 4, pages=5, status="failed")  # zählt nicht zur Vergleichsbasis
+    add_run(db, 5, pages=40)
+
+    points = run_chart(db, "products")
+    assert [point["run"] for point in points] == [f"products-{index}" for index in range(6)]
+    assert points[0]["baseline_pages_per_minute"] is None
+    assert points[5]["baseline_pages_per_minute"] == 60.5
+    assert [point["regression"] for point in points] == [False, False, False, False, True, True]
+
+
+def test_list_filters_by_scraper(db):
+    add_run(db, 0, pages=10)
+    add_run(db, 1, pages=10, scraper="markets")
+    assert [run["run"] for run in list_runs(db, scraper="markets")] == ["markets-1"]
+    assert [run["run"] for run in list_runs(db)] == ["markets-1", "products-0"]
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.models import Market, MarketChange
+from app.routes import scraping
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(scraping, "scraping_jobs", {})
+
+
+def age(job_id, seconds):
+    scraping.scraping_jobs[job_id]["updated_at"] = (
+        datetime.now(timezone.utc) - timedelta(seconds=seconds)).isoformat()
+
+
+def test_finished_jobs_are_evicted_after_ttl():
+    finished, recent, running = (scraping.create_scraping_job(index, 1, ["kw"]) for index in range(3))
+    scraping.update_scraping_job(finished, status="done")
+    scraping.update_scraping_job(recent, status="failed")
+    scraping.update_scraping_job(running, status="products")
+    age(finished, scraping.SCRAPING_JOB_TTL + 1)
+    age(running, scraping.SCRAPING_JOB_TTL + 1)
+
+    new = scraping.create_scraping_job(3, 1, ["kw"])
+
+    assert set(scraping.scraping_jobs) == {recent, running, new}
+    assert scraping.get_scraping_job(finished) is None
+
+
+@pytest.fixture
+def first_page_job(session_factory, monkeypatch):
+    """Startet run_cluster_scraping_job mit festen First-Page-Ergebnissen pro Keyword (None = nicht geladen)."""
+    orchestrated = []
+    monkeypatch.setattr(scraping, "SessionLocal", session_factory)
+    monkeypatch.setattr(scraping, "run_product_orchestrator", lambda cluster_id, job_id: orchestrated.append(cluster_id))
+
+    def run(results):
+        monkeypatch.setattr(scraping, "fetch_first_page_data", results.get)
+        with session_factory() as session:
+            markets = [Market(keyword=keyword) for keyword in results]
+            session.add_all(markets)
+            session.commit()
+            market_ids = [market.id for market in markets]
+        job_id = scraping.create_scraping_job(7, 1, list(results))
+        scraping.run_cluster_scraping_job(job_id, 7, market_ids)
+        with session_factory() as session:
+            changed = {keyword for (keyword,) in session.query(Market.keyword).join(MarketChange)}
+        return scraping.get_scraping_job(job_id), changed, orchestrated
+
+    return run
+
+
+def test_unloaded_first_page_is_recorded_as_failed_keyword(first_page_job):
+    page = {"first_page_products": [{"asin": "B000000001", "title": "Tasse"}], "top_search_suggestions": []}
+
+    job, changed, orchestrated = first_page_job({"tasse": page, "becher": None})
+
+    assert job["failed_keywords"] == ["becher"]
+    assert job["keywords_done"] == 2
+    assert job["status"] == "first_page"
+    # kein leerer MarketChange für das fehlgeschlagene Keyword
+    assert changed == {"tasse"}
+    assert orchestrated == [7]
+
+
+def test_job_fails_when_no_first_page_loads(first_page_job):
+    job, changed, orchestrated = first_page_job({"tasse": None, "becher": None})
+
+    assert job["status"] == "failed"
+    assert "tasse" in job["error"] and "becher" in job["error"]
+    assert changed == set()
+    assert orchestrated == []
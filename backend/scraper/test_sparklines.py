@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.auth import get_current_user
+from app.database import get_db
+from app.models import Product, ProductChange, User
+from app.routes import chartdata
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# (Tage zurück, Preis, BLM) – am Tag -5 gewinnt der letzte Change des Tages
+CHANGES = [(10, 10.0, 100), (5, 12.5, 200), (5, 13.0, None), (2, 13.0, 300)]
+
+
+@pytest.fixture
+def client(session_factory):
+    now = datetime.now(timezone.utc)
+    with session_factory() as session:
+        for asin in ("A1", "A2"):
+            session.add(Product(asin=asin))
+            session.add_all(ProductChange(asin=asin, change_date=now - timedelta(days=days, minutes=-index),
+                                          changes="price", price=price, blm=blm)
+                            for index, (days, price, blm) in enumerate(CHANGES))
+        session.commit()
+
+    def override_db():
+        with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(chartdata.router, prefix="/chartdata")
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: User(username="alice", email="alice@example.com")
+    return TestClient(app)
+
+
+def post(client, asins, fields=None):
+    body = {"asins": asins} if fields is None else {"asins": asins, "fields": fields}
+    return client.post("/chartdata/sparklines", json=body)
+
+
+def test_batch_returns_requested_fields_per_asin(client):
+    data = post(client, ["A1", "A2"], ["price", "blm"]).json()
+
+    # 11 Tage vom ersten Change bis heute, Lücken mit dem Vortag gefüllt, fehlende Werte 0
+    expected = {"price": [10.0] * 5 + [13.0] * 6, "blm": [100] * 5 + [0] * 3 + [300] * 3}
+    assert data == {"A1": expected, "A2": expected}
+
+
+def test_unknown_field_is_rejected(client):
+    response = post(client, ["A1"], ["price", "colour"])
+    assert response.status_code == 400
+    assert "colour" in response.json()["detail"]
+
+
+def test_unknown_asins_get_empty_lists(client):
+    assert post(client, ["NOPE"], ["price", "rating"]).json() == {"NOPE": {"price": [], "rating": []}}
+
+
+def test_batch_size_is_limited(client):
+    limit = chartdata.MAX_SPARKLINE_BATCH_ASINS
+    assert post(client, [f"X{index}" for index in range(limit)]).status_code == 200
+    assert post(client, [f"X{index}" for index in range(limit + 1)]).status_code == 422
+
+
+def test_batch_matches_single_asin_endpoint(client):
+    single = client.get("/chartdata/get-sparkline-grid-data/A1").json()
+    batch = post(client, ["A1", "A2"]).json()["A1"]["price"]
+
+    # Der Einzel-Endpunkt liefert ganze Zahlen, sonst sind die Reihen identisch
+    assert single == [int(value) for value in batch]
+    assert len(single) == 11
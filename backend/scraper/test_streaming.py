@@ -0,0 +1,78 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from app.database import get_db
+from app.models import Product, ProductChange
+from app.routes import products
+from app.streaming import iter_json_array, iter_ndjson
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# mehr Changes als eine yield_per-Batch, damit das Streaming über mehrere Batches läuft
+CHANGE_COUNT = 7
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    start = datetime(2025, 5, 1, 12, 0)
+    with session_factory() as session:
+        session.add(Product(asin="A1"))
+        session.add_all(ProductChange(asin="A1", change_date=start + timedelta(days=day), changes="price",
+                                      title="Tasse 🎉", price=10.0 + day, blm=day * 10)
+                        for day in range(CHANGE_COUNT))
+        session.commit()
+
+    def override_db():
+        with session_factory() as session:
+            yield session
+
+    # der Stream öffnet eine eigene Session – auf die Test-DB umbiegen
+    monkeypatch.setattr(products, "SessionLocal", session_factory)
+    monkeypatch.setattr(products, "STREAM_BATCH_SIZE", 3)
+
+    app = FastAPI()
+    app.include_router(products.router, prefix="/products")
+    app.dependency_overrides[get_db] = override_db
+    return TestClient(app)
+
+
+def test_ndjson_stream_matches_plain_response(client):
+    plain = client.get("/products/product-changes/A1")
+    streamed = client.get("/products/product-changes/A1", params={"stream": "ndjson"})
+
+    assert plain.status_code == streamed.status_code == 200
+    assert streamed.headers["content-type"].startswith("application/x-ndjson")
+    lines = streamed.text.splitlines()
+    assert len(lines) == CHANGE_COUNT
+    assert [json.loads(line) for line in lines] == plain.json()
+
+
+def test_chunked_array_stream_matches_plain_response(client):
+    plain = client.get("/products/product-changes/A1")
+    streamed = client.get("/products/product-changes/A1", params={"stream": "array"})
+
+    assert streamed.status_code == 200
+    assert streamed.headers["content-type"].startswith("application/json")
+    assert streamed.json() == plain.json()
+    assert [change["change_date"] for change in streamed.json()] == sorted(
+        (change["change_date"] for change in plain.json()), reverse=True)
+
+
+def test_stream_keeps_validators_and_404(client):
+    streamed = client.get("/products/product-changes/A1", params={"stream": "ndjson"})
+    assert "etag" in streamed.headers
+    revalidated = client.get("/products/product-changes/A1", params={"stream": "ndjson"},
+                             headers={"If-None-Match": streamed.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.text == ""
+
+    assert client.get("/products/product-changes/UNKNOWN", params={"stream": "ndjson"}).status_code == 404
+    assert client.get("/products/product-changes/A1", params={"stream": "csv"}).status_code == 422
+
+
+def test_json_array_chunks_are_valid_json():
+    assert "".join(iter_json_array([])) == "[]"
+    items = [{"asin": "A1", "title": "Tasse 🎉"}, {"asin": "A2", "title": None}]
+    assert json.loads("".join(iter_json_array(items))) == items
+    assert [json.loads(line) for line in "".join(iter_ndjson(items)).splitlines()] == items
@@ -0,0 +1,67 @@
+import pytest
+from app.auth import create_access_token, get_current_user, invalidate_cached_user, user_cache
+from app.database import get_db
+from app.models import User
+from app.routes import users
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(session_factory):
+    with session_factory() as session:
+        session.add_all([
+            User(id=1, username="admin", email="admin@example.com", hashed_password="x", is_verified=True),
+            User(id=2, username="alice", email="alice@example.com", hashed_password="x", is_verified=True,
+                 subscription="basic", credits=10),
+        ])
+        session.commit()
+
+    def override_db():
+        with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(users.router, prefix="/users")
+    app.dependency_overrides[get_db] = override_db
+
+    @app.get("/me")
+    def me(current_user: User = Depends(get_current_user)):
+        return {"subscription": current_user.subscription, "credits": current_user.credits}
+
+    user_cache.clear()
+    yield TestClient(app)
+    user_cache.clear()
+
+
+def auth(username):
+    return {"Authorization": f"Bearer {create_access_token({'username': username})}"}
+
+
+def set_subscription(session_factory, user_id, subscription):
+    with session_factory() as session:
+        session.get(User, user_id).subscription = subscription
+        session.commit()
+
+
+def test_subscription_change_is_visible_after_invalidation(client, session_factory):
+    assert client.get("/me", headers=auth("alice")).json()["subscription"] == "basic"
+
+    set_subscription(session_factory, 2, "pro")
+    # Ohne Invalidierung liefert der Cache bis zur TTL die alten Felder
+    assert client.get("/me", headers=auth("alice")).json()["subscription"] == "basic"
+
+    invalidate_cached_user(2)
+    assert client.get("/me", headers=auth("alice")).json()["subscription"] == "pro"
+
+
+def test_credit_change_is_visible_on_next_request(client):
+    assert client.get("/users/get-credits", headers=auth("alice")).json()["credits"] == 10
+    assert client.post("/users/add-credits", params={"amount": 5}, headers=auth("alice")).status_code == 200
+    assert client.get("/users/get-credits", headers=auth("alice")).json()["credits"] == 15
+
+
+def test_deleted_user_is_rejected_on_next_request(client):
+    assert client.get("/me", headers=auth("alice")).status_code == 200
+    assert client.delete("/users/admin/delete/2", headers=auth("admin")).status_code == 200
+    assert client.get("/me", headers=auth("alice")).status_code == 404
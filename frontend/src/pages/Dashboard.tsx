@@ -19,7 +19,10 @@ import LoadingState from "../components/dashboard/LoadingState";
 import MarketClustersGrid from "../components/dashboard/MarketClustersGrid";
 import ScrapingProcessDashboard from "../components/dashboard/ScrapingProcessDashboard";
 import { useSnackbar } from "../providers/SnackbarProvider";
-import MarketService from "../services/MarketService";
+import MarketService, {
+  isScrapingJobFinished,
+  ScrapingJob,
+} from "../services/MarketService";
 
 ChartJS.register(
   CategoryScale,
@@ -83,11 +86,56 @@ const Dashboard: React.FC = () => {
     fetchLoadingClusters();
   }, []);
 
-  // 🔄 Poll alle 5 Sekunden, solange noch Clusters nicht fertig sind
+  // 🔄 Laufende Jobs einzeln über /scraping/jobs/{job_id} pollen
+  const pollScrapingJobs = async () => {
+    const active = loadingClusters.filter(
+      (cluster) => !cluster.job || !isScrapingJobFinished(cluster.job)
+    );
+    const jobs = await Promise.all(
+      active.map((cluster) =>
+        cluster.job
+          ? MarketService.getScrapingJob(cluster.job.job_id)
+          : Promise.resolve(null)
+      )
+    );
+
+    // Cluster ohne abfragbaren Job (z.B. nach Server-Neustart) → Liste neu laden
+    if (jobs.some((job) => job === null)) {
+      fetchLoadingClusters();
+      return;
+    }
+
+    const polled = jobs as ScrapingJob[];
+    const jobsByCluster = new Map<number, ScrapingJob>(
+      polled.map((job): [number, ScrapingJob] => [job.cluster_id, job])
+    );
+    jobsByCluster.forEach((job) => {
+      if (job.status === "failed") {
+        showSnackbar(`Scraping fehlgeschlagen: ${job.error ?? ""}`, "error");
+      }
+    });
+
+    setLoadingClusters(
+      loadingClusters
+        .map((cluster) => ({
+          ...cluster,
+          job: jobsByCluster.get(cluster.id) ?? cluster.job,
+        }))
+        .filter((cluster) => cluster.job?.status !== "done")
+    );
+    if (polled.some((job) => job.status === "done")) {
+      fetchData();
+    }
+  };
+
+  // 🔄 Poll alle 20 Sekunden, solange noch Jobs laufen
   useEffect(() => {
-    if (loadingClusters.length === 0) return;
+    const hasActiveJobs = loadingClusters.some(
+      (cluster) => !cluster.job || !isScrapingJobFinished(cluster.job)
+    );
+    if (!hasActiveJobs) return;
     const interval = setInterval(() => {
-      fetchLoadingClusters();
+      pollScrapingJobs();
     }, 20000);
     return () => clearInterval(interval);
   }, [loadingClusters]);
@@ -2,6 +2,21 @@ import { formatError } from '../utils/errorFormatting';
 
 const API_URL = "http://127.0.0.1:9000/chartdata";
 
+// Muss zu MAX_SPARKLINE_BATCH_ASINS in backend/app/routes/chartdata.py passen
+const MAX_SPARKLINE_BATCH_ASINS = 500;
+
+export type SparklineField =
+  | "price"
+  | "main_category_rank"
+  | "second_category_rank"
+  | "rating"
+  | "review_count"
+  | "blm"
+  | "total";
+
+// { asin: { feld: Werte der letzten 30 Tage } }
+export type SparklineGridData = Record<string, Record<string, number[]>>;
+
 interface LineChartData {
   x_axis: number[];
   series: { name: string; data: number[] }[];
@@ -36,30 +51,43 @@ class ChartDataService {
     }
   }
 
-  static async GetSparkLineGridData(asin: string): Promise<number[] | null> {
+  // Grid-Sparklines aller Kacheln in einem POST statt einem Request pro ASIN (max. 500 ASINs pro Aufruf)
+  static async GetSparkLineGridData(
+    asins: string[],
+    fields: SparklineField[] = ["price"]
+  ): Promise<SparklineGridData | null> {
     try {
       const token = localStorage.getItem(this.TOKEN_KEY);
       if (!token) {
         throw new Error("Kein Token vorhanden. Bitte einloggen.");
       }
 
-      const response = await fetch(
-        `${API_URL}/get-sparkline-grid-data/${asin}`,
-        {
-          method: "GET",
+      const result: SparklineGridData = {};
+      for (let start = 0; start < asins.length; start += MAX_SPARKLINE_BATCH_ASINS) {
+        const response = await fetch(`${API_URL}/sparklines`, {
+          method: "POST",
           headers: {
             Authorization: `Bearer ${token}`,
             "Content-Type": "application/json",
           },
+          body: JSON.stringify({
+            asins: asins.slice(start, start + MAX_SPARKLINE_BATCH_ASINS),
+            fields,
+          }),
+        });
+
+        if (!response.ok) {
+          throw new Error("Fehler beim Abrufen der SparkLine-Daten.");
         }
-      );
 
-      if (!response.ok) {
-        throw new Error("Fehler beim Abrufen der SparkLine-Daten.");
+        const data: SparklineGridData = await response.json();
+        for (const [asin, series] of Object.entries(data)) {
+          result[asin] = Object.fromEntries(
+            Object.entries(series).map(([field, values]) => [field, values.length > 0 ? values : [0]])
+          );
+        }
       }
-
-      const data = await response.json();
-      return data.length > 0 ? data : [0];
+      return result;
     } catch (error) {
       console.error("[ChartDataService] Sparkline grid error:", formatError(error));
       return null;
@@ -2,6 +2,27 @@ import { formatError } from "../utils/errorFormatting";
 
 const API_URL = "http://127.0.0.1:9000";
 
+export type ScrapingJobStatus =
+  | "queued"
+  | "first_page"
+  | "products"
+  | "markets"
+  | "done"
+  | "failed";
+
+export type ScrapingJob = {
+  job_id: string;
+  cluster_id: number;
+  status: ScrapingJobStatus;
+  keywords_total: number;
+  keywords_done: number;
+  failed_keywords: string[];
+  error: string | null;
+};
+
+export const isScrapingJobFinished = (job: ScrapingJob) =>
+  job.status === "done" || job.status === "failed";
+
 class MarketService {
   private static TOKEN_KEY = "token";
 
@@ -197,6 +218,7 @@ class MarketService {
       title: string;
       status: string;
       cluster_type: string;
+      job: ScrapingJob | null;
     }[]
   > {
     try {
@@ -229,6 +251,33 @@ class MarketService {
     }
   }
 
+  // Fortschritt eines einzelnen Jobs – null, wenn der Job nicht (mehr) existiert
+  static async getScrapingJob(jobId: string): Promise<ScrapingJob | null> {
+    try {
+      const token = localStorage.getItem(this.TOKEN_KEY);
+      if (!token) throw new Error("Kein Token vorhanden. Bitte einloggen.");
+
+      const response = await fetch(`${API_URL}/scraping/jobs/${jobId}`, {
+        headers: {
+          Authorization: `Bearer ${token}`,
+          "Content-Type": "application/json",
+        },
+      });
+
+      if (response.status === 404) return null;
+      if (!response.ok)
+        throw new Error("Fehler beim Abrufen des Scraping-Jobs.");
+
+      return await response.json();
+    } catch (error) {
+      console.error(
+        "[MarketService] Fehler bei getScrapingJob:",
+        formatError(error)
+      );
+      return null;
+    }
+  }
+
   static async addAsinToMarket(
     asin: string,
     marketId: number